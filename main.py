@@ -3,26 +3,46 @@ from modul.circuit import Circuit
 from modul.tokensystem import TokenSystem
 from modul.subsystem import Subsystem
 from modul.interconnect import Interconnect
+from modul.measurement import Measurement
+from modul.encoder import Encoder
+from modul.execution import Executor
+from modul.distributed import Coordinator, run_worker
+from modul.store import VectorStore
+from modul.phases import component_seed
+from modul.profiling import PROFILER
+from modul.service import EncodeService
+import argparse
+import asyncio
 import numpy as np
 
-def main():
+def main(profile=False):
     """
     Main function to execute the quantum circuit operations.
 
     This function initializes a quantum circuit with 50 qubits and performs the following steps:
     1. Tokenizes a given word using the `Tokenizer` class.
     2. Initializes the main quantum circuit and assigns qubits to a token system.
-    3. Creates and applies quantum operations on multiple subsystems.
+    3. Creates and applies quantum operations on multiple subsystems. Subsystems that
+       do not fit into the circuit go to a new shard with its own copy of the token system.
     4. Entangles the token system with the subsystems using the `Interconnect` class.
-    5. Outputs the final quantum circuit configuration.
+    5. Measures the token system and the subsystems and outputs the circuit.
+    6. Executes the circuit on the built-in simulator and reports the counts.
 
-    The circuit is then ready for simulation or execution on a quantum device.
+    Parameters:
+    -----------
+    profile : bool, optional
+        Whether to record every stage and print a per-stage timing report
+        (default is False).
     """
+    if profile:
+        PROFILER.enable()
+
     total_qubits = 50    # 50 Qubits insgesamt im Circuit
     main_qubits = 20     # Anzahl der Qubits, die dem Token-System zugewiesen werden
     subsystem_qubits = 10  # Anzahl der Qubits, die jedem Subsystem zugewiesen werden
     subsystems_count = 3  # Anzahl der Subsysteme
-    shots = 1024  # Anzahl der Schüsse (Simulationen) für die Messung (wird hier jedoch nicht verwendet)
+    shots = 1024  # Anzahl der Schüsse (Simulationen) für die Messung
+    seed = 42  # Wurzel-Seed, aus dem alle Phasenmatrizen abgeleitet werden
 
     # Wort zur Tokenisierung
     word = "HELLOQUANTUM"
@@ -35,35 +55,176 @@ def main():
     print(f"Original word: {word}")
     print(f"Tokenized Matrix:\n{np.array(tokens)}")
 
-    # Initialisiere den Hauptcircuit
-    main_circuit = Circuit(total_qubits)
+    # Initialisiere den Hauptcircuit; reicht er nicht aus, werden weitere Shards geöffnet
+    main_circuit = Circuit(total_qubits, sharding=True)
 
     # Initialisiere das Token-System mit der Token-Matrix
-    token_system = TokenSystem(main_circuit, num_qubits=main_qubits)
+    token_system = TokenSystem(main_circuit, num_qubits=main_qubits, name="TokenSystem",
+                               seed=component_seed(seed, 0))
     token_system.tp_matrix = np.array(tokens).T[:3, :main_qubits]  # Setze die Token-Matrix als TP-Matrix
     token_system.apply_operations()  # Wende die Operationen des Token-Systems an
 
-    # Erstelle die Subsysteme
-    subsystems = []
-    subsystems_ranges = []
+    # Erstelle die Subsysteme; jeder Shard besteht aus einem Token-System und seinen Subsystemen
+    shards = [(token_system, [])]
     for i in range(subsystems_count):
-        # Erzeuge eine Zufallsmatrix für die Phasenoperationen des Subsystems
-        subsystem_matrix = np.random.rand(subsystem_qubits, 3) * 2 * np.pi
-        print(f"Subsystem Matrix (Phasen) für Subsystem {i + 1}:\n{subsystem_matrix}")
+        # Die Phasen des Subsystems werden bei Bedarf aus seinem Seed erzeugt
+        subsystem_seed = component_seed(seed, i + 1)
+        print(f"Seed der Phasen für Subsystem {i + 1}: {subsystem_seed}")
+
+        if not main_circuit.fits(subsystem_qubits):
+            # Verschränke den vollen Shard und öffne einen neuen mit einer Kopie des Token-Systems
+            Interconnect(main_circuit).entangle(shards[-1][0].qubit_range, shards[-1][1])
+            main_circuit.new_shard()
+            shard_token_system = TokenSystem(main_circuit, num_qubits=main_qubits)
+            shard_token_system.tp_matrix = token_system.tp_matrix
+            shard_token_system.ip_matrix = token_system.ip_matrix
+            shard_token_system.apply_operations()
+            shards.append((shard_token_system, []))
 
         # Initialisiere das Subsystem mit einer neuen Qubit-Zuweisung
-        subsystem = Subsystem(main_circuit, num_qubits=subsystem_qubits)
-        subsystem.tp_matrix = subsystem_matrix
+        subsystem = Subsystem(main_circuit, num_qubits=subsystem_qubits, name=f"Subsystem{i + 1}",
+                              seed=subsystem_seed)
         subsystem.apply_operations()  # Wende die Operationen des Subsystems an
-        subsystems.append(subsystem)
-        subsystems_ranges.append(subsystem.qubit_range)
+        shards[-1][1].append(subsystem.qubit_range)
 
-    # Erstelle und initialisiere die Interconnect-Klasse
+    # Erstelle und initialisiere die Interconnect-Klasse für den letzten Shard
     interconnect = Interconnect(main_circuit)
-    interconnect.entangle(token_system.qubit_range, subsystems_ranges)  # Verschränke Token-System und Subsysteme
+    interconnect.entangle(shards[-1][0].qubit_range, shards[-1][1])  # Verschränke Token-System und Subsysteme
+
+    # Messe das Token-System und jedes Subsystem in eigene klassische Register
+    measurements = []
+    subsystem_number = 0
+    for shard, (shard_token_system, subsystems_ranges) in enumerate(shards):
+        measurement = Measurement(main_circuit.get_circuit(shard), verbose=True)
+        measurement.measure_subsystem(shard_token_system.qubit_range, label="TokenSystem")
+        for subsystem_range in subsystems_ranges:
+            subsystem_number += 1
+            measurement.measure_subsystem(subsystem_range, label=f"Subsystem{subsystem_number}")
+        measurements.append(measurement)
+
+    # Ausgabe der resultierenden Circuits
+    for shard_circuit in main_circuit.shards:
+        print(shard_circuit)
+
+    # Führe alle Shards auf dem eingebauten Simulator aus
+    executor = Executor(shots=shots)
+    for shard, counts in enumerate(executor.run(measurements)):
+        for label, (outcomes, outcome_counts) in counts.items():
+            most_frequent = outcomes[np.argmax(outcome_counts)]
+            width = len(measurements[shard].groups[label])
+            print(f"Shard {shard} {label}: {len(outcomes)} distinct outcomes, most frequent "
+                  f"{int(most_frequent):0{width}b} ({outcome_counts.max()} of {shots})")
+    print(f"Executed {len(measurements)} shard(s) in {executor.stats['seconds'] * 1000:.2f} ms")
+
+    if profile:
+        # Zeitbericht pro Stufe ausgeben
+        PROFILER.disable()
+        print(PROFILER.report())
+
+def sentence(text, shots=None):
+    """
+    Encode a sentence in a single circuit and print one vector per word.
+
+    The words share the TokenSystem qubits, which are measured and reset after
+    every word, and the Subsystems carry the context from word to word (see
+    `Encoder.build_sentence_circuit`).
+
+    Parameters:
+    -----------
+    text : str
+        The sentence; words are separated by whitespace.
+    shots : int, optional
+        The number of samples, or None for exact probabilities (default is None).
+    """
+    encoder = Encoder(seed=42, shots=shots)
+    words = text.split()
+    if not words:
+        return
+
+    # Ein Vektor pro Wort aus einer einzigen Simulation
+    vectors, circuit = encoder.encode_sentence(words, return_circuit=True)
+    print(f"Encoded {len(words)} word(s) in one circuit: {circuit.num_qubits} qubits, "
+          f"{len(circuit)} operations {circuit.count_ops()}")
+    for word, vector in zip(words, vectors):
+        print(f"{word}:\n{np.round(vector, 3)}")
+
+def serve(host="127.0.0.1", port=8080, max_batch_size=64, max_delay=0.005, workers=0):
+    """
+    Serve the Encoder over HTTP with micro-batching until interrupted.
+
+    Parameters:
+    -----------
+    host : str, optional
+        The interface to listen on (default is "127.0.0.1").
+    port : int, optional
+        The port to listen on (default is 8080).
+    max_batch_size : int, optional
+        The largest number of words per batch (default is 64).
+    max_delay : float, optional
+        The longest wait in seconds for a batch to fill (default is 0.005).
+    workers : int, optional
+        The number of worker processes, 0 for in-process encoding (default is 0).
+    """
+    service = EncodeService(Encoder(seed=0), max_batch_size=max_batch_size, max_delay=max_delay, workers=workers)
+    print(f"Serving POST /encode and GET /stats on http://{host}:{port}")
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+def distribute(corpus, queue, store, workers=None, shard_size=1024):
+    """
+    Encode a corpus with a coordinator and worker processes into a VectorStore.
 
-    # Ausgabe des resultierenden Circuits
-    print(main_circuit.get_circuit())
+    Workers on further nodes join with `python main.py --worker <queue>` if the
+    queue directory is on a shared file system.
+
+    Parameters:
+    -----------
+    corpus : str
+        A text file with one word per line.
+    queue : str
+        The directory of the work queue.
+    store : str
+        The directory of the output VectorStore; words already in it are skipped.
+    workers : int, optional
+        The number of local worker processes (default is the number of CPUs).
+    shard_size : int, optional
+        The number of words per shard (default is 1024).
+    """
+    encoder = Encoder(seed=0)
+    with open(corpus) as corpus_file:
+        words = [line.strip() for line in corpus_file if line.strip()]
+    coordinator = Coordinator(encoder, queue, shard_size=shard_size, workers=workers)
+    appended = coordinator.run(words, VectorStore(store, row_shape=encoder.dimension))
+    stats = coordinator.stats
+    print(f"Appended {appended} vectors from {stats['merged']} of {stats['shards']} shards in "
+          f"{stats['seconds']:.2f} s ({stats['retries']} retries, failed shards: {list(stats['failed'])})")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Encode a word with the HDC circuit.")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing report.")
+    parser.add_argument("--sentence", help="Encode the words of a sentence in one circuit instead.")
+    parser.add_argument("--shots", type=int, help="Samples per word for --sentence (default: exact).")
+    parser.add_argument("--distribute", metavar="CORPUS", help="Encode a corpus (one word per line) into --store.")
+    parser.add_argument("--queue", default="queue", help="Work queue directory for --distribute and --worker.")
+    parser.add_argument("--store", default="vectors", help="Output store directory for --distribute.")
+    parser.add_argument("--shard-size", type=int, default=1024)
+    parser.add_argument("--worker", action="store_true", help="Join the work queue of a coordinator as a worker.")
+    parser.add_argument("--serve", action="store_true", help="Serve the Encoder over HTTP instead.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, help="Worker processes for --serve (default: 0) or --distribute.")
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.host, args.port, args.max_batch_size, args.max_delay_ms / 1000, args.workers or 0)
+    elif args.distribute:
+        distribute(args.distribute, args.queue, args.store, workers=args.workers, shard_size=args.shard_size)
+    elif args.worker:
+        run_worker(args.queue)
+    elif args.sentence:
+        sentence(args.sentence, shots=args.shots)
+    else:
+        main(profile=args.profile)
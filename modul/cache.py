@@ -0,0 +1,165 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_key(*parts):
+    """
+    Build a content-addressed key from strings, numbers and arrays.
+
+    Arrays are hashed by dtype, shape and raw bytes, so two arrays with equal
+    contents produce the same key regardless of their identity.
+
+    Parameters:
+    -----------
+    *parts : str, bytes, int, float, tuple, list or numpy.ndarray
+        The contents that identify a cached value.
+
+    Returns:
+    --------
+    str
+        A hexadecimal BLAKE2b digest of the parts.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def update(part):
+        if isinstance(part, np.ndarray):
+            digest.update(f"array:{part.dtype.str}:{part.shape}:".encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, (tuple, list)):
+            digest.update(f"seq:{len(part)}:".encode())
+            for item in part:
+                update(item)
+        elif isinstance(part, bytes):
+            digest.update(b"bytes:%d:" % len(part) + part)
+        else:
+            text = str(part)
+            digest.update(f"{type(part).__name__}:{len(text)}:{text}".encode())
+
+    for part in parts:
+        update(part)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    A size-bounded mapping with least-recently-used eviction.
+
+    Attributes:
+    -----------
+    maxsize : int
+        The maximum number of entries; 0 disables caching.
+    hits : int
+        The number of successful lookups.
+    misses : int
+        The number of failed lookups.
+    evictions : int
+        The number of entries dropped to respect `maxsize`.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Initializes an empty cache.
+
+        Parameters:
+        -----------
+        maxsize : int, optional
+            The maximum number of entries (default is 1024).
+
+        Raises:
+        -------
+        ValueError
+            If `maxsize` is negative.
+        """
+        if maxsize < 0:
+            raise ValueError("The cache size must not be negative.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Look up a value and mark it as recently used.
+
+        Parameters:
+        -----------
+        key : hashable
+            The key of the value.
+        default : object, optional
+            The value returned on a miss (default is None).
+
+        Returns:
+        --------
+        object
+            The cached value, or `default`.
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries if necessary.
+
+        Parameters:
+        -----------
+        key : hashable
+            The key of the value.
+        value : object
+            The value to store.
+
+        Returns:
+        --------
+        None
+        """
+        if self.maxsize == 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries and reset the statistics.
+
+        Returns:
+        --------
+        None
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Get the hit/miss statistics of the cache.
+
+        Returns:
+        --------
+        dict
+            The size, maximum size, hits, misses, evictions and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,4 +1,5 @@
-from qiskit import QuantumCircuit
+from modul.ir import CircuitIR
+from modul.profiling import profiled
 
 class Circuit:
     """
@@ -8,17 +9,36 @@ class Circuit:
     a quantum circuit using Qiskit. It allows subsystems and token systems
     to request a specific number of qubits from the total available qubits.
 
+    Allocated qubits can be given a region name, released (and reset) after
+    they have been measured, and reused by later allocations. With sharding
+    enabled, an allocation that no longer fits opens a new, independent
+    QuantumCircuit (a shard) of the same size; shards share no qubits and can
+    be simulated in parallel. Allocations always go to the current shard, and
+    `get_circuit` returns the current shard by default, so components that
+    allocate first and then call `get_circuit` land on the right circuit.
+
+    With `ir=True` the shards are recorded as `CircuitIR` objects instead of
+    Qiskit circuits. All components write into them unchanged; `to_qiskit`
+    materializes a shard as a QuantumCircuit when it is needed, and Qiskit is not
+    imported before that.
+
     Attributes:
     -----------
     total_qubits : int
-        The total number of qubits available in the circuit.
-    circuit : QuantumCircuit
-        The QuantumCircuit object that represents the quantum circuit.
-    qubits_allocated : int
-        The number of qubits that have been allocated so far.
+        The total number of qubits available in the circuit (per shard).
+    circuit : QuantumCircuit or CircuitIR
+        The circuit that represents the current shard.
+    shards : list of QuantumCircuit or CircuitIR
+        All shards, in creation order.
+    ir : bool
+        Whether the shards are recorded as `CircuitIR`.
+    sharding : bool
+        Whether a new shard is opened when an allocation does not fit.
+    regions : dict of str to range
+        The qubits of each named region.
     """
 
-    def __init__(self, total_qubits=50):
+    def __init__(self, total_qubits=50, sharding=False, ir=False):
         """
         Initializes the Circuit with a specified number of qubits.
 
@@ -26,51 +46,248 @@ class Circuit:
         -----------
         total_qubits : int, optional
             The total number of qubits available in the circuit (default is 50).
+        sharding : bool, optional
+            Whether to open a new shard when an allocation does not fit
+            (default is False).
+        ir : bool, optional
+            Whether to record the shards as `CircuitIR` instead of Qiskit circuits
+            (default is False).
         """
         self.total_qubits = total_qubits
-        self.circuit = QuantumCircuit(total_qubits)
-        self.qubits_allocated = 0
+        self.sharding = sharding
+        self.ir = ir
+        self.shards = []
+        self.regions = {}
+        self._region_shards = {}
+        self._allocated = []
+        self._free_ranges = []
+        self.new_shard()
+
+    @property
+    def current_shard(self):
+        """
+        int: The index of the shard that receives new allocations.
+        """
+        return len(self.shards) - 1
+
+    @property
+    def qubits_allocated(self):
+        """
+        int: The number of qubits handed out so far in the current shard.
+        """
+        return self._allocated[-1]
+
+    @property
+    def available_qubits(self):
+        """
+        int: The number of qubits that can still be allocated in the current shard.
+        """
+        return self.total_qubits - self._allocated[-1] + sum(len(free) for free in self._free_ranges[-1])
+
+    def new_shard(self):
+        """
+        Open a new, empty shard that receives all further allocations.
+
+        Returns:
+        --------
+        int
+            The index of the new shard.
+        """
+        if self.ir:
+            self.circuit = CircuitIR(self.total_qubits)
+        else:
+            from qiskit import QuantumCircuit
+            self.circuit = QuantumCircuit(self.total_qubits)
+        self.shards.append(self.circuit)
+        self._allocated.append(0)
+        self._free_ranges.append([])
+        return self.current_shard
 
-    def allocate_qubits(self, num_qubits):
+    def fits(self, num_qubits):
+        """
+        Check whether an allocation fits into the current shard.
+
+        Parameters:
+        -----------
+        num_qubits : int
+            The number of qubits to allocate.
+
+        Returns:
+        --------
+        bool
+            True if the qubits can be allocated without opening a new shard.
+        """
+        if any(len(free) >= num_qubits for free in self._free_ranges[-1]):
+            return True
+        return self._allocated[-1] + num_qubits <= self.total_qubits
+
+    @profiled("circuit.allocate_qubits", qubits=True)
+    def allocate_qubits(self, num_qubits, name=None):
         """
         Allocate qubits for a subsystem or token system.
 
         This method allocates a specific number of qubits from the total available
-        qubits for use by a subsystem or token system. If there are not enough
-        qubits available, it raises a ValueError.
+        qubits for use by a subsystem or token system. Released qubits are reused
+        first (first fit); otherwise the qubits are taken from the unallocated
+        part of the current shard. If there are not enough qubits available, a
+        new shard is opened when sharding is enabled, and a ValueError is raised
+        otherwise.
 
         Parameters:
         -----------
         num_qubits : int
             The number of qubits to allocate.
+        name : str, optional
+            A region name for the qubits, usable with `region` and
+            `release_qubits` (default is None).
 
         Returns:
         --------
         range
-            A range object representing the indices of the allocated qubits.
+            A range object representing the indices of the allocated qubits
+            within the current shard.
+
+        Raises:
+        -------
+        ValueError
+            If there are not enough qubits available to allocate the requested number,
+            or if the region name is already in use.
+        """
+        if name is not None and name in self.regions:
+            raise ValueError(f"Region '{name}' is already allocated.")
+        if not self.fits(num_qubits):
+            if not self.sharding or num_qubits > self.total_qubits:
+                raise ValueError("Not enough qubits available to allocate.")
+            self.new_shard()
+
+        free_ranges = self._free_ranges[-1]
+        for i, free in enumerate(free_ranges):
+            if len(free) >= num_qubits:
+                allocated = free[:num_qubits]
+                if len(free) > num_qubits:
+                    free_ranges[i] = free[num_qubits:]
+                else:
+                    del free_ranges[i]
+                break
+        else:
+            allocated_start_index = self._allocated[-1]
+            self._allocated[-1] += num_qubits
+            allocated = range(allocated_start_index, allocated_start_index + num_qubits)
+
+        if name is not None:
+            self.regions[name] = allocated
+            self._region_shards[name] = self.current_shard
+        return allocated
+
+    def release_qubits(self, qubits, reset=True):
+        """
+        Release allocated qubits so that later allocations can reuse them.
+
+        Parameters:
+        -----------
+        qubits : str, range or list of int
+            A region name, or the contiguous qubits returned by `allocate_qubits`
+            in the current shard.
+        reset : bool, optional
+            Whether to append reset instructions so that the qubits start in
+            |0> when reused, e.g. after a mid-circuit measurement (default is True).
+
+        Returns:
+        --------
+        None
 
         Raises:
         -------
         ValueError
-            If there are not enough qubits available to allocate the requested number.
+            If the region belongs to an earlier shard, or the qubits are not
+            contiguous, lie outside the allocated qubits or are already free.
+        """
+        if isinstance(qubits, str):
+            if self._region_shards[qubits] != self.current_shard:
+                raise ValueError(f"Region '{qubits}' belongs to shard {self._region_shards[qubits]}, "
+                                 "only qubits of the current shard can be released.")
+            qubits = self.regions[qubits]
+        elif not isinstance(qubits, range) or qubits.step != 1:
+            qubits = list(qubits)
+            if not qubits:
+                return
+            if qubits != list(range(qubits[0], qubits[-1] + 1)):
+                raise ValueError("Only contiguous qubits can be released.")
+            qubits = range(qubits[0], qubits[-1] + 1)
+        elif not len(qubits):
+            return
+        if qubits.start < 0 or qubits.stop > self._allocated[-1]:
+            raise ValueError(f"Qubits {qubits.start} to {qubits.stop - 1} are not allocated in the current shard.")
+        if any(free.start < qubits.stop and qubits.start < free.stop for free in self._free_ranges[-1]):
+            raise ValueError(f"Qubits {qubits.start} to {qubits.stop - 1} are already released.")
+
+        # Released qubits no longer belong to any region of the current shard
+        for name, region in list(self.regions.items()):
+            if (self._region_shards[name] == self.current_shard
+                    and region.start < qubits.stop and qubits.start < region.stop):
+                del self.regions[name], self._region_shards[name]
+        if reset:
+            self.circuit.reset(list(qubits))
+
+        # Keep the free list sorted and merge neighbouring ranges
+        free_ranges = sorted(self._free_ranges[-1] + [qubits], key=lambda free: free.start)
+        merged = []
+        for free in free_ranges:
+            if merged and merged[-1].stop == free.start:
+                merged[-1] = range(merged[-1].start, free.stop)
+            elif len(free):
+                merged.append(free)
+        self._free_ranges[-1] = merged
+
+    def region(self, name):
+        """
+        Get the qubits and shard of a named region.
+
+        Parameters:
+        -----------
+        name : str
+            The region name given to `allocate_qubits`.
+
+        Returns:
+        --------
+        tuple of (range, int)
+            The qubits of the region and the index of its shard.
         """
-        if self.qubits_allocated + num_qubits > self.total_qubits:
-            raise ValueError("Not enough qubits available to allocate.")
-        
-        allocated_start_index = self.qubits_allocated
-        self.qubits_allocated += num_qubits
-        return range(allocated_start_index, allocated_start_index + num_qubits)
+        return self.regions[name], self._region_shards[name]
 
-    def get_circuit(self):
+    def get_circuit(self, shard=None):
         """
         Get the QuantumCircuit object.
 
         This method returns the underlying QuantumCircuit object that
-        represents the quantum circuit.
+        represents the quantum circuit, or the `CircuitIR` if the Circuit
+        records an IR.
+
+        Parameters:
+        -----------
+        shard : int, optional
+            The index of the shard (default is None, the current shard).
 
         Returns:
         --------
-        QuantumCircuit
+        QuantumCircuit or CircuitIR
             The QuantumCircuit object.
         """
-        return self.circuit
+        return self.circuit if shard is None else self.shards[shard]
+
+    def to_qiskit(self, shard=None):
+        """
+        Get a shard as a Qiskit circuit, materializing the IR if necessary.
+
+        Parameters:
+        -----------
+        shard : int, optional
+            The index of the shard (default is None, the current shard).
+
+        Returns:
+        --------
+        QuantumCircuit
+            The QuantumCircuit of the shard.
+        """
+        circuit = self.get_circuit(shard)
+        return circuit.to_qiskit() if isinstance(circuit, CircuitIR) else circuit
@@ -0,0 +1,631 @@
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import threading
+import time
+
+import numpy as np
+
+from modul.pipeline import claim_store, encode_chunk, init_worker
+
+QUEUE_DIRS = ("pending", "claimed", "results", "failed")
+
+
+def worker_name(pid=None):
+    """
+    Build the name under which a worker process claims shards.
+
+    Parameters:
+    -----------
+    pid : int, optional
+        The process id (default is the current process).
+
+    Returns:
+    --------
+    str
+        "<hostname>-<pid>", unique across the nodes sharing a queue.
+    """
+    return f"{socket.gethostname()}-{os.getpid() if pid is None else pid}"
+
+
+def _write_atomic(path, write):
+    """
+    Write a file under a temporary name and rename it into place.
+
+    Parameters:
+    -----------
+    path : str
+        The final path.
+    write : callable
+        Called with the open binary file.
+
+    Returns:
+    --------
+    None
+    """
+    temporary = f"{path}.{worker_name()}.tmp"
+    with open(temporary, "wb") as output_file:
+        write(output_file)
+        output_file.flush()
+        os.fsync(output_file.fileno())
+    os.replace(temporary, path)
+
+
+class WorkQueue:
+    """
+    A file-based queue of word shards shared by a coordinator and its workers.
+
+    The queue is a directory, so workers on other nodes can join through a
+    shared file system. A shard is one JSON task file that moves between
+    subdirectories; every move is an atomic `os.rename`, so exactly one worker
+    wins each claim:
+
+    - pending/<shard>.json: waiting for a worker.
+    - claimed/<shard>.<worker>.json: being encoded. The worker touches the file
+      as a heartbeat; a claim not touched for `lease` seconds is requeued.
+    - results/<shard>.npz: the encoded vectors, written atomically.
+    - failed/<shard>.json: given up after `max_retries` retries.
+
+    A worker whose encoding raises, or whose claim expires, puts the shard
+    back to pending with one more attempt. The Encoder configuration and the
+    queue settings are kept in settings.json, with the array arguments of the
+    Encoder in settings.npz; neither is unpickled. A "stop" file tells the
+    workers to exit.
+
+    Attributes:
+    -----------
+    path : str
+        The directory of the queue.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a queue directory, creating it if necessary.
+
+        Parameters:
+        -----------
+        path : str
+            The directory of the queue.
+        """
+        self.path = path
+        for name in QUEUE_DIRS:
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+        self._settings = None
+
+    def _dir(self, name, *parts):
+        return os.path.join(self.path, name, *parts)
+
+    def reset(self, config, lease=30.0, max_retries=3):
+        """
+        Empty the queue and start a new job.
+
+        Parameters:
+        -----------
+        config : dict
+            The keyword arguments of the workers' `Encoder`, see `Encoder.config`.
+        lease : float, optional
+            The seconds after which a claim without heartbeat is requeued
+            (default is 30.0).
+        max_retries : int, optional
+            The number of times a shard is requeued before it fails (default is 3).
+
+        Returns:
+        --------
+        None
+        """
+        for name in ("settings.json", "settings.npz", "stop"):
+            if os.path.exists(os.path.join(self.path, name)):
+                os.remove(os.path.join(self.path, name))
+        for name in QUEUE_DIRS:
+            shutil.rmtree(self._dir(name), ignore_errors=True)
+            os.makedirs(self._dir(name), exist_ok=True)  # A joining worker may create it meanwhile
+        arrays = {name: np.asarray(value) for name, value in config.items() if isinstance(value, np.ndarray)}
+        settings = {"encoder": {name: value for name, value in config.items() if name not in arrays},
+                    "arrays": sorted(arrays), "lease": lease, "max_retries": max_retries}
+        # The arrays are written first: settings.json announces a complete job
+        _write_atomic(os.path.join(self.path, "settings.npz"), lambda output_file: np.savez(output_file, **arrays))
+        _write_atomic(os.path.join(self.path, "settings.json"),
+                      lambda output_file: output_file.write(json.dumps(settings).encode()))
+        self._settings = {"encoder": dict(config), "lease": lease, "max_retries": max_retries}
+
+    def settings(self, timeout=None, poll=0.05):
+        """
+        Get the settings of the current job, waiting until a job was started.
+
+        Parameters:
+        -----------
+        timeout : float, optional
+            The longest wait in seconds (default is None, wait forever).
+        poll : float, optional
+            The interval between checks in seconds (default is 0.05).
+
+        Returns:
+        --------
+        dict
+            "encoder" (the Encoder configuration), "lease" and "max_retries".
+
+        Raises:
+        -------
+        TimeoutError
+            If no job was started within `timeout`.
+        """
+        path = os.path.join(self.path, "settings.json")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._settings is None:
+            if os.path.exists(path):
+                with open(path) as settings_file:
+                    settings = json.load(settings_file)
+                with np.load(os.path.join(self.path, "settings.npz"), allow_pickle=False) as arrays:
+                    settings["encoder"].update({name: arrays[name] for name in settings.pop("arrays")})
+                self._settings = settings
+            elif deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"No job was started in {self.path}.")
+            else:
+                time.sleep(poll)
+        return self._settings
+
+    def put(self, shard, words, attempts=0, errors=()):
+        """
+        Add a shard to the pending tasks.
+
+        Parameters:
+        -----------
+        shard : str
+            The shard id.
+        words : list of str
+            The words of the shard.
+        attempts : int, optional
+            The number of failed attempts so far (default is 0).
+        errors : sequence of str, optional
+            The errors of the failed attempts (default is empty).
+
+        Returns:
+        --------
+        None
+        """
+        task = {"shard": shard, "words": list(words), "attempts": attempts, "errors": list(errors)}
+        _write_atomic(self._dir("pending", f"{shard}.json"),
+                      lambda output_file: output_file.write(json.dumps(task).encode()))
+
+    def claim(self, worker):
+        """
+        Claim the next pending shard.
+
+        Parameters:
+        -----------
+        worker : str
+            The name of the claiming worker, see `worker_name`.
+
+        Returns:
+        --------
+        tuple of (dict, str) or None
+            The task and the path of the claim, or None if nothing is pending.
+        """
+        for name in sorted(os.listdir(self._dir("pending"))):
+            if not name.endswith(".json"):
+                continue
+            claim = self._dir("claimed", f"{name[:-5]}.{worker}.json")
+            try:
+                os.rename(self._dir("pending", name), claim)
+                os.utime(claim)  # The lease starts now, not when the shard was queued
+                with open(claim) as claim_file:
+                    return json.load(claim_file), claim
+            except FileNotFoundError:
+                continue  # Another worker was faster
+        return None
+
+    def heartbeat(self, claim):
+        """
+        Renew the lease of a claim.
+
+        Parameters:
+        -----------
+        claim : str
+            The path returned by `claim`.
+
+        Returns:
+        --------
+        bool
+            False if the claim was requeued in the meantime.
+        """
+        try:
+            os.utime(claim)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, claim, task, vectors):
+        """
+        Store the vectors of a claimed shard and release the claim.
+
+        Parameters:
+        -----------
+        claim : str
+            The path returned by `claim`.
+        task : dict
+            The claimed task.
+        vectors : numpy.ndarray
+            The encoded vectors of the shard's words.
+
+        Returns:
+        --------
+        None
+        """
+        _write_atomic(self._dir("results", f"{task['shard']}.npz"),
+                      lambda output_file: np.savez(output_file, vectors=vectors, attempts=task["attempts"]))
+        try:
+            os.remove(claim)
+        except FileNotFoundError:
+            pass  # The lease expired, but the shard is done anyway
+
+    def fail(self, claim, error):
+        """
+        Requeue a claimed shard, or give it up after `max_retries` retries.
+
+        Parameters:
+        -----------
+        claim : str
+            The path of the claim.
+        error : str
+            A description of the failure.
+
+        Returns:
+        --------
+        bool
+            True if this call requeued or failed the shard, False if the claim
+            was already handled by someone else.
+        """
+        # Renaming the claim first makes sure only one process handles it
+        handling = f"{claim}.{worker_name()}.failing"
+        try:
+            os.rename(claim, handling)
+        except FileNotFoundError:
+            return False
+        with open(handling) as claim_file:
+            task = json.load(claim_file)
+        attempts = task["attempts"] + 1
+        errors = task["errors"] + [error]
+        if attempts > self.settings()["max_retries"]:
+            task.update(attempts=attempts, errors=errors)
+            _write_atomic(self._dir("failed", f"{task['shard']}.json"),
+                          lambda output_file: output_file.write(json.dumps(task).encode()))
+        else:
+            self.put(task["shard"], task["words"], attempts, errors)
+        os.remove(handling)
+        return True
+
+    def expire(self):
+        """
+        Requeue all claims whose lease ran out.
+
+        Returns:
+        --------
+        int
+            The number of requeued or failed claims.
+        """
+        deadline = time.time() - self.settings()["lease"]
+        expired = 0
+        for name in os.listdir(self._dir("claimed")):
+            claim = self._dir("claimed", name)
+            try:
+                stale = name.endswith(".json") and os.path.getmtime(claim) < deadline
+            except FileNotFoundError:
+                continue
+            if stale:
+                expired += self.fail(claim, "lease expired")
+        return expired
+
+    def release(self, worker, error="worker exited"):
+        """
+        Requeue all claims of a worker, e.g. after its process died.
+
+        Parameters:
+        -----------
+        worker : str
+            The name of the worker.
+        error : str, optional
+            The recorded error (default is "worker exited").
+
+        Returns:
+        --------
+        int
+            The number of requeued or failed claims.
+        """
+        released = 0
+        for name in os.listdir(self._dir("claimed")):
+            if name.endswith(f".{worker}.json"):
+                released += self.fail(self._dir("claimed", name), error)
+        return released
+
+    def results(self):
+        """
+        Collect and remove the finished shards.
+
+        Returns:
+        --------
+        list of tuple of (str, numpy.ndarray, int)
+            The shard id, the vectors and the number of failed attempts before
+            the successful one.
+        """
+        finished = []
+        for name in sorted(os.listdir(self._dir("results"))):
+            if not name.endswith(".npz"):
+                continue
+            path = self._dir("results", name)
+            with np.load(path) as result:
+                finished.append((name[:-4], result["vectors"], int(result["attempts"])))
+            os.remove(path)
+        return finished
+
+    def failed(self):
+        """
+        Get the shards that were given up.
+
+        Returns:
+        --------
+        dict of str to list of str
+            The errors of every failed shard.
+        """
+        failed = {}
+        for name in sorted(os.listdir(self._dir("failed"))):
+            if name.endswith(".json"):
+                with open(self._dir("failed", name)) as task_file:
+                    failed[name[:-5]] = json.load(task_file)["errors"]
+        return failed
+
+    def stop(self):
+        """
+        Tell all workers to exit.
+
+        Returns:
+        --------
+        None
+        """
+        open(os.path.join(self.path, "stop"), "w").close()
+
+    def stopped(self):
+        """
+        bool: Whether the workers were told to exit.
+        """
+        return os.path.exists(os.path.join(self.path, "stop"))
+
+
+def run_worker(path, poll=0.05, idle_timeout=None):
+    """
+    Encode shards from a queue until the coordinator stops the job.
+
+    The worker waits until a job was started and creates its Encoder from the
+    job settings, so every worker, on any node, encodes the same way; with
+    `shots`, the sampling of a shard is seeded by its id (see
+    `modul.pipeline.encode_chunk`). It exits when the job is stopped. While a
+    shard is encoded, a background thread renews its lease; an exception while
+    encoding requeues the shard.
+
+    Parameters:
+    -----------
+    path : str
+        The directory of the `WorkQueue`.
+    poll : float, optional
+        The interval in seconds between checks for work (default is 0.05).
+    idle_timeout : float, optional
+        The seconds without work after which the worker exits (default is
+        None, run until stopped).
+
+    Returns:
+    --------
+    int
+        The number of shards encoded by this worker.
+    """
+    queue = WorkQueue(path)
+    settings = queue.settings(poll=poll)
+    init_worker(settings["encoder"])
+    name = worker_name()
+    encoded = 0
+    idle_since = time.monotonic()
+    while not queue.stopped():
+        claimed = queue.claim(name)
+        if claimed is None:
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(poll)
+            continue
+        task, claim = claimed
+
+        done = threading.Event()
+
+        def renew():
+            while not done.wait(settings["lease"] / 3) and queue.heartbeat(claim):
+                pass
+
+        heartbeat = threading.Thread(target=renew, daemon=True)
+        heartbeat.start()
+        try:
+            vectors = encode_chunk(task["words"], int(task["shard"]))
+        except Exception as error:
+            queue.fail(claim, f"{name}: {error!r}")
+        else:
+            queue.complete(claim, task, vectors)
+            encoded += 1
+        finally:
+            done.set()
+            heartbeat.join()
+        idle_since = time.monotonic()
+    return encoded
+
+
+class Coordinator:
+    """
+    Encodes a corpus on many worker processes or nodes through a `WorkQueue`.
+
+    The coordinator splits the words that are not yet in the output store into
+    shards and puts them into the queue. It starts `workers` local worker
+    processes (`run_worker`). Further workers on other nodes join by running
+    `run_worker` on the same queue directory, e.g. `python main.py --worker
+    <queue>` on a shared file system. Finished shards are merged into a
+    `VectorStore` as they arrive.
+
+    Failures are retried: shards of a local worker that died are requeued at
+    once, and the worker is replaced. Shards of remote workers are requeued
+    when their lease expires. A shard that still fails after `max_retries`
+    retries is reported in `stats`, and its words stay missing from the store,
+    so running the job again resumes with exactly those words. A shard that
+    failed but whose result still arrives, e.g. from a worker that outlived its
+    lease, is merged and no longer counted as failed. Local workers that exit
+    without holding a shard, e.g. because their Encoder cannot be created, are
+    replaced at most `max_retries` times before the job is aborted.
+
+    Attributes:
+    -----------
+    encoder : Encoder
+        The Encoder whose configuration is replicated in every worker.
+    queue : WorkQueue
+        The queue shared with the workers.
+    shard_size : int
+        The number of words per shard.
+    workers : int
+        The number of local worker processes; 0 relies on external workers.
+    lease : float
+        The seconds after which a claim without heartbeat is requeued.
+    max_retries : int
+        The number of retries per shard.
+    stats : dict
+        Statistics of the last `run`: shards, merged and failed shards,
+        retries, restarted workers, appended vectors, elapsed seconds and
+        words per second.
+    """
+
+    def __init__(self, encoder, path, shard_size=1024, workers=None, lease=30.0, max_retries=3, poll=0.05):
+        """
+        Initializes the Coordinator.
+
+        Parameters:
+        -----------
+        encoder : Encoder
+            The Encoder to replicate in the workers.
+        path : str
+            The directory of the queue; it must be visible to all workers.
+        shard_size : int, optional
+            The number of words per shard (default is 1024).
+        workers : int, optional
+            The number of local worker processes (default is the number of
+            CPUs); 0 starts none.
+        lease : float, optional
+            The seconds after which a claim without heartbeat is requeued
+            (default is 30.0).
+        max_retries : int, optional
+            The number of retries per shard (default is 3).
+        poll : float, optional
+            The interval in seconds between checks of the queue (default is 0.05).
+
+        Raises:
+        -------
+        ValueError
+            If the shard size or lease is not positive, or a count is negative.
+        """
+        if shard_size < 1 or lease <= 0 or max_retries < 0 or (workers is not None and workers < 0):
+            raise ValueError("Shard size and lease must be positive, workers and retries not negative.")
+        self.encoder = encoder
+        self.queue = WorkQueue(path)
+        self.shard_size = shard_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.lease = lease
+        self.max_retries = max_retries
+        self.poll = poll
+        self.stats = {}
+
+    def _start_worker(self):
+        process = multiprocessing.Process(target=run_worker, args=(self.queue.path, self.poll), daemon=True)
+        process.start()
+        return process
+
+    def run(self, words, store, timeout=None):
+        """
+        Encode the words that are not in a store yet and merge their vectors.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The corpus.
+        store : VectorStore
+            The output store; its rows must have the shape `(encoder.dimension,)`.
+            The Encoder phases and edges are saved in it on the first run and must match
+            on later runs.
+        timeout : float, optional
+            The longest time in seconds to wait for the job (default is None).
+
+        Returns:
+        --------
+        int
+            The number of vectors appended to the store.
+
+        Raises:
+        -------
+        ValueError
+            If the store holds vectors made with different Encoder phases or edges.
+        TimeoutError
+            If the job did not finish within `timeout`; merged shards are kept.
+        RuntimeError
+            If local workers exited without holding a shard more than
+            `max_retries` times; merged shards are kept.
+        """
+        claim_store(self.encoder, store)
+        start = time.perf_counter()
+        todo = store.missing(words)
+        shards = {f"{index:06d}": todo[offset:offset + self.shard_size]
+                  for index, offset in enumerate(range(0, len(todo), self.shard_size))}
+        self.queue.reset(self.encoder.config(), self.lease, self.max_retries)
+        for shard, shard_words in shards.items():
+            self.queue.put(shard, shard_words)
+
+        total = len(shards)
+        processes = [self._start_worker() for _ in range(min(self.workers, total))]
+        merged = set()
+        appended = retries = restarts = idle_exits = 0
+        failed = {}
+        try:
+            while any(shard not in merged and shard not in failed for shard in shards):
+                for shard, vectors, attempts in self.queue.results():
+                    # A shard whose lease expired may be finished twice
+                    if shard in shards and shard not in merged:
+                        appended += store.append(shards[shard], vectors)
+                        merged.add(shard)
+                        retries += attempts
+                # Dead workers are handled before expired leases, so their claims are still found
+                for i, process in enumerate(processes):
+                    if not process.is_alive():
+                        if not self.queue.release(worker_name(process.pid), f"exit code {process.exitcode}"):
+                            idle_exits += 1
+                            if idle_exits > self.max_retries:
+                                raise RuntimeError(f"Local workers exited {idle_exits} times without holding a "
+                                                   f"shard, last with exit code {process.exitcode}.")
+                        processes[i] = self._start_worker()
+                        restarts += 1
+                self.queue.expire()
+                # A failed shard whose late result was merged is done
+                failed = {shard: errors for shard, errors in self.queue.failed().items() if shard not in merged}
+                if timeout is not None and time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"{total - len(merged) - len(failed)} shard(s) unfinished "
+                                       f"after {timeout} seconds.")
+                time.sleep(self.poll)
+        finally:
+            self.queue.stop()
+            for process in processes:
+                process.join(timeout=max(self.lease, 1.0))
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+
+        seconds = time.perf_counter() - start
+        self.stats = {
+            "shards": total,
+            "merged": len(merged),
+            "failed": failed,
+            "retries": retries + sum(len(errors) - 1 for errors in failed.values()),
+            "restarts": restarts,
+            "appended": appended,
+            "seconds": seconds,
+            "words_per_second": len(todo) / seconds if seconds > 0 else float("inf"),
+        }
+        return appended
@@ -0,0 +1,479 @@
+import numpy as np
+
+from modul.cache import LRUCache, content_key
+from modul.circuit import Circuit
+from modul.gates import append_cx_gates
+from modul.interconnect import Interconnect
+from modul.phases import (check_phase_dtype, component_seed, quantize_phases, random_seed, seeded_phases,
+                          stored_phases)
+from modul.profiling import profiled
+from modul.simulator import BlockSimulator
+from modul.subsystem import Subsystem
+from modul.tokenizer import Tokenizer
+from modul.tokensystem import TokenSystem
+
+
+class Encoder:
+    """
+    Encodes words into vectors with the HDC circuit.
+
+    The Encoder runs the full path for a batch of words: the `Tokenizer`
+    produces the token matrices, which are written into the
+    TokenSystem/Subsystem/Interconnect circuit, and the `BlockSimulator`
+    measures every allocated qubit. The vector of a word holds the probability
+    of measuring 1 on each qubit, either exact or estimated from `shots`
+    samples.
+
+    By default every word is recorded as a `CircuitIR` and simulated from its
+    arrays, so encoding never builds Qiskit objects. With `ir=False` the words
+    are bound into a parameterized Qiskit `CircuitTemplate` instead; both paths
+    produce the same vectors.
+
+    The `ip_matrix` of the TokenSystem and the Subsystem phases are fixed when
+    the Encoder is created, so the same word is always encoded the same way.
+    Unless they are given, they are derived from `seed` with
+    `modul.phases.seeded_phases` (component 0 is the TokenSystem, component
+    `k + 1` Subsystem `k`), and `config` ships only the seed to worker
+    processes. With `phase_dtype` "uint16" or "float16" the phases are
+    quantized, and given matrices are shipped in that compact form.
+    Token matrices, bound circuits and simulated distributions are therefore
+    memoized in LRU caches keyed by the content of the prepared word, the phases
+    and the qubit layout; repeated words skip the whole circuit path.
+
+    A sentence can also be encoded in a single circuit (`encode_sentence`):
+    the words are streamed through the same TokenSystem qubits, which are
+    measured and reset after every word, while the Subsystems keep
+    accumulating the Interconnect parities as the context of the sentence.
+
+    Attributes:
+    -----------
+    tokenizer : Tokenizer
+        The tokenizer used for all words.
+    ir : bool
+        Whether words are recorded as `CircuitIR` instead of bound Qiskit circuits.
+    template : CircuitTemplate or None
+        The parameterized circuit that is bound per word if `ir` is False.
+    ip_matrix : numpy.ndarray
+        The `ip_matrix` of the TokenSystem, shape `(3, main_qubits)`.
+    subsystem_matrices : numpy.ndarray
+        The Subsystem phases, shape `(subsystems_count, subsystem_qubits, 3)`.
+    edges : numpy.ndarray
+        The `(control, target)` pairs of the Interconnect.
+    qubits : numpy.ndarray
+        The measured qubits, i.e. the TokenSystem followed by all Subsystems.
+    seed : int
+        The seed of the derived phases and of the sampling.
+    phase_dtype : str
+        The storage type of the phases: "float64", "float16" or "uint16".
+    shots : int or None
+        The number of samples per word, or None for exact probabilities.
+    rng : numpy.random.Generator
+        The random generator used for sampling.
+    fingerprint : str
+        The content key of the phases and the qubit layout.
+    token_cache : LRUCache
+        The token matrices per prepared word.
+    circuit_cache : LRUCache
+        The bound circuits per prepared word.
+    simulation_cache : LRUCache
+        The BlockSimulator (i.e. the measurement distribution) per prepared word.
+    """
+
+    def __init__(self, total_qubits=50, main_qubits=20, subsystem_qubits=10, subsystems_count=3,
+                 shots=None, seed=None, ip_matrix=None, subsystem_matrices=None, cache_size=1024,
+                 interconnect_options=None, ir=True, phase_dtype="float64"):
+        """
+        Initializes the Encoder and builds its circuit layout.
+
+        Parameters:
+        -----------
+        total_qubits : int, optional
+            The total number of qubits in the circuit (default is 50).
+        main_qubits : int, optional
+            The number of qubits assigned to the TokenSystem (default is 20).
+        subsystem_qubits : int, optional
+            The number of qubits assigned to each Subsystem (default is 10).
+        subsystems_count : int, optional
+            The number of Subsystems (default is 3).
+        shots : int, optional
+            The number of samples per word (default is None, exact probabilities).
+        seed : int, optional
+            The seed for the phases and the sampling (default is None, drawn from
+            NumPy's global random state).
+        ip_matrix : numpy.ndarray, optional
+            The `ip_matrix` of the TokenSystem, possibly quantized (default is
+            derived from `seed`).
+        subsystem_matrices : numpy.ndarray, optional
+            The Subsystem phases of shape `(subsystems_count, subsystem_qubits, 3)`,
+            possibly quantized (default is derived from `seed`).
+        cache_size : int, optional
+            The number of words kept in each cache; 0 disables caching
+            (default is 1024).
+        interconnect_options : dict, optional
+            Keyword arguments for `Interconnect`, e.g. `{"topology": "random", "seed": 7}`.
+            Without a "seed", one is derived from `seed`, so a "random" topology
+            is identical in every replica made from `config` (default is None,
+            the "fold" topology).
+        ir : bool, optional
+            Whether to record the words as `CircuitIR` (default is True). If False,
+            a Qiskit `CircuitTemplate` is compiled and bound per word.
+        phase_dtype : str, optional
+            The storage type of the phases, see `modul.phases.quantize_phases`
+            (default is "float64").
+        """
+        check_phase_dtype(phase_dtype)
+        self.total_qubits = total_qubits
+        self.main_qubits = main_qubits
+        self.subsystem_qubits = subsystem_qubits
+        self.subsystems_count = subsystems_count
+        self.shots = shots
+        self.seed = random_seed() if seed is None else seed
+        self.phase_dtype = phase_dtype
+        self.ir = ir
+        self.rng = np.random.default_rng(int(self.seed) % 2 ** 64)
+        self.tokenizer = Tokenizer()
+        self.interconnect_options = dict(interconnect_options or {})
+        self.interconnect_options.setdefault("seed", component_seed(self.seed, subsystems_count + 1))
+
+        # Only given matrices are shipped by `config`; derived ones are recreated from the seed
+        self._given = {"ip_matrix": ip_matrix is not None, "subsystem_matrices": subsystem_matrices is not None}
+        if ip_matrix is None:
+            ip_matrix = seeded_phases(component_seed(self.seed, 0), (3, main_qubits), stream=1)
+        if subsystem_matrices is None:
+            subsystem_matrices = [seeded_phases(component_seed(self.seed, k + 1), (subsystem_qubits, 3))
+                                  for k in range(subsystems_count)]
+        self.ip_matrix = stored_phases(ip_matrix, phase_dtype)
+        self.subsystem_matrices = stored_phases(subsystem_matrices, phase_dtype)
+
+        if ir:
+            # Allocate the layout once to obtain the qubit ranges and the Interconnect edges
+            self.template = None
+            layout = Circuit(total_qubits, ir=True)
+            token_system = TokenSystem(layout, num_qubits=main_qubits, seed=component_seed(self.seed, 0))
+            subsystems = [Subsystem(layout, num_qubits=subsystem_qubits, seed=component_seed(self.seed, k + 1))
+                          for k in range(subsystems_count)]
+            interconnect = Interconnect(layout, **self.interconnect_options)
+            self.edges = interconnect.edge_list(token_system.qubit_range,
+                                                [subsystem.qubit_range for subsystem in subsystems])
+        else:
+            from modul.template import CircuitTemplate
+            self.template = CircuitTemplate(total_qubits, main_qubits, subsystem_qubits, subsystems_count,
+                                            interconnect_options=self.interconnect_options)
+            self.template.ip_matrix = self.ip_matrix
+            self.template.subsystem_matrices = self.subsystem_matrices
+            token_system = self.template.token_system
+            subsystems = self.template.subsystems
+            self.edges = self.template.interconnect.edges
+
+        ranges = [token_system.qubit_range] + [subsystem.qubit_range for subsystem in subsystems]
+        self.qubits = np.concatenate([np.asarray(qubit_range) for qubit_range in ranges])
+
+        self.fingerprint = content_key(total_qubits, main_qubits, subsystem_qubits, subsystems_count,
+                                       self.ip_matrix, self.subsystem_matrices, self.edges)
+        self.cache_size = cache_size
+        self.token_cache = LRUCache(cache_size)
+        self.circuit_cache = LRUCache(cache_size)
+        self.simulation_cache = LRUCache(cache_size)
+
+    @property
+    def dimension(self):
+        """
+        int: The length of the encoded vectors.
+        """
+        return len(self.qubits)
+
+    def config(self):
+        """
+        Get the arguments that recreate this Encoder, e.g. in a worker process.
+
+        Returns:
+        --------
+        dict
+            Keyword arguments for `Encoder`.
+        """
+        return {
+            "total_qubits": self.total_qubits,
+            "main_qubits": self.main_qubits,
+            "subsystem_qubits": self.subsystem_qubits,
+            "subsystems_count": self.subsystems_count,
+            "shots": self.shots,
+            "seed": self.seed,
+            "ip_matrix": quantize_phases(self.ip_matrix, self.phase_dtype) if self._given["ip_matrix"] else None,
+            "subsystem_matrices": (quantize_phases(self.subsystem_matrices, self.phase_dtype)
+                                   if self._given["subsystem_matrices"] else None),
+            "cache_size": self.cache_size,
+            "interconnect_options": self.interconnect_options,
+            "ir": self.ir,
+            "phase_dtype": self.phase_dtype,
+        }
+
+    def cache_stats(self):
+        """
+        Get the statistics of all caches.
+
+        Returns:
+        --------
+        dict of str to dict
+            The `LRUCache.stats` of the token, circuit and simulation caches.
+        """
+        return {
+            "tokens": self.token_cache.stats(),
+            "circuits": self.circuit_cache.stats(),
+            "simulations": self.simulation_cache.stats(),
+        }
+
+    def simulate(self, circuit, seed=None):
+        """
+        Measure all encoded qubits of a bound circuit.
+
+        Parameters:
+        -----------
+        circuit : QuantumCircuit, CircuitIR or BlockSimulator
+            A circuit produced by `build_circuits`, or its simulator.
+        seed : int, sequence of int or numpy.random.Generator, optional
+            The random generator for sampling `shots` (default: the
+            Encoder's generator). Ignored for exact probabilities.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The probability of measuring 1 on each qubit in `qubits`.
+        """
+        simulator = circuit if isinstance(circuit, BlockSimulator) else BlockSimulator(circuit)
+        if self.shots is None:
+            return simulator.marginals(self.qubits)
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        return simulator.sample(self.qubits, self.shots, seed=rng).mean(axis=0)
+
+    @profiled("encoder.build_circuits")
+    def build_circuits(self, tokens):
+        """
+        Build the encoding circuits of many token matrices.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)` as returned by
+            `Tokenizer.tokenize_batch`.
+
+        Returns:
+        --------
+        list of CircuitIR or list of QuantumCircuit
+            One circuit per token matrix; Qiskit circuits if `ir` is False.
+
+        Raises:
+        -------
+        ValueError
+            If a token has fewer characters than the TokenSystem has qubits.
+        """
+        tokens = np.asarray(tokens, dtype=np.float64)
+        if not self.ir:
+            return self.template.bind_batch(tokens)
+        if tokens.shape[1] < self.main_qubits:
+            raise ValueError(f"Tokens have {tokens.shape[1]} characters, "
+                             f"but the TokenSystem has {self.main_qubits} qubits.")
+
+        circuits = []
+        for token in tokens:
+            circuit = Circuit(self.total_qubits, ir=True)
+            token_system = TokenSystem(circuit, num_qubits=self.main_qubits, seed=self.seed)
+            token_system.tp_matrix = token.T[:3, :self.main_qubits]
+            token_system.ip_matrix = self.ip_matrix
+            token_system.apply_operations("fused")
+            for subsystem_matrix in self.subsystem_matrices:
+                subsystem = Subsystem(circuit, num_qubits=self.subsystem_qubits, seed=self.seed)
+                subsystem.tp_matrix = subsystem_matrix
+                subsystem.apply_operations("fused")
+            append_cx_gates(circuit.get_circuit(), self.edges)
+            circuits.append(circuit.get_circuit())
+        return circuits
+
+    @profiled("encoder.build_sentence_circuit")
+    def build_sentence_circuit(self, tokens):
+        """
+        Build one circuit that encodes a sequence of token matrices.
+
+        The Subsystems are prepared once. For every word the TokenSystem qubits
+        are prepared with its tokens, the Interconnect is applied and all
+        encoded qubits are measured into a register "word<i>"; the TokenSystem
+        qubits are then released with a reset and reused for the next word. The
+        Subsystem qubits are never reset, so after word `i` they hold the parity
+        of their own phases and of the TokenSystem states of words `0 .. i`.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)`, one per word in
+            sentence order.
+
+        Returns:
+        --------
+        CircuitIR
+            The circuit with `N * dimension` classical bits; sentences are
+            always recorded as IR, also if `ir` is False.
+
+        Raises:
+        -------
+        ValueError
+            If a token has fewer characters than the TokenSystem has qubits.
+        """
+        tokens = np.asarray(tokens, dtype=np.float64)
+        if tokens.shape[1] < self.main_qubits:
+            raise ValueError(f"Tokens have {tokens.shape[1]} characters, "
+                             f"but the TokenSystem has {self.main_qubits} qubits.")
+
+        circuit = Circuit(self.total_qubits, ir=True)
+        ir = circuit.get_circuit()
+        token_system = TokenSystem(circuit, num_qubits=self.main_qubits, seed=self.seed)
+        for subsystem_matrix in self.subsystem_matrices:
+            subsystem = Subsystem(circuit, num_qubits=self.subsystem_qubits, seed=self.seed)
+            subsystem.tp_matrix = subsystem_matrix
+            subsystem.apply_operations("fused")
+        for position, token in enumerate(tokens):
+            if position:
+                # Reset the measured TokenSystem qubits; the next allocation reuses them
+                circuit.release_qubits(token_system.qubit_range)
+                token_system = TokenSystem(circuit, num_qubits=self.main_qubits, seed=self.seed)
+            token_system.tp_matrix = token.T[:3, :self.main_qubits]
+            token_system.ip_matrix = self.ip_matrix
+            token_system.apply_operations("fused")
+            append_cx_gates(ir, self.edges)
+            ir.measure(self.qubits, ir.add_register(f"word{position}", self.dimension))
+        return ir
+
+    def _memoize(self, cache, items, compute):
+        """
+        Look up values in a cache and compute all misses in one batch.
+
+        Parameters:
+        -----------
+        cache : LRUCache
+            The cache to use.
+        items : list of tuple of (str, str)
+            The content key and prepared word of every value.
+        compute : callable
+            Called with the list of missing items; returns their values.
+
+        Returns:
+        --------
+        list
+            The values of all items.
+        """
+        values = [cache.get(key) for key, _ in items]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            for i, value in zip(missing, compute([items[i] for i in missing])):
+                values[i] = value
+                cache.put(items[i][0], value)
+        return values
+
+    def _tokens(self, items):
+        return self._memoize(self.token_cache, items,
+                             lambda missing: list(self.tokenizer.tokenize_batch([word for _, word in missing])))
+
+    def _circuits(self, items):
+        return self._memoize(self.circuit_cache, items,
+                             lambda missing: self.build_circuits(np.array(self._tokens(missing))))
+
+    def _simulators(self, items):
+        return self._memoize(self.simulation_cache, items,
+                             lambda missing: [BlockSimulator(circuit) for circuit in self._circuits(missing)])
+
+    @profiled("encoder.encode_batch")
+    def encode_batch(self, words, seed=None):
+        """
+        Encode many words.
+
+        Repeated words, within the batch or across calls, are served from the
+        caches.
+
+        Parameters:
+        -----------
+        words : sequence of str
+            The words to be encoded.
+        seed : int, sequence of int or numpy.random.Generator, optional
+            The random generator for sampling `shots` in this batch (default:
+            the Encoder's generator).
+
+        Returns:
+        --------
+        numpy.ndarray
+            A float32 array of shape `(len(words), dimension)`.
+        """
+        vectors = np.empty((len(words), self.dimension), dtype=np.float32)
+        prepared = [self.tokenizer.prepare_word(word) for word in words]
+        keys = [content_key(self.fingerprint, word) for word in prepared]
+        unique = dict(zip(keys, prepared))
+        simulators = dict(zip(unique, self._simulators(list(unique.items()))))
+        if self.shots is None:
+            # Exact probabilities are identical for repeated words
+            exact = {key: self.simulate(simulator) for key, simulator in simulators.items()}
+            for i, key in enumerate(keys):
+                vectors[i] = exact[key]
+        else:
+            rng = self.rng if seed is None else np.random.default_rng(seed)
+            for i, key in enumerate(keys):
+                vectors[i] = self.simulate(simulators[key], seed=rng)
+        return vectors
+
+    @profiled("encoder.encode_sentence")
+    def encode_sentence(self, words, return_circuit=False):
+        """
+        Encode a sentence in one circuit, with one vector per word.
+
+        All words are encoded by a single `build_sentence_circuit` circuit and
+        a single simulation, instead of one circuit per word. The TokenSystem
+        part of a vector equals `encode` of the word alone; the Subsystem part
+        depends on the word and all words before it.
+
+        Parameters:
+        -----------
+        words : str or sequence of str
+            The words of the sentence; a string is split at whitespace.
+        return_circuit : bool, optional
+            Whether to also return the simulated circuit, e.g. to report its
+            size without building it again (default is False).
+
+        Returns:
+        --------
+        numpy.ndarray
+            A float32 array of shape `(len(words), dimension)`.
+        CircuitIR or None
+            The sentence circuit, or None if `words` is empty; only returned
+            if `return_circuit` is True.
+        """
+        if isinstance(words, str):
+            words = words.split()
+        if not words:
+            vectors = np.empty((0, self.dimension), dtype=np.float32)
+            return (vectors, None) if return_circuit else vectors
+        prepared = [self.tokenizer.prepare_word(word) for word in words]
+        items = [(content_key(self.fingerprint, word), word) for word in prepared]
+        key = content_key(self.fingerprint, "sentence", *prepared)
+        simulator = self.simulation_cache.get(key)
+        if simulator is None:
+            simulator = BlockSimulator(self.build_sentence_circuit(np.array(self._tokens(items))))
+            self.simulation_cache.put(key, simulator)
+        measured = simulator.measured()
+        if self.shots is None:
+            vectors = measured.marginals()
+        else:
+            vectors = measured.sample(np.arange(measured.num_qubits), self.shots, seed=self.rng).mean(axis=0)
+        vectors = vectors.reshape(len(words), self.dimension).astype(np.float32)
+        return (vectors, simulator.circuit) if return_circuit else vectors
+
+    def encode(self, word):
+        """
+        Encode a single word.
+
+        Parameters:
+        -----------
+        word : str
+            The word to be encoded.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A float32 vector of length `dimension`.
+        """
+        return self.encode_batch([word])[0]
@@ -0,0 +1,236 @@
+import time
+
+import numpy as np
+
+from modul.ir import CircuitIR
+from modul.profiling import profiled
+from modul.simulator import BlockSimulator
+
+BACKENDS = ("numpy", "aer")
+
+
+def pack_bits(bits):
+    """
+    Pack measured bits into integers.
+
+    Parameters:
+    -----------
+    bits : numpy.ndarray
+        A uint8 array of shape `(shots, num_bits)` with at most 64 bits per shot.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A uint64 array of shape `(shots,)`; bit `k` of each value (least
+        significant first) is column `k` of `bits`.
+
+    Raises:
+    -------
+    ValueError
+        If more than 64 bits are packed.
+    """
+    if bits.shape[1] > 64:
+        raise ValueError(f"Cannot pack {bits.shape[1]} bits into a 64-bit integer.")
+    weights = np.left_shift(np.uint64(1), np.arange(bits.shape[1], dtype=np.uint64))
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def merge_counts(outcomes, counts):
+    """
+    Merge outcome/count arrays that may contain repeated outcomes.
+
+    Parameters:
+    -----------
+    outcomes : numpy.ndarray
+        The uint64 outcomes.
+    counts : numpy.ndarray
+        The count of each entry in `outcomes`.
+
+    Returns:
+    --------
+    tuple of (numpy.ndarray, numpy.ndarray)
+        The sorted unique outcomes and their summed counts.
+    """
+    unique, inverse = np.unique(outcomes, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64)
+
+
+class Executor:
+    """
+    Executes measured circuits and aggregates counts per measurement group.
+
+    The Executor runs the circuits of one or more `Measurement` objects on a
+    local backend and returns, for every labeled group, the observed outcomes
+    and their counts as NumPy arrays instead of Qiskit's dict of bitstrings.
+
+    Backends:
+    ---------
+    - "numpy": the built-in `BlockSimulator`, which samples all classical bits
+      of a circuit jointly, including mid-circuit measurements of reused qubits.
+    - "aer": `qiskit_aer.AerSimulator` (matrix product state method), if the
+      optional `qiskit-aer` package is installed.
+
+    Attributes:
+    -----------
+    backend : str
+        The name of the backend.
+    shots : int
+        The number of shots per circuit.
+    shot_batch : int
+        The maximum number of shots sampled at once; larger shot counts are
+        split into batches to bound memory use.
+    rng : numpy.random.Generator
+        The random generator used for sampling and for backend seeds.
+    stats : dict
+        Statistics of the last `run`: number of circuits, shots, elapsed
+        seconds and circuits per second.
+    """
+
+    def __init__(self, backend="numpy", shots=1024, shot_batch=None, seed=None):
+        """
+        Initializes the Executor.
+
+        Parameters:
+        -----------
+        backend : str, optional
+            Either "numpy" or "aer" (default is "numpy").
+        shots : int, optional
+            The number of shots per circuit (default is 1024).
+        shot_batch : int, optional
+            The maximum number of shots sampled at once (default is None, all shots
+            in one batch).
+        seed : int, optional
+            The seed of the random generator (default is None).
+
+        Raises:
+        -------
+        ValueError
+            If the backend is unknown or the shot numbers are not positive.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+        if shots < 1 or (shot_batch is not None and shot_batch < 1):
+            raise ValueError("Shots and shot batch size must be at least 1.")
+        self.backend = backend
+        self.shots = shots
+        self.shot_batch = shot_batch or shots
+        self.rng = np.random.default_rng(seed)
+        self.stats = {"circuits": 0, "shots": 0, "seconds": 0.0, "circuits_per_second": 0.0}
+        self._aer = None
+
+    @profiled("executor.run")
+    def run(self, measurements):
+        """
+        Execute the circuits of many measurements in one job.
+
+        Parameters:
+        -----------
+        measurements : Measurement or list of Measurement
+            The measurements whose circuits are executed.
+
+        Returns:
+        --------
+        list of dict of str to tuple of (numpy.ndarray, numpy.ndarray)
+            One dictionary per measurement mapping each group label to a pair of
+            sorted uint64 outcomes and int64 counts. Bit `k` of an outcome is the
+            result of the `k`-th qubit of the group.
+        """
+        if not isinstance(measurements, (list, tuple)):
+            measurements = [measurements]
+        start = time.perf_counter()
+        if self.backend == "aer":
+            results = self._run_aer(measurements)
+        else:
+            results = [self._run_numpy(measurement) for measurement in measurements]
+
+        seconds = time.perf_counter() - start
+        self.stats = {
+            "circuits": len(measurements),
+            "shots": len(measurements) * self.shots,
+            "seconds": seconds,
+            "circuits_per_second": len(measurements) / seconds if seconds > 0 else float("inf"),
+        }
+        return results
+
+    def _run_numpy(self, measurement):
+        """
+        Sample one measurement with the BlockSimulator.
+
+        Parameters:
+        -----------
+        measurement : Measurement
+            The measurement to execute.
+
+        Returns:
+        --------
+        dict of str to tuple of (numpy.ndarray, numpy.ndarray)
+            The counts of each group.
+        """
+        # Sample the classical bits, so qubits that were measured, reset and reused count per group
+        simulator = BlockSimulator(measurement.circuit).measured()
+        measured = sorted({clbit for clbits in measurement.clbits.values() for clbit in clbits})
+        columns = {label: np.searchsorted(measured, clbits) for label, clbits in measurement.clbits.items()}
+
+        partial = {label: [] for label in measurement.groups}
+        remaining = self.shots
+        while remaining > 0:
+            batch = min(remaining, self.shot_batch)
+            bits = simulator.sample(measured, batch, seed=self.rng)
+            for label, group_columns in columns.items():
+                outcomes, counts = np.unique(pack_bits(bits[:, group_columns]), return_counts=True)
+                partial[label].append((outcomes, counts))
+            remaining -= batch
+
+        return {label: merge_counts(np.concatenate([outcomes for outcomes, _ in parts]),
+                                    np.concatenate([counts for _, counts in parts]))
+                for label, parts in partial.items()}
+
+    def _run_aer(self, measurements):
+        """
+        Execute measurements with the optional Aer simulator.
+
+        Parameters:
+        -----------
+        measurements : list of Measurement
+            The measurements to execute.
+
+        Returns:
+        --------
+        list of dict of str to tuple of (numpy.ndarray, numpy.ndarray)
+            The counts of each group, per measurement.
+
+        Raises:
+        -------
+        ImportError
+            If `qiskit-aer` is not installed.
+        """
+        if self._aer is None:
+            try:
+                from qiskit_aer import AerSimulator
+            except ImportError as error:
+                raise ImportError("The 'aer' backend requires the qiskit-aer package.") from error
+            self._aer = AerSimulator(method="matrix_product_state")
+
+        circuits = [measurement.circuit.to_qiskit() if isinstance(measurement.circuit, CircuitIR)
+                    else measurement.circuit for measurement in measurements]
+        partial = [{label: [] for label in measurement.groups} for measurement in measurements]
+        remaining = self.shots
+        while remaining > 0:
+            batch = min(remaining, self.shot_batch)
+            seed = int(self.rng.integers(2 ** 31))
+            result = self._aer.run(circuits, shots=batch, seed_simulator=seed, memory=True).result()
+            for i, (measurement, circuit) in enumerate(zip(measurements, circuits)):
+                # Memory strings list the registers last-to-first, separated by spaces
+                register_names = [register.name for register in reversed(circuit.cregs)]
+                memory = [shot.split(" ") for shot in result.get_memory(i)]
+                for position, name in enumerate(register_names):
+                    if name not in measurement.groups:
+                        continue
+                    values = np.array([int(shot[position], 2) for shot in memory], dtype=np.uint64)
+                    partial[i][name].append(np.unique(values, return_counts=True))
+            remaining -= batch
+
+        return [{label: merge_counts(np.concatenate([outcomes for outcomes, _ in parts]),
+                                     np.concatenate([counts for _, counts in parts]))
+                 for label, parts in groups.items()}
+                for groups in partial]
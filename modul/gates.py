@@ -0,0 +1,181 @@
+import numpy as np
+
+from modul.ir import CircuitIR
+
+GATE_MODES = ("literal", "fused")
+
+
+def check_gate_mode(gate_mode):
+    """
+    Validate a gate emission mode.
+
+    Parameters:
+    -----------
+    gate_mode : str
+        Either "literal" (emit every P and H gate) or "fused" (emit one U gate
+        per qubit).
+
+    Raises:
+    -------
+    ValueError
+        If the gate mode is unknown.
+    """
+    if gate_mode not in GATE_MODES:
+        raise ValueError(f"Unknown gate mode '{gate_mode}', expected one of {GATE_MODES}.")
+
+
+def phase_chain_angles(first, second, third):
+    """
+    Compute U-gate angles for a Phase-Hadamard-Phase-Hadamard-Phase chain.
+
+    The chain P(c) H P(b) H P(a) equals e^{ib/2} U(b, c - pi/2, a + pi/2), so
+    every qubit's chain collapses into a single U gate plus a global phase. The
+    angles are linear in the phases, which keeps the computation vectorized for
+    float arrays and valid for object arrays holding Qiskit parameters.
+
+    Parameters:
+    -----------
+    first : numpy.ndarray
+        The phases of the first P gate, one per qubit.
+    second : numpy.ndarray
+        The phases of the second P gate, one per qubit.
+    third : numpy.ndarray
+        The phases of the third P gate, one per qubit.
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        The `theta`, `phi` and `lam` angles of the U gates and the global phase
+        contributed by each qubit.
+    """
+    first = np.asarray(first)
+    second = np.asarray(second)
+    third = np.asarray(third)
+    return second, third - np.pi / 2, first + np.pi / 2, second / 2
+
+
+def phase_chain_matrices(first, second, third):
+    """
+    Compute the 2x2 unitaries of Phase-Hadamard-Phase-Hadamard-Phase chains.
+
+    Parameters:
+    -----------
+    first : numpy.ndarray
+        The phases of the first P gate, one per qubit.
+    second : numpy.ndarray
+        The phases of the second P gate, one per qubit.
+    third : numpy.ndarray
+        The phases of the third P gate, one per qubit.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A complex array of shape `(..., 2, 2)` with one unitary per qubit.
+    """
+    a = np.exp(1j * np.asarray(first, dtype=np.float64))
+    b = np.exp(1j * np.asarray(second, dtype=np.float64))
+    c = np.exp(1j * np.asarray(third, dtype=np.float64))
+    # H P(b) H = 1/2 [[1 + b, 1 - b], [1 - b, 1 + b]]
+    matrices = np.empty(np.broadcast(a, b, c).shape + (2, 2), dtype=np.complex128)
+    matrices[..., 0, 0] = (1 + b) / 2
+    matrices[..., 0, 1] = (1 - b) / 2 * a
+    matrices[..., 1, 0] = (1 - b) / 2 * c
+    matrices[..., 1, 1] = (1 + b) / 2 * a * c
+    return matrices
+
+
+def append_u_gates(circuit, qubits, theta, phi, lam):
+    """
+    Append one U gate per qubit to a circuit in a single batched operation.
+
+    The instructions are created up front and handed to the circuit data in
+    one `extend` call, which skips the per-call validation of
+    `QuantumCircuit.u`. A `CircuitIR` records all gates with one array write.
+
+    Parameters:
+    -----------
+    circuit : QuantumCircuit or CircuitIR
+        The quantum circuit that receives the gates.
+    qubits : sequence of int
+        The qubit indices, one per gate.
+    theta, phi, lam : numpy.ndarray
+        The U-gate angles, one per qubit.
+
+    Returns:
+    --------
+    None
+    """
+    if isinstance(circuit, CircuitIR):
+        circuit.append("u", qubits, np.stack(np.broadcast_arrays(theta, phi, lam), axis=1))
+        return
+
+    from qiskit.circuit import CircuitInstruction
+    from qiskit.circuit.library import UGate
+    circuit_qubits = circuit.qubits
+    circuit.data.extend(
+        CircuitInstruction(UGate(t, p, l), (circuit_qubits[q],), ())
+        for q, t, p, l in zip(qubits, theta, phi, lam)
+    )
+
+
+def append_cx_gates(circuit, edges):
+    """
+    Append CX gates for an edge list to a circuit in a single batched operation.
+
+    Parameters:
+    -----------
+    circuit : QuantumCircuit or CircuitIR
+        The quantum circuit that receives the gates.
+    edges : numpy.ndarray
+        An integer array of shape `(E, 2)` with one `(control, target)` pair per gate,
+        in emission order.
+
+    Returns:
+    --------
+    None
+    """
+    if isinstance(circuit, CircuitIR):
+        circuit.append("cx", edges)
+        return
+
+    from qiskit.circuit import CircuitInstruction
+    from qiskit.circuit.library import CXGate
+    circuit_qubits = circuit.qubits
+    gate = CXGate()
+    circuit.data.extend(
+        CircuitInstruction(gate, (circuit_qubits[control], circuit_qubits[target]), ())
+        for control, target in np.asarray(edges).tolist()
+    )
+
+
+def append_phase_chains(circuit, qubits, first, second, third):
+    """
+    Append fused Phase-Hadamard-Phase-Hadamard-Phase chains to a circuit.
+
+    The global phase of the chains is added to the circuit only if the phases
+    are numeric. Symbolic global phases become very expensive to combine in
+    Qiskit and do not change any measurement outcome.
+
+    Parameters:
+    -----------
+    circuit : QuantumCircuit or CircuitIR
+        The quantum circuit that receives the gates.
+    qubits : sequence of int
+        The qubit indices, one per chain.
+    first, second, third : numpy.ndarray
+        The phases of the three P gates, one per qubit.
+
+    Returns:
+    --------
+    None
+    """
+    theta, phi, lam, global_phase = phase_chain_angles(first, second, third)
+    append_u_gates(circuit, qubits, theta, phi, lam)
+    global_phase = np.sum(global_phase)
+    if isinstance(circuit, CircuitIR):
+        circuit.global_phase += float(global_phase)
+        return
+
+    from qiskit.circuit import ParameterExpression
+    if not isinstance(global_phase, ParameterExpression):
+        circuit.global_phase += global_phase
@@ -0,0 +1,292 @@
+import numpy as np
+
+from modul.gates import phase_chain_matrices
+from modul.ir import CircuitIR
+from modul.simulator import BlockSimulator
+
+GRADIENT_METHODS = ("adjoint", "shift")
+BLOCK_ROWS = 1024
+SHIFT_BLOCK_ELEMENTS = 2 ** 16
+
+
+class GradientEngine:
+    """
+    Gradients of the encoded vectors with respect to the circuit phases.
+
+    The engine differentiates the exact encoding of an `Encoder`, i.e. the
+    probability of measuring 1 on every encoded qubit, with respect to
+    `TokenSystem.tp_matrix`, `TokenSystem.ip_matrix` and `Subsystem.tp_matrix`.
+
+    It uses the structure exploited by the `BlockSimulator`: before the CX
+    network every qubit is a "source" bit with expectation `z = <Z>`, and an
+    encoded qubit measures the parity of some sources, so its probability of
+    measuring 1 is `(1 - sign * prod(z))/2` over those sources. Only the
+    product states depend on the phases; the parity structure is computed once
+    from the Interconnect edges and shared by the whole batch.
+
+    Two methods are available:
+
+    - "adjoint": a reverse pass through the parity products (leave-one-out
+      products per encoded qubit) and the phase chains. A
+      Phase-Hadamard-Phase-Hadamard-Phase chain on |0> has `z = cos(second)`,
+      so the first and third phases have exactly zero gradient.
+    - "shift": the parameter-shift rule. Every phase of every token is shifted
+      by +-pi/2, the source state is recomputed from the chain unitaries and
+      the parity products are re-evaluated; the gradient is half the
+      difference. All shifted evaluations of a block of tokens are stacked and
+      evaluated in one pass. This is the reference the adjoint method is
+      checked against.
+
+    Both methods are vectorized over the batch of tokens and return the
+    vector-Jacobian product with the gradient of a loss with respect to the
+    encoded vectors.
+
+    Attributes:
+    -----------
+    encoder : Encoder
+        The encoder whose layout and phases are differentiated. Its
+        `ip_matrix` and `subsystem_matrices` are read on every call, so a
+        training loop may update them in place.
+    method : str
+        Either "adjoint" or "shift".
+    sources : numpy.ndarray
+        Per encoded qubit the source bits of its parity, padded with the index
+        of a constant source with `z = 1`, shape `(dimension, max_sources)`.
+    signs : numpy.ndarray
+        `-1` for encoded qubits with a bit flip after the parity, else `+1`.
+    """
+
+    def __init__(self, encoder, method="adjoint"):
+        """
+        Initializes the GradientEngine for an Encoder.
+
+        Parameters:
+        -----------
+        encoder : Encoder
+            The encoder to differentiate.
+        method : str, optional
+            Either "adjoint" or "shift" (default is "adjoint").
+
+        Raises:
+        -------
+        ValueError
+            If the method is unknown, or the Encoder samples `shots` instead of
+            encoding exactly.
+        """
+        if method not in GRADIENT_METHODS:
+            raise ValueError(f"Unknown gradient method '{method}', expected one of {GRADIENT_METHODS}.")
+        if encoder.shots is not None:
+            raise ValueError("Gradients are only defined for the exact encoding, "
+                             f"but the Encoder samples {encoder.shots} shots.")
+        self.encoder = encoder
+        self.method = method
+
+        # The parity structure only depends on the Interconnect edges
+        network = CircuitIR(encoder.total_qubits)
+        network.append("cx", encoder.edges)
+        simulator = BlockSimulator(network)
+        rows = simulator.parity_matrix[encoder.qubits]
+        width = max(int(rows.sum(axis=1).max()), 1)
+        self.sources = np.full((len(rows), width), encoder.total_qubits, dtype=np.intp)
+        for position, row in enumerate(rows):
+            members = np.flatnonzero(row)
+            self.sources[position, :len(members)] = members
+        self.signs = np.where(simulator.flips[encoder.qubits], -1.0, 1.0)
+
+        self._token_qubits = encoder.qubits[:encoder.main_qubits]
+        self._subsystem_qubits = encoder.qubits[encoder.main_qubits:].reshape(
+            encoder.subsystems_count, encoder.subsystem_qubits)
+
+    def phases(self, tokens):
+        """
+        Compute the three chain phases of every qubit for a batch of tokens.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)` as returned by
+            `Tokenizer.tokenize_batch`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The first, second and third phase of every qubit, shape
+            `(N, 3, total_qubits)`; unallocated qubits have zero phases.
+
+        Raises:
+        -------
+        ValueError
+            If a token has fewer characters than the TokenSystem has qubits.
+        """
+        encoder = self.encoder
+        tokens = np.asarray(tokens, dtype=np.float64)
+        if tokens.shape[1] < encoder.main_qubits:
+            raise ValueError(f"Tokens have {tokens.shape[1]} characters, "
+                             f"but the TokenSystem has {encoder.main_qubits} qubits.")
+        phases = np.zeros((len(tokens), 3, encoder.total_qubits))
+        # TokenSystem: P(tp) P(ip) per row, i.e. the tp_matrix of a token is token.T[:3, :main_qubits]
+        phases[:, :, self._token_qubits] = np.transpose(tokens[:, :encoder.main_qubits, :3], (0, 2, 1)) \
+            + encoder.ip_matrix
+        phases[:, :, self._subsystem_qubits] = np.transpose(encoder.subsystem_matrices, (2, 0, 1))
+        return phases
+
+    def _encode(self, z):
+        """
+        Evaluate the encoded vectors from the source expectations.
+
+        Parameters:
+        -----------
+        z : numpy.ndarray
+            The `<Z>` of every source, shape `(N, total_qubits)`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The probability of measuring 1 on each encoded qubit, shape `(N, dimension)`.
+        """
+        padded = np.concatenate([z, np.ones((len(z), 1))], axis=1)
+        return (1 - self.signs * np.prod(padded[:, self.sources], axis=2)) / 2
+
+    def forward(self, tokens):
+        """
+        Encode a batch of tokens exactly.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The encoded vectors, shape `(N, dimension)`; equal to
+            `Encoder.encode_batch` without shots.
+        """
+        phases = self.phases(tokens)
+        return self._encode(np.cos(phases[:, 1]))
+
+    def backward(self, tokens, grad_output):
+        """
+        Compute the gradients of a loss with respect to all phase matrices.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)`.
+        grad_output : numpy.ndarray
+            The gradient of the loss with respect to the encoded vectors, shape
+            `(N, dimension)`.
+
+        Returns:
+        --------
+        dict of str to numpy.ndarray
+            "tp_matrix": the gradient per token, shape `(N, 3, main_qubits)`
+            (one `TokenSystem.tp_matrix` per token); "ip_matrix": shape
+            `(3, main_qubits)`; "subsystem_matrices": shape
+            `(subsystems_count, subsystem_qubits, 3)`. The shared matrices
+            accumulate the gradient of the whole batch.
+
+        Raises:
+        -------
+        ValueError
+            If `grad_output` does not match the batch and the encoded dimension.
+        """
+        phases = self.phases(tokens)
+        grad_output = np.asarray(grad_output, dtype=np.float64)
+        if grad_output.shape != (len(phases), len(self.sources)):
+            raise ValueError(f"Expected grad_output of shape {(len(phases), len(self.sources))}, "
+                             f"got {grad_output.shape}.")
+
+        grad_phases = np.empty_like(phases)
+        for start in range(0, len(phases), BLOCK_ROWS):
+            rows = slice(start, start + BLOCK_ROWS)
+            if self.method == "adjoint":
+                grad_phases[rows] = self._adjoint(phases[rows], grad_output[rows])
+            else:
+                grad_phases[rows] = self._shift(phases[rows], grad_output[rows])
+
+        tp_gradient = grad_phases[:, :, self._token_qubits]
+        return {
+            "tp_matrix": tp_gradient,
+            "ip_matrix": tp_gradient.sum(axis=0),
+            "subsystem_matrices": np.transpose(grad_phases[:, :, self._subsystem_qubits].sum(axis=0), (1, 2, 0)),
+        }
+
+    def _adjoint(self, phases, grad_output):
+        """
+        Reverse pass through the parity products and the phase chains.
+
+        Parameters:
+        -----------
+        phases : numpy.ndarray
+            The chain phases, shape `(N, 3, total_qubits)`.
+        grad_output : numpy.ndarray
+            The gradient with respect to the encoded vectors, shape `(N, dimension)`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The gradient with respect to the chain phases, shape `(N, 3, total_qubits)`.
+        """
+        count, total = len(phases), phases.shape[2]
+        padded = np.concatenate([np.cos(phases[:, 1]), np.ones((count, 1))], axis=1)
+        factors = padded[:, self.sources]
+
+        # Leave-one-out products from exclusive prefix and suffix products
+        ones = np.ones(factors.shape[:2] + (1,))
+        prefix = np.cumprod(np.concatenate([ones, factors[:, :, :-1]], axis=2), axis=2)
+        suffix = np.cumprod(np.concatenate([ones, factors[:, :, :0:-1]], axis=2), axis=2)[:, :, ::-1]
+        grad_factors = (-0.5 * self.signs * grad_output)[:, :, None] * prefix * suffix
+
+        grad_z = np.zeros((count, total + 1))
+        for column in range(self.sources.shape[1]):
+            np.add.at(grad_z.T, self.sources[:, column], grad_factors[:, :, column].T)
+
+        grad_phases = np.zeros_like(phases)
+        grad_phases[:, 1] = -np.sin(phases[:, 1]) * grad_z[:, :total]
+        return grad_phases
+
+    def _shift(self, phases, grad_output):
+        """
+        Parameter-shift rule over every phase of every token.
+
+        Parameters:
+        -----------
+        phases : numpy.ndarray
+            The chain phases, shape `(N, 3, total_qubits)`.
+        grad_output : numpy.ndarray
+            The gradient with respect to the encoded vectors, shape `(N, dimension)`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The gradient with respect to the chain phases, shape `(N, 3, total_qubits)`.
+        """
+        def source_z(chains):
+            return 1 - 2 * np.abs(phase_chain_matrices(chains[..., 0], chains[..., 1], chains[..., 2])[..., 1, 0]) ** 2
+
+        count, total = len(phases), phases.shape[2]
+        z = source_z(np.transpose(phases, (0, 2, 1)))
+        # Only sources that an encoded qubit depends on have a gradient
+        sources = np.unique(self.sources[self.sources < total])
+        grad_phases = np.zeros_like(phases)
+        if not len(sources):
+            return grad_phases
+
+        # The +pi/2 and -pi/2 shift of every row, shape (3 rows, 2 shifts, 3 phases)
+        shifts = np.zeros((3, 2, 3))
+        shifts[np.arange(3), 0, np.arange(3)] = np.pi / 2
+        shifts[np.arange(3), 1, np.arange(3)] = -np.pi / 2
+        # The shifted chains of all sources are stacked and evaluated in one pass per block of tokens
+        evaluations = len(sources) * 6
+        block = max(1, SHIFT_BLOCK_ELEMENTS // (evaluations * self.sources.size))
+        for start in range(0, count, block):
+            rows = slice(start, start + block)
+            chains = np.transpose(phases[rows][:, :, sources], (0, 2, 1))[:, :, None, None, :] + shifts
+            stacked = np.repeat(z[rows, None, :], evaluations, axis=1).reshape(-1, len(sources), 6, total)
+            stacked[:, np.arange(len(sources)), :, sources] = np.transpose(
+                source_z(chains).reshape(-1, len(sources), 6), (1, 0, 2))
+            encoded = self._encode(stacked.reshape(-1, total)).reshape(-1, len(sources), 3, 2, len(self.sources))
+            difference = encoded[:, :, :, 0] - encoded[:, :, :, 1]
+            grad_phases[rows, :, sources] = np.einsum("nsrd,nd->nrs", difference, grad_output[rows]) / 2
+        return grad_phases
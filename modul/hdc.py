@@ -0,0 +1,315 @@
+import numpy as np
+
+from modul.hypervector import pack_hypervectors, unpack_hypervectors
+
+BLOCK_ROWS = 4096
+
+
+class HDCEngine:
+    """
+    Vectorized HDC algebra on batches of hypervectors.
+
+    The engine implements the operations of the README's HDC engine on
+    `(N, D)` arrays as produced by `HypervectorProjection`:
+
+    - `bind` associates two hypervectors: XOR for bit-packed binary vectors,
+      element-wise multiplication for float32 vectors. Binding is its own
+      inverse for binary vectors.
+    - `bundle` superimposes hypervectors: the bitwise majority for binary
+      vectors (ties are broken by a fixed random vector), the sum for float32
+      vectors. `bundle_segments` bundles many consecutive segments at once.
+    - `permute` rotates the components cyclically, which encodes order.
+    - `compose` builds sentence vectors by permuting every word by its position
+      and bundling the words of each sentence.
+
+    Binary vectors stay packed in 64-bit words for all operations; padding
+    bits beyond `dimension` are kept 0. All operations accept an `out` array so
+    that streaming callers can reuse buffers.
+
+    Attributes:
+    -----------
+    dimension : int
+        The number of components per hypervector.
+    binary : bool
+        Whether the hypervectors are bit-packed binary or float32.
+    words : int
+        The number of 64-bit words per packed hypervector.
+    tie_break : numpy.ndarray
+        The packed random vector that decides majority ties.
+    """
+
+    def __init__(self, dimension=10000, binary=True, seed=0):
+        """
+        Initializes the engine.
+
+        Parameters:
+        -----------
+        dimension : int, optional
+            The number of components per hypervector (default is 10000).
+        binary : bool, optional
+            Whether the hypervectors are bit-packed binary (default is True).
+        seed : int, optional
+            The seed of the tie-break vector (default is 0).
+        """
+        self.dimension = dimension
+        self.binary = binary
+        self.words = -(-dimension // 64)
+        rng = np.random.default_rng(seed)
+        self.tie_break = pack_hypervectors(rng.random((1, dimension)) < 0.5)[0]
+        padding = 64 * self.words - dimension
+        self._last_word_mask = np.uint64(0xFFFFFFFFFFFFFFFF) >> np.uint64(padding)
+
+    def _check(self, vectors):
+        """
+        Validate the shape of a batch of hypervectors.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            The hypervectors, one per row.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The hypervectors as a 2D array of the storage dtype.
+
+        Raises:
+        -------
+        ValueError
+            If the number of columns does not match the engine.
+        """
+        dtype = np.uint64 if self.binary else np.float32
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=dtype))
+        columns = self.words if self.binary else self.dimension
+        if vectors.shape[-1] != columns:
+            raise ValueError(f"Expected hypervectors with {columns} columns, got {vectors.shape[-1]}.")
+        return vectors
+
+    def bind(self, a, b, out=None):
+        """
+        Bind hypervectors pairwise.
+
+        Parameters:
+        -----------
+        a, b : numpy.ndarray
+            Hypervectors of shape `(N, columns)`; either may be a single row that
+            is broadcast against the other.
+        out : numpy.ndarray, optional
+            The array receiving the result; may be `a` or `b` (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The bound hypervectors.
+        """
+        a = self._check(a)
+        b = self._check(b)
+        if self.binary:
+            return np.bitwise_xor(a, b, out=out)
+        return np.multiply(a, b, out=out)
+
+    def permute(self, vectors, shift=1, out=None):
+        """
+        Rotate hypervectors cyclically by `shift` components.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Hypervectors of shape `(N, columns)`.
+        shift : int or numpy.ndarray, optional
+            The rotation, either one for all rows or one per row (default is 1).
+            Negative shifts invert the rotation.
+        out : numpy.ndarray, optional
+            The array receiving the result; must not be `vectors` (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The rotated hypervectors; component `i` moves to `(i + shift) % dimension`.
+        """
+        vectors = self._check(vectors)
+        shifts = np.broadcast_to(np.asarray(shift, dtype=np.int64) % self.dimension, (len(vectors),))
+        if out is None:
+            out = np.empty_like(vectors)
+
+        if not self.binary:
+            for start in range(0, len(vectors), BLOCK_ROWS):
+                rows = slice(start, start + BLOCK_ROWS)
+                index = (np.arange(self.dimension) - shifts[rows, None]) % self.dimension
+                out[rows] = np.take_along_axis(vectors[rows], index, axis=1)
+            return out
+
+        # Rows with the same shift (e.g. the same word position) are rotated together
+        for value in np.unique(shifts).tolist():
+            rows = np.flatnonzero(shifts == value)
+            block = vectors[rows]
+            # Rotating D bits is (v << s) | (v >> (D - s)); the padding bits stay 0
+            rotated = self._shift_words(block, value, left=True)
+            rotated |= self._shift_words(block, self.dimension - value, left=False)
+            rotated[:, -1] &= self._last_word_mask
+            out[rows] = rotated
+        return out
+
+    def _shift_words(self, vectors, shift, left):
+        """
+        Shift packed hypervectors by a number of bits, filling with zeros.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Packed hypervectors of shape `(N, words)`.
+        shift : int
+            The non-negative shift in bits.
+        left : bool
+            Whether bits move to higher positions (True) or lower positions (False).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The shifted hypervectors.
+        """
+        words = vectors.shape[1]
+        word_shift, bit_shift = divmod(shift, 64)
+        shifted = np.zeros_like(vectors)
+        if word_shift >= words:
+            return shifted
+        kept = words - word_shift
+        if left:
+            shifted[:, word_shift:] = vectors[:, :kept] << np.uint64(bit_shift)
+            if bit_shift and kept > 1:
+                shifted[:, word_shift + 1:] |= vectors[:, :kept - 1] >> np.uint64(64 - bit_shift)
+        else:
+            shifted[:, :kept] = vectors[:, word_shift:] >> np.uint64(bit_shift)
+            if bit_shift and kept > 1:
+                shifted[:, :kept - 1] |= vectors[:, word_shift + 1:] << np.uint64(64 - bit_shift)
+        return shifted
+
+    def bundle(self, vectors, out=None):
+        """
+        Bundle a batch of hypervectors into one.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Hypervectors of shape `(N, columns)`.
+        out : numpy.ndarray, optional
+            The array receiving the result, shape `(columns,)` (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The bitwise majority (binary) or the sum (float32) of the vectors.
+        """
+        vectors = self._check(vectors)
+        if not self.binary:
+            return np.sum(vectors, axis=0, out=out)
+        if len(vectors) <= 64:
+            result = self.bundle_segments(vectors, [0])[0]
+        else:
+            # Long bundles: count the bits column-wise in blocks of unpacked rows
+            counts = np.zeros(self.dimension, dtype=np.int64)
+            for start in range(0, len(vectors), BLOCK_ROWS):
+                counts += unpack_hypervectors(vectors[start:start + BLOCK_ROWS], self.dimension).sum(
+                    axis=0, dtype=np.int64)
+            tie_bits = unpack_hypervectors(self.tie_break[None], self.dimension)[0].astype(bool)
+            result = pack_hypervectors([(2 * counts > len(vectors)) | ((2 * counts == len(vectors)) & tie_bits)])[0]
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    def bundle_segments(self, vectors, offsets, out=None):
+        """
+        Bundle consecutive segments of a batch, e.g. the words of many sentences.
+
+        Binary vectors are bundled without unpacking: every segment keeps a
+        bit-sliced counter (one packed word array per counter bit), the
+        vectors are added with ripple-carry XOR/AND, and the counters are
+        compared against half the segment length bit plane by bit plane. The
+        work is vectorized over all segments and grows with the length of the
+        longest segment.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Hypervectors of shape `(N, columns)`.
+        offsets : sequence of int
+            The start row of each segment, increasing; segment `s` ends where
+            segment `s + 1` starts, the last one at row N.
+        out : numpy.ndarray, optional
+            The array receiving the result, shape `(S, columns)` (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            One bundled hypervector per segment.
+
+        Raises:
+        -------
+        ValueError
+            If a segment is empty.
+        """
+        vectors = self._check(vectors)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        lengths = np.diff(np.append(offsets, len(vectors)))
+        if np.any(lengths <= 0):
+            raise ValueError("Every segment needs at least one hypervector.")
+        if not self.binary:
+            return np.add.reduceat(vectors, offsets, axis=0, out=out)
+
+        planes = np.zeros((int(lengths.max()).bit_length(), len(offsets), self.words), dtype=np.uint64)
+        for position in range(int(lengths.max())):
+            active = np.flatnonzero(lengths > position)
+            carry = vectors[offsets[active] + position]
+            for plane in planes:
+                if not carry.any():
+                    break
+                counter = plane[active]
+                plane[active] = counter ^ carry
+                carry &= counter
+
+        # Majority: count > length // 2, and count == length / 2 is a tie for even lengths
+        threshold = lengths // 2
+        all_ones = np.uint64(0xFFFFFFFFFFFFFFFF)
+        greater = np.zeros((len(offsets), self.words), dtype=np.uint64)
+        equal = np.full((len(offsets), self.words), all_ones)
+        for bit in range(len(planes) - 1, -1, -1):
+            threshold_bit = np.where((threshold >> bit) & 1, all_ones, np.uint64(0))[:, None]
+            greater |= equal & planes[bit] & ~threshold_bit
+            equal &= ~(planes[bit] ^ threshold_bit)
+        ties = np.where(lengths % 2 == 0, all_ones, np.uint64(0))[:, None]
+        result = greater | (equal & ties & self.tie_break)
+        result[:, -1] &= self._last_word_mask
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
+    def compose(self, vectors, offsets, out=None):
+        """
+        Compose sequence hypervectors from their element hypervectors.
+
+        Every element is permuted by its position within its segment, so that
+        the same words in a different order give a different vector, and the
+        elements of each segment are bundled.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Element hypervectors of shape `(N, columns)`, e.g. the words of all
+            sentences one after another.
+        offsets : sequence of int
+            The start row of each sequence.
+        out : numpy.ndarray, optional
+            The array receiving the result, shape `(S, columns)` (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            One hypervector per sequence.
+        """
+        vectors = self._check(vectors)
+        offsets = np.asarray(offsets, dtype=np.intp)
+        starts = np.repeat(offsets, np.diff(np.append(offsets, len(vectors))))
+        positions = np.arange(len(vectors)) - starts
+        return self.bundle_segments(self.permute(vectors, positions), offsets, out=out)
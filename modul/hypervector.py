@@ -0,0 +1,521 @@
+import numpy as np
+
+METRICS = ("hamming", "cosine")
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """
+    Count the set bits of every element of an unsigned integer array.
+
+    Parameters:
+    -----------
+    words : numpy.ndarray
+        An unsigned integer array.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The number of set bits per element, as uint8.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    counts = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (words.itemsize,))
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def pack_hypervectors(bits):
+    """
+    Pack binary hypervectors into 64-bit words.
+
+    Parameters:
+    -----------
+    bits : numpy.ndarray
+        A boolean or 0/1 array of shape `(N, dimension)`.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A uint64 array of shape `(N, ceil(dimension / 64))`. Bit `i` of a
+        hypervector is bit `i % 64` (least significant first) of word `i // 64`;
+        padding bits are 0.
+    """
+    bits = np.asarray(bits, dtype=bool)
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    padding = -packed.shape[1] % 8
+    if padding:
+        packed = np.pad(packed, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def unpack_hypervectors(packed, dimension):
+    """
+    Unpack binary hypervectors packed by `pack_hypervectors`.
+
+    Parameters:
+    -----------
+    packed : numpy.ndarray
+        A uint64 array of shape `(N, words)`.
+    dimension : int
+        The number of bits per hypervector.
+
+    Returns:
+    --------
+    numpy.ndarray
+        A uint8 array of shape `(N, dimension)` with one bit per element.
+    """
+    packed = np.ascontiguousarray(packed, dtype=np.uint64)
+    return np.unpackbits(packed.view(np.uint8), axis=1, count=dimension, bitorder="little")
+
+
+def counts_to_marginals(counts, groups):
+    """
+    Convert the counts of a measurement into the probability of 1 per qubit.
+
+    Parameters:
+    -----------
+    counts : dict of str to tuple of (numpy.ndarray, numpy.ndarray)
+        The outcomes and counts of each group, as returned by `Executor.run`
+        for one measurement.
+    groups : dict of str to list of int
+        The measured qubits of each group (`Measurement.groups`).
+
+    Returns:
+    --------
+    numpy.ndarray
+        The marginal probabilities of all measured qubits, group after group
+        in the order of `groups`.
+    """
+    marginals = []
+    for label, qubits in groups.items():
+        outcomes, outcome_counts = counts[label]
+        bits = (outcomes[:, None] >> np.arange(len(qubits), dtype=np.uint64)) & np.uint64(1)
+        marginals.append(outcome_counts @ bits.astype(np.float64) / outcome_counts.sum())
+    return np.concatenate(marginals) if marginals else np.empty(0)
+
+
+class HypervectorProjection:
+    """
+    Projects encoded qubit probabilities into fixed-length hypervectors.
+
+    The probability `p` of measuring 1 on each qubit is centred as the Z
+    expectation `1 - 2p` and multiplied by a seeded Gaussian random matrix.
+    Binary hypervectors keep the sign of each component (a random-hyperplane
+    hash, so the Hamming distance tracks the angle between the inputs) and are
+    stored bit-packed; float32 hypervectors are normalized to unit length.
+
+    Attributes:
+    -----------
+    input_dimension : int
+        The number of measured qubits per input, e.g. `Encoder.dimension`.
+    dimension : int
+        The number of components per hypervector.
+    binary : bool
+        Whether the hypervectors are bit-packed binary or float32.
+    projection : numpy.ndarray
+        The float32 projection matrix of shape `(input_dimension, dimension)`.
+    """
+
+    def __init__(self, input_dimension, dimension=10000, binary=True, seed=0):
+        """
+        Initializes the projection.
+
+        Parameters:
+        -----------
+        input_dimension : int
+            The number of measured qubits per input.
+        dimension : int, optional
+            The number of components per hypervector (default is 10000).
+        binary : bool, optional
+            Whether to produce bit-packed binary hypervectors (default is True).
+        seed : int, optional
+            The seed of the projection matrix (default is 0). Hypervectors are
+            only comparable if they were projected with the same seed.
+        """
+        self.input_dimension = input_dimension
+        self.dimension = dimension
+        self.binary = binary
+        self.seed = seed
+        self.projection = np.random.default_rng(seed).standard_normal(
+            (input_dimension, dimension), dtype=np.float32)
+
+    def project(self, probabilities):
+        """
+        Project probability vectors into hypervectors.
+
+        Parameters:
+        -----------
+        probabilities : numpy.ndarray
+            The probability of measuring 1 on each qubit, shape
+            `(N, input_dimension)` or `(input_dimension,)`, e.g. from
+            `Encoder.encode_batch`.
+
+        Returns:
+        --------
+        numpy.ndarray
+            Packed uint64 hypervectors of shape `(N, ceil(dimension / 64))` if
+            `binary`, otherwise unit-length float32 hypervectors of shape
+            `(N, dimension)`.
+
+        Raises:
+        -------
+        ValueError
+            If the inputs do not have `input_dimension` components.
+        """
+        probabilities = np.atleast_2d(np.asarray(probabilities, dtype=np.float32))
+        if probabilities.shape[1] != self.input_dimension:
+            raise ValueError(f"Expected {self.input_dimension} probabilities per input, "
+                             f"got {probabilities.shape[1]}.")
+        values = (1 - 2 * probabilities) @ self.projection
+        if self.binary:
+            return pack_hypervectors(values > 0)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        np.divide(values, norms, out=values, where=norms > 0)
+        return values
+
+    def project_counts(self, results, measurements):
+        """
+        Project measured counts into hypervectors.
+
+        Parameters:
+        -----------
+        results : list of dict
+            The counts returned by `Executor.run`.
+        measurements : list of Measurement
+            The executed measurements; their groups define the qubit order.
+
+        Returns:
+        --------
+        numpy.ndarray
+            One hypervector per measurement, as returned by `project`.
+        """
+        return self.project(np.array([counts_to_marginals(counts, measurement.groups)
+                                      for counts, measurement in zip(results, measurements)]))
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour index over hypervectors.
+
+    With the "hamming" metric the index stores bit-packed binary hypervectors
+    and ranks by Hamming distance, computed with XOR and popcount over 64-bit
+    words. With the "cosine" metric it stores float32 hypervectors and ranks by
+    cosine similarity with matrix products. Both exact searches are batched
+    over queries and over blocks of stored vectors, so their memory is bounded
+    by `block_size` besides the score matrix.
+
+    The approximate mode uses locality-sensitive hashing: every table hashes a
+    vector to `bits_per_table` bits (sampled bit positions for "hamming",
+    random hyperplane signs for "cosine"). The tables are kept as sorted key
+    arrays, so a query finds its buckets with `searchsorted` and only the
+    collected candidates are ranked exactly. The tables are rebuilt lazily
+    after vectors were added.
+
+    Attributes:
+    -----------
+    dimension : int
+        The number of components per hypervector.
+    metric : str
+        Either "hamming" or "cosine".
+    keys : list
+        The key of every stored vector, e.g. the encoded word.
+    tables : int
+        The number of hash tables of the approximate mode.
+    bits_per_table : int
+        The number of hash bits per table.
+    """
+
+    def __init__(self, dimension, metric="hamming", tables=8, bits_per_table=16, seed=0, block_size=65536):
+        """
+        Initializes an empty index.
+
+        Parameters:
+        -----------
+        dimension : int
+            The number of components per hypervector.
+        metric : str, optional
+            Either "hamming" (packed binary vectors) or "cosine" (float32
+            vectors) (default is "hamming").
+        tables : int, optional
+            The number of hash tables of the approximate mode (default is 8).
+        bits_per_table : int, optional
+            The number of hash bits per table, at most 64 (default is 16).
+        seed : int, optional
+            The seed of the hash functions (default is 0).
+        block_size : int, optional
+            The number of stored vectors compared at once in exact searches
+            (default is 65536).
+
+        Raises:
+        -------
+        ValueError
+            If the metric is unknown or the hash parameters are out of range.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}.")
+        if tables < 1 or not 1 <= bits_per_table <= 64:
+            raise ValueError("The index needs at least one table and 1 to 64 bits per table.")
+        self.dimension = dimension
+        self.metric = metric
+        self.tables = tables
+        self.bits_per_table = bits_per_table
+        self.block_size = block_size
+        self.keys = []
+        self._rng = np.random.default_rng(seed)
+        if metric == "hamming":
+            self._vectors = np.empty((0, -(-dimension // 64)), dtype=np.uint64)
+            self._hash_bits = self._rng.integers(dimension, size=(tables, bits_per_table))
+        else:
+            self._vectors = np.empty((0, dimension), dtype=np.float32)
+            self._hash_bits = self._rng.standard_normal((dimension, tables * bits_per_table), dtype=np.float32)
+        self._size = 0
+        self._buckets = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        """
+        numpy.ndarray: The stored hypervectors.
+        """
+        return self._vectors[:self._size]
+
+    def add(self, keys, vectors):
+        """
+        Add hypervectors to the index.
+
+        Parameters:
+        -----------
+        keys : sequence
+            One key per vector.
+        vectors : numpy.ndarray
+            Packed uint64 hypervectors for "hamming" or float32 hypervectors for
+            "cosine", one row per key.
+
+        Returns:
+        --------
+        int
+            The number of vectors in the index.
+
+        Raises:
+        -------
+        ValueError
+            If the number of keys and vectors differ or the vector shape is wrong.
+        """
+        vectors = self._prepare(vectors)
+        if len(keys) != len(vectors):
+            raise ValueError("Every vector needs exactly one key.")
+        needed = self._size + len(vectors)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors), 1024)
+            grown = np.empty((capacity, self._vectors.shape[1]), dtype=self._vectors.dtype)
+            grown[:self._size] = self.vectors
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+        self.keys.extend(keys)
+        self._buckets = None
+        return self._size
+
+    def _prepare(self, vectors):
+        """
+        Validate stored or query vectors and normalize cosine vectors.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            The vectors, one per row.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The vectors in storage layout.
+
+        Raises:
+        -------
+        ValueError
+            If the vector shape does not match the index.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=self._vectors.dtype))
+        if vectors.shape[1] != self._vectors.shape[1]:
+            raise ValueError(f"Expected vectors with {self._vectors.shape[1]} columns, got {vectors.shape[1]}.")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        return vectors
+
+    def _scores(self, queries, rows=None):
+        """
+        Compute the ranking score of queries against stored vectors.
+
+        Lower is better: the Hamming distance, or the negative cosine similarity.
+
+        Parameters:
+        -----------
+        queries : numpy.ndarray
+            Prepared query vectors.
+        rows : numpy.ndarray, optional
+            The stored rows to compare (default is all rows).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The scores of shape `(len(queries), len(rows))`.
+        """
+        count = self._size if rows is None else len(rows)
+        scores = np.empty((len(queries), count), dtype=np.float32 if self.metric == "cosine" else np.int32)
+        block = max(1, self.block_size // max(len(queries), 1))
+        for start in range(0, count, block):
+            # Candidate rows are gathered per block, so no copy of all of them is made
+            if rows is None:
+                chunk = self.vectors[start:start + block]
+            else:
+                chunk = self._vectors[rows[start:start + block]]
+            if self.metric == "cosine":
+                scores[:, start:start + block] = -(queries @ chunk.T)
+            else:
+                scores[:, start:start + block] = popcount(queries[:, None, :] ^ chunk[None]).sum(
+                    axis=2, dtype=np.int32)
+        return scores
+
+    def _hash(self, vectors):
+        """
+        Compute the hash keys of vectors for all tables.
+
+        Parameters:
+        -----------
+        vectors : numpy.ndarray
+            Prepared vectors.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A uint64 array of shape `(len(vectors), tables)`.
+        """
+        keys = np.zeros((len(vectors), self.tables), dtype=np.uint64)
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            if self.metric == "hamming":
+                words = self._hash_bits // 64
+                shifts = (self._hash_bits % 64).astype(np.uint64)
+            else:
+                signs = (block @ self._hash_bits > 0).reshape(len(block), self.tables, self.bits_per_table)
+            for table in range(self.tables):
+                for bit in range(self.bits_per_table):
+                    if self.metric == "hamming":
+                        value = (block[:, words[table, bit]] >> shifts[table, bit]) & np.uint64(1)
+                    else:
+                        value = signs[:, table, bit].astype(np.uint64)
+                    keys[start:start + len(block), table] |= value << np.uint64(bit)
+        return keys
+
+    def _build_buckets(self):
+        """
+        Sort the stored vectors by their hash key in every table.
+
+        Returns:
+        --------
+        None
+        """
+        keys = self._hash(self.vectors).T
+        order = np.argsort(keys, axis=1, kind="stable")
+        self._buckets = (order, np.take_along_axis(keys, order, axis=1))
+
+    def search(self, queries, k=1, approximate=False):
+        """
+        Find the `k` nearest stored vectors of each query.
+
+        Parameters:
+        -----------
+        queries : numpy.ndarray
+            Query hypervectors in the storage layout, one per row.
+        k : int, optional
+            The number of neighbours (default is 1).
+        approximate : bool, optional
+            Whether to rank only the candidates found in the hash tables
+            (default is False, exact search).
+
+        Returns:
+        --------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The row indices of shape `(len(queries), k)`, nearest first, and
+            their Hamming distances (int) or cosine similarities (float32).
+            Missing neighbours have index -1 and distance `dimension + 1` or
+            similarity -inf.
+        """
+        queries = self._prepare(queries)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), np.inf)
+        if self._size == 0:
+            return indices, self._finish(scores)
+
+        if not approximate:
+            all_scores = self._scores(queries)
+            count = min(k, self._size)
+            nearest = np.argpartition(all_scores, count - 1, axis=1)[:, :count]
+            nearest_scores = np.take_along_axis(all_scores, nearest, axis=1)
+            order = np.argsort(nearest_scores, axis=1, kind="stable")
+            indices[:, :count] = np.take_along_axis(nearest, order, axis=1)
+            scores[:, :count] = np.take_along_axis(nearest_scores, order, axis=1)
+            return indices, self._finish(scores)
+
+        if self._buckets is None:
+            self._build_buckets()
+        order, sorted_keys = self._buckets
+        query_keys = self._hash(queries)
+        candidate_lists = [[] for _ in range(len(queries))]
+        for table in range(self.tables):
+            starts = np.searchsorted(sorted_keys[table], query_keys[:, table], side="left")
+            stops = np.searchsorted(sorted_keys[table], query_keys[:, table], side="right")
+            for i, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+                if stop > start:
+                    candidate_lists[i].append(order[table, start:stop])
+
+        for i, candidates in enumerate(candidate_lists):
+            if not candidates:
+                continue
+            candidates = np.unique(np.concatenate(candidates))
+            candidate_scores = self._scores(queries[i:i + 1], candidates)[0]
+            count = min(k, len(candidates))
+            nearest = np.argsort(candidate_scores, kind="stable")[:count]
+            indices[i, :count] = candidates[nearest]
+            scores[i, :count] = candidate_scores[nearest]
+        return indices, self._finish(scores)
+
+    def _finish(self, scores):
+        """
+        Convert internal ranking scores into distances or similarities.
+
+        Parameters:
+        -----------
+        scores : numpy.ndarray
+            The ranking scores, inf for missing neighbours.
+
+        Returns:
+        --------
+        numpy.ndarray
+            Hamming distances as int64, or cosine similarities as float32.
+        """
+        if self.metric == "cosine":
+            return (-scores).astype(np.float32)
+        return np.where(np.isinf(scores), self.dimension + 1, scores).astype(np.int64)
+
+    def nearest(self, queries, approximate=False):
+        """
+        Get the key of the nearest stored vector of each query.
+
+        Parameters:
+        -----------
+        queries : numpy.ndarray
+            Query hypervectors in the storage layout.
+        approximate : bool, optional
+            Whether to use the hash tables (default is False).
+
+        Returns:
+        --------
+        list
+            The nearest key per query, or None if no candidate was found.
+        """
+        indices, _ = self.search(queries, k=1, approximate=approximate)
+        return [self.keys[index] if index >= 0 else None for index in indices[:, 0].tolist()]
@@ -0,0 +1,218 @@
+import numpy as np
+
+from modul.circuit import Circuit
+from modul.interconnect import Interconnect
+from modul.ir import CircuitIR
+from modul.simulator import BlockSimulator
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+class IncrementalCircuit:
+    """
+    The main circuit as named blocks that are re-emitted and re-simulated one at a time.
+
+    The TokenSystem and every Subsystem are recorded as contiguous blocks of a
+    `CircuitIR`, followed by the Interconnect. All single-qubit gates of a
+    block act before the first CX gate, so the simulation state factorizes:
+    each block owns the product state of its qubits, and the Interconnect owns
+    the parity structure of the CX network.
+
+    When the phases of one block change, `update` marks it, and the next
+    evaluation re-emits only that block's gates, splices them into the IR and
+    replaces only that block's product state in the `BlockSimulator`. The CX
+    parity structure and the cached block grouping of the measured qubits are
+    reused, so sweeping the phases of one Subsystem costs a fraction of a full
+    rebuild.
+
+    Attributes:
+    -----------
+    circuit : Circuit
+        The Circuit (recording a `CircuitIR`) holding all blocks.
+    token_system : TokenSystem
+        The TokenSystem block, named "TokenSystem".
+    subsystems : list of Subsystem
+        The Subsystem blocks, named "Subsystem1", "Subsystem2", ...
+    interconnect : Interconnect
+        The Interconnect that entangled the blocks.
+    gate_mode : str
+        The gate mode used to emit the blocks.
+    simulator : BlockSimulator
+        The simulator whose state is updated per block.
+    """
+
+    def __init__(self, total_qubits=50, main_qubits=20, subsystem_qubits=10, subsystems_count=3,
+                 gate_mode="fused", interconnect_options=None):
+        """
+        Builds all blocks and simulates the circuit once.
+
+        Parameters:
+        -----------
+        total_qubits : int, optional
+            The total number of qubits in the circuit (default is 50).
+        main_qubits : int, optional
+            The number of qubits assigned to the TokenSystem (default is 20).
+        subsystem_qubits : int, optional
+            The number of qubits assigned to each Subsystem (default is 10).
+        subsystems_count : int, optional
+            The number of Subsystems (default is 3).
+        gate_mode : str, optional
+            The gate emission mode passed to `apply_operations` (default is "fused").
+        interconnect_options : dict, optional
+            Keyword arguments for `Interconnect` (default is None, the "fold" topology).
+        """
+        self.gate_mode = gate_mode
+        self.circuit = Circuit(total_qubits, ir=True)
+        self.token_system = TokenSystem(self.circuit, num_qubits=main_qubits, name="TokenSystem")
+        self.subsystems = [Subsystem(self.circuit, num_qubits=subsystem_qubits, name=f"Subsystem{k + 1}")
+                           for k in range(subsystems_count)]
+
+        # Block name -> [component, first operation, operation after the last, global phase]
+        self._blocks = {}
+        for name, component in self.components().items():
+            ir = self.get_circuit()
+            start, phase = len(ir), ir.global_phase
+            component.apply_operations(gate_mode)
+            self._blocks[name] = [component, start, len(ir), ir.global_phase - phase]
+
+        self.interconnect = Interconnect(self.circuit, **(interconnect_options or {}))
+        self.interconnect.entangle(self.token_system.qubit_range,
+                                   [subsystem.qubit_range for subsystem in self.subsystems])
+        self.simulator = BlockSimulator(self.get_circuit())
+        self._dirty = set()
+
+    def components(self):
+        """
+        Get the blocks by name.
+
+        Returns:
+        --------
+        dict of str to TokenSystem or Subsystem
+            The TokenSystem followed by the Subsystems.
+        """
+        components = {"TokenSystem": self.token_system}
+        components.update((f"Subsystem{k + 1}", subsystem) for k, subsystem in enumerate(self.subsystems))
+        return components
+
+    def get_circuit(self):
+        """
+        Get the recorded circuit.
+
+        Returns:
+        --------
+        CircuitIR
+            The circuit of all blocks; pending updates are not applied.
+        """
+        return self.circuit.get_circuit()
+
+    @property
+    def qubits(self):
+        """
+        numpy.ndarray: The qubits of all blocks, TokenSystem first.
+        """
+        return np.concatenate([np.asarray(component.qubit_range) for component in self.components().values()])
+
+    def update(self, name, tp_matrix=None, ip_matrix=None):
+        """
+        Change the phases of one block.
+
+        Parameters:
+        -----------
+        name : str
+            "TokenSystem" or "Subsystem<k>".
+        tp_matrix : numpy.ndarray, optional
+            The new `tp_matrix` of the block (default is None, unchanged).
+        ip_matrix : numpy.ndarray, optional
+            The new `ip_matrix` of the TokenSystem (default is None, unchanged).
+
+        Returns:
+        --------
+        None
+
+        Raises:
+        -------
+        ValueError
+            If the block does not exist, a matrix has the wrong shape, or an
+            `ip_matrix` is given for a Subsystem.
+        """
+        if name not in self._blocks:
+            raise ValueError(f"Unknown block '{name}', expected one of {list(self._blocks)}.")
+        component = self._blocks[name][0]
+        for attribute, matrix in (("tp_matrix", tp_matrix), ("ip_matrix", ip_matrix)):
+            if matrix is None:
+                continue
+            if not hasattr(component, attribute):
+                raise ValueError(f"Block '{name}' has no {attribute}.")
+            matrix = np.asarray(matrix, dtype=np.float64)
+            if matrix.shape != np.shape(getattr(component, attribute)):
+                raise ValueError(f"Expected a {attribute} of shape {np.shape(getattr(component, attribute))}, "
+                                 f"got {matrix.shape}.")
+            setattr(component, attribute, matrix)
+        self._dirty.add(name)
+
+    def refresh(self):
+        """
+        Re-emit and re-simulate the blocks changed since the last evaluation.
+
+        Returns:
+        --------
+        list of str
+            The names of the refreshed blocks.
+        """
+        ir = self.get_circuit()
+        refreshed = [name for name in self._blocks if name in self._dirty]
+        for name in refreshed:
+            component, start, stop, phase = self._blocks[name]
+            block = CircuitIR(ir.num_qubits)
+            component.circuit = block  # Emit into a scratch IR, then splice it into the main one
+            try:
+                component.apply_operations(self.gate_mode)
+            finally:
+                component.circuit = ir
+            delta = ir.splice(start, stop, block)
+            ir.global_phase += block.global_phase - phase
+            self._blocks[name][2:] = [stop + delta, block.global_phase]
+            if delta:
+                for later in self._blocks.values():
+                    if later[1] > start:
+                        later[1] += delta
+                        later[2] += delta
+            self.simulator.update_product_state(block, component.qubit_range)
+        self._dirty.clear()
+        return refreshed
+
+    def marginals(self, qubits=None):
+        """
+        Compute the probability of measuring 1 on each qubit after pending updates.
+
+        Parameters:
+        -----------
+        qubits : sequence of int, optional
+            The qubits to evaluate (default is `qubits`, all blocks).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The marginal probabilities, one per qubit.
+        """
+        self.refresh()
+        return self.simulator.marginals(self.qubits if qubits is None else qubits)
+
+    def probabilities(self, qubits, max_qubits=24):
+        """
+        Compute the measurement distribution of a qubit set after pending updates.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits.
+        max_qubits : int, optional
+            The largest number of measured qubits (default is 24).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The probabilities as returned by `BlockSimulator.probabilities`.
+        """
+        self.refresh()
+        return self.simulator.probabilities(qubits, max_qubits=max_qubits)
@@ -1,19 +1,76 @@
+import numpy as np
+
+from modul.gates import append_cx_gates
+from modul.profiling import profiled
+
+TOPOLOGIES = ("fold", "all_to_all", "ring", "random")
+
+
+def cx_depth(edges):
+    """
+    Compute the depth of a sequence of CX gates.
+
+    Every gate is placed in the earliest layer after the last gate on either of
+    its qubits.
+
+    Parameters:
+    -----------
+    edges : numpy.ndarray
+        An integer array of shape `(E, 2)` with one `(control, target)` pair per gate.
+
+    Returns:
+    --------
+    int
+        The number of CX layers.
+    """
+    layers = {}
+    depth = 0
+    for control, target in np.asarray(edges).tolist():
+        layer = max(layers.get(control, 0), layers.get(target, 0)) + 1
+        layers[control] = layers[target] = layer
+        depth = max(depth, layer)
+    return depth
+
+
 class Interconnect:
     """
     Handles the entanglement between different systems on the main circuit.
 
     This class manages the process of entangling a TokenSystem with multiple
-    subsystems on a quantum circuit. The entanglement is done in two stages:
-    the first 10 qubits of the TokenSystem are entangled with the qubits of
-    each Subsystem, and the next 10 qubits repeat the process.
-    
+    subsystems on a quantum circuit by CX gates from TokenSystem qubits (controls)
+    to Subsystem qubits (targets). The gate pattern is selected by a topology:
+
+    - "fold": the TokenSystem is folded onto each Subsystem, token qubit `k`
+      targets Subsystem qubit `k mod n`. With 20 token and 10 subsystem qubits,
+      the first 10 qubits of the TokenSystem are entangled with the qubits of
+      each Subsystem, and the next 10 qubits repeat the process.
+    - "all_to_all": every token qubit targets every Subsystem qubit.
+    - "ring": token qubit `k` targets Subsystem qubits `k mod n` and `(k + 1) mod n`.
+    - "random": every token/Subsystem qubit pair is connected with probability
+      `density`.
+
+    The edge list of each entanglement is computed as an index array and emitted
+    in one batched operation.
+
     Attributes:
     -----------
     circuit : QuantumCircuit
         The quantum circuit where the entanglement is performed.
+    topology : str
+        The name of the topology.
+    density : float
+        The connection probability of the "random" topology.
+    rng : numpy.random.Generator
+        The random generator of the "random" topology.
+    edges : numpy.ndarray
+        The `(control, target)` pairs emitted by the last call to `entangle`.
+    cx_count : int
+        The number of CX gates emitted by the last call to `entangle`.
+    depth : int
+        The CX depth of the gates emitted by the last call to `entangle`.
     """
 
-    def __init__(self, circuit):
+    def __init__(self, circuit, topology="fold", density=0.2, seed=None):
         """
         Initializes the Interconnect with a given quantum circuit.
 
@@ -22,17 +79,80 @@ class Interconnect:
         circuit : Circuit
             The Circuit object that contains the quantum circuit where the
             entanglement will take place.
+        topology : str, optional
+            One of "fold", "all_to_all", "ring" or "random" (default is "fold").
+        density : float, optional
+            The connection probability of the "random" topology (default is 0.2).
+        seed : int, optional
+            The seed of the "random" topology (default is None).
+
+        Raises:
+        -------
+        ValueError
+            If the topology is unknown.
         """
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}.")
         self.circuit = circuit.get_circuit()
+        self.topology = topology
+        self.density = density
+        self.rng = np.random.default_rng(seed)
+        self.edges = np.empty((0, 2), dtype=np.intp)
+        self.cx_count = 0
+        self.depth = 0
 
+    def edge_list(self, qubits_token, qubits_subsystems):
+        """
+        Compute the CX gates of the topology.
+
+        Parameters:
+        -----------
+        qubits_token : list of int
+            The list of qubits that belong to the TokenSystem.
+
+        qubits_subsystems : list of range
+            A list of ranges, where each range represents the qubits allocated
+            to a Subsystem. The Subsystems may differ in size.
+
+        Returns:
+        --------
+        numpy.ndarray
+            An integer array of shape `(E, 2)` with one `(control, target)` pair
+            per gate, in emission order.
+        """
+        token = np.asarray(qubits_token, dtype=np.intp)
+        positions = np.arange(len(token))
+        edges = []
+        for subsystem_range in qubits_subsystems:
+            subsystem = np.asarray(subsystem_range, dtype=np.intp)
+            size = len(subsystem)
+            if self.topology == "fold":
+                order = np.lexsort((positions, positions % size))  # By target, then by token qubit
+                pairs = np.stack([token[order], subsystem[positions[order] % size]], axis=1)
+            elif self.topology == "ring":
+                targets = np.stack([positions % size, (positions + 1) % size], axis=1)
+                pairs = np.stack([np.repeat(token, 2), subsystem[targets.ravel()]], axis=1)
+            else:
+                mask = np.ones((len(token), size), dtype=bool)
+                if self.topology == "random":
+                    mask = self.rng.random(mask.shape) < self.density
+                controls, targets = np.nonzero(mask)
+                pairs = np.stack([token[controls], subsystem[targets]], axis=1)
+            edges.append(pairs)
+        if not edges:
+            return np.empty((0, 2), dtype=np.intp)
+        return np.concatenate(edges)
+
+    @profiled("interconnect.entangle", circuit="circuit")
     def entangle(self, qubits_token, qubits_subsystems):
         """
         Entangle the TokenSystem with each Subsystem.
 
         This method entangles the TokenSystem with multiple Subsystems by
-        applying controlled-NOT (CX) gates. The first 10 qubits of the TokenSystem
-        are entangled with the qubits in each Subsystem. Then, the next 10 qubits
-        of the TokenSystem are again entangled with the same qubits in the Subsystem.
+        applying controlled-NOT (CX) gates following the topology. With the
+        default "fold" topology the first qubits of the TokenSystem are entangled
+        with the qubits in each Subsystem, then the next qubits of the TokenSystem
+        are again entangled with the same qubits in the Subsystem.
 
         Parameters:
         -----------
@@ -45,12 +165,11 @@ class Interconnect:
 
         Returns:
         --------
-        None
+        dict
+            The number of CX gates (`cx_count`) and the CX depth (`depth`).
         """
-        for subsystem_range in qubits_subsystems:
-            for i in range(10):
-                # Entangle the first half of the TokenSystem with the Subsystem
-                self.circuit.cx(qubits_token[i], subsystem_range[i])
-
-                # Entangle the second half of the TokenSystem with the same Subsystem
-                self.circuit.cx(qubits_token[10 + i], subsystem_range[i])
+        self.edges = self.edge_list(qubits_token, qubits_subsystems)
+        append_cx_gates(self.circuit, self.edges)
+        self.cx_count = len(self.edges)
+        self.depth = cx_depth(self.edges)
+        return {"cx_count": self.cx_count, "depth": self.depth}
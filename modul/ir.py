@@ -0,0 +1,413 @@
+import numpy as np
+
+from modul.profiling import profiled
+
+OPCODES = ("h", "x", "p", "u", "cx", "reset", "measure")
+OPCODE_ARITY = {"h": 1, "x": 1, "p": 1, "u": 1, "cx": 2, "reset": 1, "measure": 1}
+_OPCODE_INDEX = {name: code for code, name in enumerate(OPCODES)}
+
+
+class CircuitIR:
+    """
+    A compact, array-backed record of circuit operations.
+
+    Every operation is one row in three growable NumPy arrays: an opcode, up to
+    two qubit indices and up to three angles. For "measure" rows the second
+    qubit column holds the classical bit. Recording an operation is an array
+    write instead of the construction of Qiskit objects, and whole layers of
+    gates are recorded with one `append` call.
+
+    The IR offers the subset of the `QuantumCircuit` API used by the components
+    of this package (`h`, `x`, `p`, `u`, `cx`, `reset`, `measure`,
+    `add_register`, `global_phase`, `num_qubits`), so `TokenSystem`,
+    `Subsystem`, `Interconnect` and `Measurement` write into it unchanged. It is
+    simulated directly by the `BlockSimulator`, and converted into a Qiskit
+    circuit only on demand with `to_qiskit`, which is the only place that
+    imports Qiskit.
+
+    Attributes:
+    -----------
+    num_qubits : int
+        The number of qubits of the circuit.
+    num_clbits : int
+        The number of classical bits of the circuit.
+    global_phase : float
+        The global phase of the circuit.
+    registers : dict of str to range
+        The classical bits of each classical register, in creation order.
+    """
+
+    def __init__(self, num_qubits, capacity=64):
+        """
+        Initializes an empty IR.
+
+        Parameters:
+        -----------
+        num_qubits : int
+            The number of qubits of the circuit.
+        capacity : int, optional
+            The number of operations reserved up front (default is 64).
+        """
+        self.num_qubits = num_qubits
+        self.num_clbits = 0
+        self.global_phase = 0.0
+        self.registers = {}
+        self._size = 0
+        self._opcodes = np.empty(capacity, dtype=np.uint8)
+        self._qubits = np.empty((capacity, 2), dtype=np.int32)
+        self._angles = np.empty((capacity, 3), dtype=np.float64)
+        self._qiskit = None
+
+    @classmethod
+    def from_qiskit(cls, circuit):
+        """
+        Record a bound Qiskit circuit as an IR.
+
+        Barriers are skipped; classical registers are kept by name.
+
+        Parameters:
+        -----------
+        circuit : QuantumCircuit
+            A circuit made of operations in `OPCODES`.
+
+        Returns:
+        --------
+        CircuitIR
+            The equivalent IR.
+
+        Raises:
+        -------
+        ValueError
+            If the circuit has unbound parameters or unsupported operations.
+        """
+        ir = cls(circuit.num_qubits, capacity=max(len(circuit.data), 1))
+        clbit_offsets = {}
+        for register in circuit.cregs:
+            bits = ir.add_register(register.name, register.size)
+            clbit_offsets.update({bit: bits.start + i for i, bit in enumerate(register)})
+        for instruction in circuit.data:
+            operation = instruction.operation
+            name = operation.name
+            if name == "barrier":
+                continue
+            if name not in _OPCODE_INDEX:
+                raise ValueError(f"Operation '{name}' cannot be recorded in a CircuitIR.")
+            if operation.is_parameterized():
+                raise ValueError("The circuit has unbound parameters.")
+            qubits = [circuit.find_bit(qubit).index for qubit in instruction.qubits]
+            if name == "measure":
+                ir.measure(qubits, [clbit_offsets[instruction.clbits[0]]])
+            else:
+                ir.append(name, qubits, [float(param) for param in operation.params] or None)
+        ir.global_phase = float(circuit.global_phase)
+        return ir
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"CircuitIR(num_qubits={self.num_qubits}, operations={self._size})"
+
+    @property
+    def opcodes(self):
+        """
+        numpy.ndarray: The opcode of every operation, an index into `OPCODES`.
+        """
+        return self._opcodes[:self._size]
+
+    @property
+    def qubits(self):
+        """
+        numpy.ndarray: The qubits of every operation, shape `(len(self), 2)`.
+        """
+        return self._qubits[:self._size]
+
+    @property
+    def angles(self):
+        """
+        numpy.ndarray: The angles of every operation, shape `(len(self), 3)`.
+        """
+        return self._angles[:self._size]
+
+    def _reserve(self, count):
+        """
+        Grow the arrays so that `count` more operations fit.
+
+        Parameters:
+        -----------
+        count : int
+            The number of operations to be appended.
+
+        Returns:
+        --------
+        None
+        """
+        needed = self._size + count
+        capacity = len(self._opcodes)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity = max(2 * capacity, 1)
+        self._opcodes = np.resize(self._opcodes, capacity)
+        self._qubits = np.resize(self._qubits, (capacity, 2))
+        self._angles = np.resize(self._angles, (capacity, 3))
+
+    def append(self, name, qubits, angles=None):
+        """
+        Record one or more operations of the same kind.
+
+        Parameters:
+        -----------
+        name : str
+            The operation, one of `OPCODES`.
+        qubits : array_like of int
+            The qubits of the operations: one index per operation for single-qubit
+            operations, or `(control, target)` pairs of shape `(count, 2)` for "cx".
+        angles : array_like of float, optional
+            The angles of the operations, shape `(count,)` for "p" and `(count, 3)`
+            for "u" (default is None, no angles).
+
+        Returns:
+        --------
+        None
+
+        Raises:
+        -------
+        ValueError
+            If the operation is unknown or a qubit index is out of range.
+        """
+        if name not in _OPCODE_INDEX:
+            raise ValueError(f"Unknown operation '{name}', expected one of {OPCODES}.")
+        arity = OPCODE_ARITY[name]
+        qubits = np.asarray(qubits, dtype=np.int32).reshape(-1, arity)
+        count = len(qubits)
+        if count == 0:
+            return
+        if qubits.min() < 0 or qubits.max() >= self.num_qubits:
+            raise ValueError(f"Qubit index out of range for a circuit with {self.num_qubits} qubits.")
+
+        self._reserve(count)
+        rows = slice(self._size, self._size + count)
+        self._opcodes[rows] = _OPCODE_INDEX[name]
+        self._qubits[rows, :arity] = qubits
+        self._qubits[rows, arity:] = -1
+        self._angles[rows] = 0.0
+        if angles is not None:
+            angles = np.asarray(angles, dtype=np.float64).reshape(count, -1)
+            self._angles[rows, :angles.shape[1]] = angles
+        self._size += count
+        self._qiskit = None
+
+    def h(self, qubit):
+        """
+        Record a Hadamard gate.
+        """
+        self.append("h", qubit)
+
+    def x(self, qubit):
+        """
+        Record an X gate.
+        """
+        self.append("x", qubit)
+
+    def p(self, theta, qubit):
+        """
+        Record phase gates; like Qiskit, a scalar angle is broadcast over a list
+        of qubits.
+        """
+        qubit = np.ravel(qubit)
+        self.append("p", qubit, np.broadcast_to(theta, len(qubit)))
+
+    def u(self, theta, phi, lam, qubit):
+        """
+        Record U gates; scalar angles are broadcast over a list of qubits.
+        """
+        qubit = np.ravel(qubit)
+        self.append("u", qubit, np.stack([np.broadcast_to(angle, len(qubit)) for angle in (theta, phi, lam)],
+                                         axis=-1))
+
+    def cx(self, control, target):
+        """
+        Record CX gates; a scalar control or target is broadcast over a list of
+        the other.
+        """
+        control, target = np.broadcast_arrays(np.ravel(control), np.ravel(target))
+        self.append("cx", np.stack([control, target], axis=-1))
+
+    def reset(self, qubits):
+        """
+        Record resets of one or more qubits.
+        """
+        self.append("reset", qubits)
+
+    def add_register(self, name, size):
+        """
+        Add a classical register.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the register.
+        size : int
+            The number of classical bits.
+
+        Returns:
+        --------
+        range
+            The classical bits of the register.
+
+        Raises:
+        -------
+        ValueError
+            If the name is already in use.
+        """
+        if name in self.registers:
+            raise ValueError(f"Register '{name}' already exists.")
+        register = range(self.num_clbits, self.num_clbits + size)
+        self.registers[name] = register
+        self.num_clbits += size
+        self._qiskit = None
+        return register
+
+    def measure(self, qubits, clbits):
+        """
+        Record measurements of qubits into classical bits.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits.
+        clbits : sequence of int
+            The classical bits, e.g. a register returned by `add_register`.
+
+        Returns:
+        --------
+        None
+
+        Raises:
+        -------
+        ValueError
+            If the numbers of qubits and classical bits differ.
+        """
+        qubits = np.asarray(qubits, dtype=np.int32).ravel()
+        clbits = np.asarray(clbits, dtype=np.int32).ravel()
+        if len(qubits) != len(clbits):
+            raise ValueError("Every measured qubit needs exactly one classical bit.")
+        start = self._size
+        self.append("measure", qubits)
+        self._qubits[start:self._size, 1] = clbits
+
+    def splice(self, start, stop, other):
+        """
+        Replace a range of operations with the operations of another IR.
+
+        Operations of equal count are overwritten in place; otherwise the
+        operations after `stop` are moved.
+
+        Parameters:
+        -----------
+        start : int
+            The first replaced operation.
+        stop : int
+            The operation after the last replaced one.
+        other : CircuitIR
+            The replacement; its classical bits and global phase are ignored.
+
+        Returns:
+        --------
+        int
+            The change in the number of operations.
+        """
+        delta = len(other) - (stop - start)
+        if delta:
+            tail = slice(stop, self._size)
+            moved = (self.opcodes[tail].copy(), self.qubits[tail].copy(), self.angles[tail].copy())
+            self._reserve(max(delta, 0))
+            new_tail = slice(stop + delta, self._size + delta)
+            self._opcodes[new_tail], self._qubits[new_tail], self._angles[new_tail] = moved
+            self._size += delta
+        rows = slice(start, start + len(other))
+        self._opcodes[rows] = other.opcodes
+        self._qubits[rows] = other.qubits
+        self._angles[rows] = other.angles
+        self._qiskit = None
+        return delta
+
+    def count_ops(self):
+        """
+        Count the operations by name.
+
+        Returns:
+        --------
+        dict of str to int
+            The number of operations of each kind, most frequent first.
+        """
+        counts = np.bincount(self.opcodes, minlength=len(OPCODES))
+        order = np.argsort(-counts, kind="stable")
+        return {OPCODES[code]: int(counts[code]) for code in order if counts[code]}
+
+    def depth(self):
+        """
+        Compute the depth of the circuit.
+
+        Every operation is placed in the earliest layer after the last operation
+        on any of its qubits.
+
+        Returns:
+        --------
+        int
+            The number of layers.
+        """
+        layers = [0] * self.num_qubits
+        cx = _OPCODE_INDEX["cx"]
+        for code, (first, second) in zip(self.opcodes.tolist(), self.qubits.tolist()):
+            if code == cx:
+                layers[first] = layers[second] = max(layers[first], layers[second]) + 1
+            else:
+                layers[first] += 1
+        return max(layers, default=0)
+
+    @profiled("ir.to_qiskit")
+    def to_qiskit(self):
+        """
+        Materialize the IR as a Qiskit circuit.
+
+        The circuit is built once and reused until further operations are
+        recorded.
+
+        Returns:
+        --------
+        QuantumCircuit
+            An equivalent Qiskit circuit with one classical register per
+            register of the IR.
+        """
+        if self._qiskit is not None and self._qiskit[0] == self.global_phase:
+            return self._qiskit[1]
+
+        from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+        from qiskit.circuit import CircuitInstruction, Measure, Reset
+        from qiskit.circuit.library import CXGate, HGate, PhaseGate, UGate, XGate
+
+        registers = [ClassicalRegister(len(bits), name=name) for name, bits in self.registers.items()]
+        circuit = QuantumCircuit(QuantumRegister(self.num_qubits, "q"), *registers)
+        circuit_qubits = circuit.qubits
+        circuit_clbits = circuit.clbits
+        constant = {"h": HGate(), "x": XGate(), "cx": CXGate(), "reset": Reset(), "measure": Measure()}
+
+        def instruction(code, qubits, angles):
+            name = OPCODES[code]
+            if name == "p":
+                return CircuitInstruction(PhaseGate(angles[0]), (circuit_qubits[qubits[0]],), ())
+            if name == "u":
+                return CircuitInstruction(UGate(*angles), (circuit_qubits[qubits[0]],), ())
+            if name == "cx":
+                return CircuitInstruction(constant[name], (circuit_qubits[qubits[0]], circuit_qubits[qubits[1]]), ())
+            if name == "measure":
+                return CircuitInstruction(constant[name], (circuit_qubits[qubits[0]],), (circuit_clbits[qubits[1]],))
+            return CircuitInstruction(constant[name], (circuit_qubits[qubits[0]],), ())
+
+        circuit.data.extend(instruction(code, qubits, angles) for code, qubits, angles
+                            in zip(self.opcodes.tolist(), self.qubits.tolist(), self.angles.tolist()))
+        circuit.global_phase = self.global_phase
+        self._qiskit = (self.global_phase, circuit)
+        return circuit
@@ -1,3 +1,6 @@
+from modul.ir import CircuitIR
+from modul.profiling import profiled
+
 class Measurement:
     """
     Handles the measurement of qubits in the main circuit.
@@ -7,23 +10,40 @@ class Measurement:
     subsystems or token systems, as well as measuring the entanglement between
     the TokenSystem and various subsystems.
 
+    Every measurement writes into its own classical register, named after the
+    label of the measurement, so the outcomes of each labeled group can be read
+    back separately (see `modul.execution.Executor`).
+
     Attributes:
     -----------
-    circuit : QuantumCircuit
+    circuit : QuantumCircuit or CircuitIR
         The quantum circuit where the measurements are performed.
+    groups : dict of str to list of int
+        The measured qubits of each labeled group, in classical bit order.
+    clbits : dict of str to list of int
+        The classical bits of each labeled group. A qubit that is reset and
+        measured again (see `Circuit.release_qubits`) appears in several
+        groups, but every group has its own classical bits.
+    verbose : bool
+        Whether every measured group is printed.
     """
 
-    def __init__(self, circuit):
+    def __init__(self, circuit, verbose=False):
         """
         Initializes the Measurement class with a given quantum circuit.
 
         Parameters:
         -----------
-        circuit : Circuit
-            The Circuit object that contains the quantum circuit where the
-            measurements will be performed.
+        circuit : Circuit, QuantumCircuit or CircuitIR
+            The Circuit object (or a bound circuit, e.g. from `CircuitTemplate.bind`)
+            that contains the quantum circuit where the measurements will be performed.
+        verbose : bool, optional
+            Whether to print every measured group (default is False).
         """
-        self.circuit = circuit.get_circuit()
+        self.circuit = circuit.get_circuit() if hasattr(circuit, "get_circuit") else circuit
+        self.verbose = verbose
+        self.groups = {}
+        self.clbits = {}
 
     def measure_subsystem(self, qubit_range, label="Subsystem"):
         """
@@ -43,11 +63,14 @@ class Measurement:
 
         Returns:
         --------
-        None
+        str
+            The label of the measured group; a numeric suffix is appended if the
+            label is already in use.
         """
-        classical_bits = range(len(qubit_range))  # Match classical bits to quantum bits
-        self.circuit.measure(qubit_range, classical_bits)
-        print(f"Measuring {label}: {qubit_range}")
+        label = self._add_group(qubit_range, label)
+        if self.verbose:
+            print(f"Measuring {label}: {qubit_range}")
+        return label
 
     def measure_entanglement(self, qubits_token, qubits_subsystem, label="Entanglement"):
         """
@@ -70,9 +93,48 @@ class Measurement:
 
         Returns:
         --------
-        None
+        str
+            The label of the measured group; a numeric suffix is appended if the
+            label is already in use.
         """
         combined_range = list(qubits_token) + list(qubits_subsystem)
-        classical_bits = range(len(combined_range))  # Match classical bits to quantum bits
-        self.circuit.measure(combined_range, classical_bits)
-        print(f"Measuring {label}: Token Qubits {qubits_token} with Subsystem Qubits {qubits_subsystem}")
+        label = self._add_group(combined_range, label)
+        if self.verbose:
+            print(f"Measuring {label}: Token Qubits {qubits_token} with Subsystem Qubits {qubits_subsystem}")
+        return label
+
+    @profiled("measurement.measure", circuit="circuit")
+    def _add_group(self, qubits, label):
+        """
+        Measure qubits into a new classical register named after the label.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The qubits to be measured.
+        label : str
+            The requested label of the group.
+
+        Returns:
+        --------
+        str
+            The unique label under which the group was recorded.
+        """
+        unique_label = label
+        suffix = 1
+        while unique_label in self.groups:
+            suffix += 1
+            unique_label = f"{label}_{suffix}"
+
+        if isinstance(self.circuit, CircuitIR):
+            register = self.circuit.add_register(unique_label, len(qubits))
+            clbits = list(register)
+        else:
+            from qiskit import ClassicalRegister
+            register = ClassicalRegister(len(qubits), name=unique_label)  # One classical bit per qubit
+            self.circuit.add_register(register)
+            clbits = [self.circuit.find_bit(bit).index for bit in register]
+        self.circuit.measure(list(qubits), register)
+        self.groups[unique_label] = list(qubits)
+        self.clbits[unique_label] = clbits
+        return unique_label
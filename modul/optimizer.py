@@ -0,0 +1,378 @@
+import numpy as np
+
+from modul.ir import OPCODES, CircuitIR
+from modul.profiling import profiled
+from modul.simulator import HADAMARD, X_MATRIX, u_matrix
+
+SINGLE_QUBIT_GATES = {"h", "x", "p", "u"}
+
+
+def gate_matrix(name, angles):
+    """
+    Compute the 2x2 unitary of a single-qubit IR gate.
+
+    Parameters:
+    -----------
+    name : str
+        One of "h", "x", "p" or "u".
+    angles : sequence of float
+        The three angle columns of the IR row.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The complex 2x2 unitary.
+    """
+    if name == "h":
+        return HADAMARD
+    if name == "x":
+        return X_MATRIX
+    if name == "p":
+        return np.diag([1, np.exp(1j * angles[0])])
+    return u_matrix(*angles)
+
+
+def matrix_to_gate(matrix, atol=1e-9):
+    """
+    Express a 2x2 unitary as the cheapest IR gate.
+
+    Parameters:
+    -----------
+    matrix : numpy.ndarray
+        The complex 2x2 unitary.
+    atol : float, optional
+        The tolerance below which an angle counts as 0 mod 2*pi (default is 1e-9).
+
+    Returns:
+    --------
+    tuple of (str or None, list of float, float)
+        The gate name ("p", "u" or None for the identity), its angles and the
+        global phase that the gate omits.
+    """
+    cos = abs(matrix[0, 0])
+    sin = abs(matrix[1, 0])
+    if sin <= atol:
+        phase = np.angle(matrix[0, 0])
+        lam = np.angle(matrix[1, 1] / matrix[0, 0])
+        if abs(lam) <= atol:
+            return None, [], phase
+        return "p", [lam], phase
+    if cos <= atol:
+        phase = np.angle(matrix[1, 0])
+        return "u", [np.pi, 0.0, np.angle(-matrix[0, 1]) - phase], phase
+    phase = np.angle(matrix[0, 0])
+    theta = 2 * np.arctan2(sin, cos)
+    return "u", [theta, np.angle(matrix[1, 0]) - phase, np.angle(-matrix[0, 1]) - phase], phase
+
+
+def simplify_fan_in(edges):
+    """
+    Rewrite a block of CX gates with shared controls into fewer gates.
+
+    In a block where no qubit is both a control and a target, all gates commute
+    and each target receives the parity of its controls. If two controls `a`
+    and `b` drive the same `K` targets, the `2K` gates are replaced by
+    `cx(b, a)`, `cx(a, t)` for every target and `cx(b, a)` again, i.e. `K + 2`
+    gates. Control pairs are merged greedily while `K >= 3`.
+
+    Parameters:
+    -----------
+    edges : numpy.ndarray
+        An integer array of shape `(E, 2)` with one `(control, target)` pair per gate.
+
+    Returns:
+    --------
+    numpy.ndarray
+        An equivalent edge list; `edges` itself if nothing could be saved.
+    """
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    controls, control_index = np.unique(edges[:, 0], return_inverse=True)
+    targets, target_index = np.unique(edges[:, 1], return_inverse=True)
+    if len(edges) < 3 or np.intersect1d(controls, targets).size:
+        return edges
+
+    # Repeated gates cancel, so the block is the parity pattern of the edges
+    pattern = np.zeros((len(targets), len(controls)), dtype=np.intp)
+    np.add.at(pattern, (target_index, control_index), 1)
+    pattern = (pattern & 1).astype(bool)
+
+    rewritten = []
+    while True:
+        shared = pattern.T.astype(np.intp) @ pattern.astype(np.intp)
+        np.fill_diagonal(shared, 0)
+        a, b = np.unravel_index(np.argmax(shared), shared.shape)
+        if shared[a, b] < 3:
+            break
+        rows = np.flatnonzero(pattern[:, a] & pattern[:, b])
+        rewritten.append((controls[b], controls[a]))
+        rewritten.extend((controls[a], targets[row]) for row in rows)
+        rewritten.append((controls[b], controls[a]))
+        pattern[rows, a] = False
+        pattern[rows, b] = False
+
+    # The remaining gates keep their original order
+    for control, target, row, column in zip(edges[:, 0], edges[:, 1], target_index, control_index):
+        if pattern[row, column]:
+            rewritten.append((control, target))
+            pattern[row, column] = False
+
+    if len(rewritten) >= len(edges):
+        return edges
+    return np.array(rewritten, dtype=np.intp).reshape(-1, 2)
+
+
+class Optimizer:
+    """
+    Gate-level optimization pass for the HDC circuits.
+
+    The pass rewrites a recorded circuit in one sweep:
+
+    - Runs of single-qubit gates on a qubit are multiplied into one unitary and
+      emitted as a single gate right before the next multi-qubit operation,
+      reset or measurement on that qubit. This merges the adjacent `tp`/`ip`
+      phase gates of the TokenSystem and fuses the Phase-Hadamard chains of
+      literal mode. Diagonal results become one P gate, and results that are the
+      identity up to a global phase (angles ~0 mod 2*pi) are dropped.
+    - A CX gate cancels an identical earlier CX if only commuting CX gates
+      (same control or same target) lie between them.
+    - Every block of CX gates is passed to `simplify_fan_in`, which
+      rewrites the Interconnect pattern of two token qubits driving the same
+      subsystem qubits with fewer gates. The rewritten gates share a control
+      and run one after another, so this lowers the CX count but may deepen
+      the circuit; disable `fan_in` where depth matters more than gate count.
+
+    Global phases are tracked, so the result is equivalent as a unitary.
+
+    Attributes:
+    -----------
+    merge_single_qubit : bool
+        Whether single-qubit chains are fused.
+    cancel_cx : bool
+        Whether duplicate CX pairs are cancelled.
+    fan_in : bool
+        Whether CX blocks are rewritten with `simplify_fan_in`.
+    atol : float
+        The tolerance for identity rotations.
+    report : dict
+        The gate counts and depth before and after the last `run`.
+    """
+
+    def __init__(self, merge_single_qubit=True, cancel_cx=True, fan_in=True, atol=1e-9):
+        """
+        Initializes the Optimizer.
+
+        Parameters:
+        -----------
+        merge_single_qubit : bool, optional
+            Whether to fuse single-qubit chains (default is True).
+        cancel_cx : bool, optional
+            Whether to cancel duplicate CX pairs (default is True).
+        fan_in : bool, optional
+            Whether to rewrite CX fan-in blocks (default is True).
+        atol : float, optional
+            The tolerance below which an angle counts as 0 mod 2*pi (default is 1e-9).
+        """
+        self.merge_single_qubit = merge_single_qubit
+        self.cancel_cx = cancel_cx
+        self.fan_in = fan_in
+        self.atol = atol
+        self.report = {}
+
+    @staticmethod
+    def statistics(ir):
+        """
+        Count the gates and compute the depth of an IR.
+
+        Parameters:
+        -----------
+        ir : CircuitIR
+            The circuit to evaluate.
+
+        Returns:
+        --------
+        dict
+            The number of gates (without resets and measurements), of CX gates,
+            and the depth.
+        """
+        counts = ir.count_ops()
+        return {
+            "gates": sum(count for name, count in counts.items() if name not in ("reset", "measure")),
+            "cx": counts.get("cx", 0),
+            "depth": ir.depth(),
+        }
+
+    @profiled("optimizer.run")
+    def run(self, circuit):
+        """
+        Optimize a circuit.
+
+        Parameters:
+        -----------
+        circuit : Circuit, CircuitIR or QuantumCircuit
+            The circuit to optimize; it is not modified. Qiskit circuits are
+            recorded with `CircuitIR.from_qiskit` first.
+
+        Returns:
+        --------
+        CircuitIR
+            The optimized circuit. The statistics are stored in `report`.
+
+        Raises:
+        -------
+        ValueError
+            If a Qiskit circuit cannot be recorded as an IR.
+        """
+        ir = circuit.get_circuit() if hasattr(circuit, "get_circuit") else circuit
+        if not isinstance(ir, CircuitIR):
+            ir = CircuitIR.from_qiskit(ir)
+
+        optimized = CircuitIR(ir.num_qubits, capacity=max(len(ir), 1))
+        for name, bits in ir.registers.items():
+            optimized.add_register(name, len(bits))
+        optimized.global_phase = ir.global_phase
+
+        operations = self._sweep(ir, optimized)
+        if self.fan_in:
+            operations = self._simplify_blocks(operations)
+        for name, qubits, angles in operations:
+            if name == "measure":
+                optimized.measure([qubits[0]], [qubits[1]])
+            else:
+                optimized.append(name, qubits, angles or None)
+
+        self.report = {"before": self.statistics(ir), "after": self.statistics(optimized)}
+        return optimized
+
+    def _sweep(self, ir, optimized):
+        """
+        Fuse single-qubit chains and cancel CX pairs.
+
+        Parameters:
+        -----------
+        ir : CircuitIR
+            The input circuit.
+        optimized : CircuitIR
+            The output circuit; receives the global phase of dropped gates.
+
+        Returns:
+        --------
+        list of tuple of (str, list of int, list of float)
+            The remaining operations in order.
+        """
+        operations = []
+        history = [[] for _ in range(ir.num_qubits)]  # Indices into `operations` per qubit
+        pending = {}
+
+        def emit(name, qubits, angles):
+            for qubit in (qubits if name == "cx" else qubits[:1]):
+                history[qubit].append(len(operations))
+            operations.append((name, qubits, angles))
+
+        def flush(qubit):
+            matrix = pending.pop(qubit, None)
+            if matrix is None:
+                return
+            name, angles, phase = matrix_to_gate(matrix, self.atol)
+            optimized.global_phase += phase
+            if name is not None:
+                emit(name, [qubit], angles)
+
+        for code, (first, second), angles in zip(ir.opcodes.tolist(), ir.qubits.tolist(), ir.angles.tolist()):
+            name = OPCODES[code]
+            if name in SINGLE_QUBIT_GATES and self.merge_single_qubit:
+                pending[first] = gate_matrix(name, angles) @ pending.get(first, np.eye(2))
+                continue
+            flush(first)
+            if name == "cx":
+                flush(second)
+                if self.cancel_cx and self._cancel(operations, history, first, second):
+                    continue
+                emit(name, [first, second], [])
+            elif name == "measure":
+                emit(name, [first, second], [])
+            else:
+                emit(name, [first], angles if name in ("p", "u") else [])
+        for qubit in sorted(pending):
+            flush(qubit)
+        return [operation for operation in operations if operation is not None]
+
+    @staticmethod
+    def _cancel(operations, history, control, target):
+        """
+        Remove an earlier CX that cancels `cx(control, target)`.
+
+        Parameters:
+        -----------
+        operations : list
+            The operations emitted so far; cancelled entries are set to None.
+        history : list of list of int
+            The indices of the operations on each qubit.
+        control : int
+            The control qubit of the new CX.
+        target : int
+            The target qubit of the new CX.
+
+        Returns:
+        --------
+        bool
+            True if an earlier CX was cancelled.
+        """
+        def candidate(qubit, role):
+            # Walk back over CX gates that commute with cx(control, target) on this qubit
+            for index in reversed(history[qubit]):
+                name, qubits, _ = operations[index]
+                if name == "cx" and qubits == [control, target]:
+                    return index
+                if name != "cx" or qubits[role] != qubit:
+                    return None
+            return None
+
+        index = candidate(control, 0)
+        if index is None or index != candidate(target, 1):
+            return False
+        operations[index] = None
+        history[control].remove(index)
+        history[target].remove(index)
+        return True
+
+    @staticmethod
+    def _simplify_blocks(operations):
+        """
+        Apply `simplify_fan_in` to every block of CX gates.
+
+        Operations on qubits that no CX of the current block has touched yet
+        commute with the block and are moved in front of it, so the fused
+        single-qubit gates emitted before the first CX on each qubit do not
+        split the Interconnect into many small blocks.
+
+        Parameters:
+        -----------
+        operations : list of tuple of (str, list of int, list of float)
+            The operations in order.
+
+        Returns:
+        --------
+        list of tuple of (str, list of int, list of float)
+            The operations with rewritten CX blocks.
+        """
+        simplified = []
+        block = []
+        block_qubits = set()
+        for operation in operations + [None]:
+            if operation is not None:
+                name, qubits, _ = operation
+                if name == "cx":
+                    block.append(qubits)
+                    block_qubits.update(qubits)
+                    continue
+                if qubits[0] not in block_qubits:
+                    simplified.append(operation)
+                    continue
+            if block:
+                simplified.extend(("cx", [int(control), int(target)], [])
+                                  for control, target in simplify_fan_in(block))
+                block = []
+                block_qubits = set()
+            if operation is not None:
+                simplified.append(operation)
+        return simplified
@@ -0,0 +1,165 @@
+import numpy as np
+
+PHASE_DTYPES = ("float64", "float16", "uint16")
+ANGLE_LEVELS = 2 ** 16
+
+
+def component_seed(seed, index):
+    """
+    Derive the seed of one component (TokenSystem or Subsystem) from a root seed.
+
+    Parameters:
+    -----------
+    seed : int
+        The root seed, e.g. the seed of an `Encoder`; taken modulo 2**64, so
+        negative seeds are valid.
+    index : int
+        The component index: 0 for the TokenSystem, `k + 1` for Subsystem `k`.
+
+    Returns:
+    --------
+    int
+        A 64-bit seed, identical on every platform and process.
+    """
+    return int(np.random.SeedSequence([int(seed) % 2 ** 64, index]).generate_state(1, dtype=np.uint64)[0])
+
+
+def random_seed():
+    """
+    Draw a seed from NumPy's global random state.
+
+    Components created without a seed use this, so `np.random.seed` still makes
+    a script reproducible, and the drawn seed is recorded on the component.
+
+    Returns:
+    --------
+    int
+        A 63-bit seed.
+    """
+    return int(np.random.randint(0, 2 ** 63 - 1, dtype=np.int64))
+
+
+def seeded_phases(seed, shape, stream=0):
+    """
+    Derive a phase matrix from a seed with the counter-based Philox generator.
+
+    The Philox key holds the seed in its low 64 bits and the stream in its high
+    64 bits, and the counter starts at 0, so the phases depend only on `seed`,
+    `stream` and `shape`. The angles are drawn on a grid of `ANGLE_LEVELS`
+    steps per turn, so storing them as "uint16" is lossless.
+
+    Parameters:
+    -----------
+    seed : int
+        The seed of the component.
+    shape : tuple of int
+        The shape of the phase matrix.
+    stream : int, optional
+        Selects one of several independent matrices per seed, e.g. 0 for the
+        `tp_matrix` and 1 for the `ip_matrix` of a TokenSystem (default is 0).
+
+    Returns:
+    --------
+    numpy.ndarray
+        A float64 matrix of phases in `[0, 2*pi)`.
+    """
+    key = (int(seed) % 2 ** 64) | (int(stream) << 64)
+    generator = np.random.Generator(np.random.Philox(key=key))
+    levels = generator.integers(0, ANGLE_LEVELS, size=shape, dtype=np.uint16)
+    return dequantize_phases(levels)
+
+
+def check_phase_dtype(phase_dtype):
+    """
+    Validate a phase storage type.
+
+    Parameters:
+    -----------
+    phase_dtype : str
+        One of "float64", "float16" or "uint16".
+
+    Raises:
+    -------
+    ValueError
+        If the storage type is unknown.
+    """
+    if phase_dtype not in PHASE_DTYPES:
+        raise ValueError(f"Unknown phase dtype '{phase_dtype}', expected one of {PHASE_DTYPES}.")
+
+
+def quantize_phases(phases, phase_dtype="uint16"):
+    """
+    Store phases compactly.
+
+    Parameters:
+    -----------
+    phases : numpy.ndarray
+        Phases in radians.
+    phase_dtype : str, optional
+        "uint16" stores each angle modulo 2*pi as one of `ANGLE_LEVELS` steps
+        (error at most pi / 2**16), "float16" stores the angle modulo 2*pi as a
+        half-precision float (error at most ~0.002), "float64" keeps the phases
+        (default is "uint16").
+
+    Returns:
+    --------
+    numpy.ndarray
+        The stored phases. Object arrays (e.g. Qiskit parameters) are returned
+        unchanged.
+
+    Raises:
+    -------
+    ValueError
+        If the storage type is unknown.
+    """
+    check_phase_dtype(phase_dtype)
+    phases = np.asarray(phases)
+    if phase_dtype == "float64" or phases.dtype == object:
+        return phases
+    turns = np.mod(phases.astype(np.float64), 2 * np.pi)
+    if phase_dtype == "float16":
+        return turns.astype(np.float16)
+    return (np.rint(turns * (ANGLE_LEVELS / (2 * np.pi))).astype(np.int64) % ANGLE_LEVELS).astype(np.uint16)
+
+
+def dequantize_phases(stored):
+    """
+    Restore phases stored by `quantize_phases`.
+
+    Parameters:
+    -----------
+    stored : numpy.ndarray
+        Phases stored as uint16 steps, float16 or float64 angles.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The phases as float64 radians; float64 and object arrays are returned
+        unchanged.
+    """
+    stored = np.asarray(stored)
+    if stored.dtype == np.uint16:
+        return stored * (2 * np.pi / ANGLE_LEVELS)
+    if stored.dtype == np.float16:
+        return stored.astype(np.float64)
+    return stored
+
+
+def stored_phases(phases, phase_dtype):
+    """
+    Compute the phases a matrix holds after storage with a given type.
+
+    Parameters:
+    -----------
+    phases : numpy.ndarray
+        Phases in radians, or phases already stored by `quantize_phases`.
+    phase_dtype : str
+        The storage type, see `quantize_phases`.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The float64 phases restored from the stored form.
+    """
+    restored = dequantize_phases(quantize_phases(dequantize_phases(phases), phase_dtype))
+    return np.asarray(restored, dtype=np.float64)
@@ -0,0 +1,213 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modul.encoder import Encoder
+
+_worker_encoder = None
+
+
+def init_worker(config):
+    """
+    Create the Encoder of a worker process once.
+
+    Used as the `initializer` of process pools that run `encode_chunk`, e.g. in
+    `Pipeline` and `EncodeService`.
+
+    Parameters:
+    -----------
+    config : dict
+        The keyword arguments returned by `Encoder.config`.
+    """
+    global _worker_encoder
+    _worker_encoder = Encoder(**config)
+
+
+def encode_chunk(words, chunk_index=0):
+    """
+    Encode one chunk of words in a worker process.
+
+    With `shots`, the sampling of each chunk is seeded from the Encoder seed
+    and `chunk_index`, so chunks are independent of each other and of the
+    worker that encodes them.
+
+    Parameters:
+    -----------
+    words : list of str
+        The words of the chunk.
+    chunk_index : int
+        The position of the chunk in the job.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The encoded vectors of the chunk.
+    """
+    if _worker_encoder.shots is None:
+        return _worker_encoder.encode_batch(words)
+    seed = [int(_worker_encoder.seed) % 2 ** 64, chunk_index]
+    return _worker_encoder.encode_batch(words, seed=seed)
+
+
+def claim_store(encoder, store):
+    """
+    Save the Encoder phases and Interconnect edges in a store, or check them
+    against the saved ones.
+
+    Parameters:
+    -----------
+    encoder : Encoder
+        The Encoder whose vectors go into the store.
+    store : VectorStore
+        The store receiving the vectors.
+
+    Raises:
+    -------
+    ValueError
+        If the store holds vectors made with different Encoder phases or edges.
+    """
+    for name, array in (("ip_matrix", encoder.ip_matrix), ("subsystem_matrices", encoder.subsystem_matrices),
+                        ("edges", encoder.edges)):
+        stored = store.load_array(name)
+        if stored is None:
+            store.save_array(name, array)
+        elif not np.array_equal(stored, array):
+            raise ValueError(f"The store was filled with a different {name}.")
+
+
+class Pipeline:
+    """
+    Encodes large word streams end to end on a process pool.
+
+    Every worker process builds its own copy of the Encoder (tokenize, bind the
+    circuit template, simulate, measure) from the configuration of the given
+    Encoder, so all workers produce identical encodings. The input is split into
+    chunks which are scheduled on the pool. At most `max_pending` chunks are in
+    flight at any time: the input iterable is only consumed as results are
+    collected, which applies backpressure to the producer. Results are returned
+    in input order.
+
+    Attributes:
+    -----------
+    encoder : Encoder
+        The Encoder whose configuration is replicated in the workers.
+    workers : int
+        The number of worker processes.
+    chunk_size : int
+        The number of words per scheduled chunk.
+    max_pending : int
+        The maximum number of chunks submitted but not yet collected.
+    """
+
+    def __init__(self, encoder, workers=None, chunk_size=256, max_pending=None):
+        """
+        Initializes the Pipeline.
+
+        Parameters:
+        -----------
+        encoder : Encoder
+            The Encoder to replicate in the worker processes.
+        workers : int, optional
+            The number of worker processes (default is the number of CPUs).
+        chunk_size : int, optional
+            The number of words per chunk (default is 256).
+        max_pending : int, optional
+            The maximum number of chunks in flight (default is twice the number
+            of workers).
+
+        Raises:
+        -------
+        ValueError
+            If one of the sizes is not positive.
+        """
+        self.encoder = encoder
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.workers
+        if min(self.workers, self.chunk_size, self.max_pending) < 1:
+            raise ValueError("Workers, chunk size and pending chunks must be at least 1.")
+
+    def encode(self, words):
+        """
+        Encode a stream of words chunk by chunk.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The words to be encoded; consumed lazily.
+
+        Yields:
+        -------
+        tuple of (list of str, numpy.ndarray)
+            The words of each chunk and their vectors of shape
+            `(len(chunk), encoder.dimension)`, in input order.
+        """
+        words = iter(words)
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                 initargs=(self.encoder.config(),)) as pool:
+            chunk_indices = itertools.count()
+            while True:
+                while len(pending) < self.max_pending:
+                    chunk = list(itertools.islice(words, self.chunk_size))
+                    if not chunk:
+                        break
+                    pending.append((chunk, pool.submit(encode_chunk, chunk, next(chunk_indices))))
+                if not pending:
+                    return
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+
+    def encode_all(self, words):
+        """
+        Encode all words and stack the vectors.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The words to be encoded.
+
+        Returns:
+        --------
+        numpy.ndarray
+            A float32 array of shape `(N, encoder.dimension)`.
+        """
+        chunks = [vectors for _, vectors in self.encode(words)]
+        if not chunks:
+            return np.empty((0, self.encoder.dimension), dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def encode_into(self, words, store):
+        """
+        Encode the words that are not in a store yet and append their vectors.
+
+        Words already present in the store are skipped, so an interrupted job
+        resumes where it stopped. The Encoder phases and edges are saved in the store on
+        the first run and must match on later runs.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The words to be encoded.
+        store : VectorStore
+            The store receiving the vectors; its rows must have the shape
+            `(encoder.dimension,)`.
+
+        Returns:
+        --------
+        int
+            The number of vectors appended to the store.
+
+        Raises:
+        -------
+        ValueError
+            If the store holds vectors made with different Encoder phases or edges.
+        """
+        claim_store(self.encoder, store)
+        appended = 0
+        for chunk, vectors in self.encode(word for word in words if word not in store):
+            appended += store.append(chunk, vectors)
+        return appended
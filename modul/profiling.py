@@ -0,0 +1,381 @@
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def _reset_peak():
+    """
+    Restart the traced memory peak at the current allocation.
+
+    Returns:
+    --------
+    int
+        The currently traced memory in bytes.
+    """
+    tracemalloc.reset_peak()
+    return tracemalloc.get_traced_memory()[0]
+
+
+class StageStats:
+    """
+    Accumulated metrics of one pipeline stage.
+
+    Attributes:
+    -----------
+    calls : int
+        The number of recorded calls.
+    seconds : float
+        The total wall time in seconds.
+    min_seconds : float
+        The shortest call.
+    max_seconds : float
+        The longest call.
+    gates : int
+        The number of operations the stage added to its circuit.
+    qubits : int
+        The number of qubits the stage allocated.
+    peak_bytes : int
+        The largest memory growth of a call over its start, if memory tracing
+        is enabled.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.min_seconds = float("inf")
+        self.max_seconds = 0.0
+        self.gates = 0
+        self.qubits = 0
+        self.peak_bytes = 0
+
+    def add(self, seconds, gates=0, qubits=0, peak_bytes=0):
+        """
+        Record one call.
+
+        Parameters:
+        -----------
+        seconds : float
+            The wall time of the call.
+        gates : int, optional
+            The number of emitted operations (default is 0).
+        qubits : int, optional
+            The number of allocated qubits (default is 0).
+        peak_bytes : int, optional
+            The memory growth of the call over its start (default is 0).
+
+        Returns:
+        --------
+        None
+        """
+        self.calls += 1
+        self.seconds += seconds
+        self.min_seconds = min(self.min_seconds, seconds)
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.gates += gates
+        self.qubits += qubits
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+
+    def to_dict(self):
+        """
+        Get the metrics as a dictionary.
+
+        Returns:
+        --------
+        dict
+            All attributes; `min_seconds` is 0 if nothing was recorded.
+        """
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "min_seconds": self.min_seconds if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+            "gates": self.gates,
+            "qubits": self.qubits,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class Profiler:
+    """
+    Opt-in per-stage instrumentation of the encode pipeline.
+
+    The classes of `modul` mark their stages with the `profiled` decorator
+    (tokenization, gate emission, `Interconnect.entangle`, measurement,
+    Qiskit materialization, simulation, execution, ...). While the profiler is
+    disabled the decorator only checks `enabled` and calls through; when
+    enabled, every call records its wall time, the growth of its circuit in
+    operations, the qubits it allocated and optionally its memory peak.
+
+    Nested stages are recorded independently, so the time of an outer stage
+    (e.g. "encoder.encode_batch") includes its inner stages. `tracemalloc` has
+    a single peak, so the memory peak of an outer stage only covers the part
+    after its last inner stage started.
+
+    Attributes:
+    -----------
+    enabled : bool
+        Whether stages are recorded.
+    memory : bool
+        Whether the memory peak of every stage is traced with `tracemalloc`.
+    stages : dict of str to StageStats
+        The metrics of every recorded stage, in first-call order.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.stages = {}
+        # Only tracing started by `enable` is stopped by `disable`
+        self._started_tracing = False
+
+    def enable(self, memory=False):
+        """
+        Start recording.
+
+        Parameters:
+        -----------
+        memory : bool, optional
+            Whether to trace memory peaks, which slows down allocations
+            considerably (default is False). `tracemalloc` is started unless it
+            is already tracing.
+
+        Returns:
+        --------
+        None
+        """
+        self.enabled = True
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def disable(self):
+        """
+        Stop recording; the collected metrics are kept. `tracemalloc` is only
+        stopped if `enable` started it.
+
+        Returns:
+        --------
+        None
+        """
+        self.enabled = False
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+        self.memory = False
+
+    def reset(self):
+        """
+        Discard all collected metrics.
+
+        Returns:
+        --------
+        None
+        """
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, circuit=None):
+        """
+        Record a block of code as a stage.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the stage.
+        circuit : QuantumCircuit or CircuitIR, optional
+            A circuit whose growth is counted as the gates of the stage
+            (default is None).
+
+        Yields:
+        -------
+        None
+        """
+        if not self.enabled:
+            yield
+            return
+        gates = len(circuit) if circuit is not None else 0
+        baseline = _reset_peak() if self.memory else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] - baseline if self.memory else 0
+            gates = len(circuit) - gates if circuit is not None else 0
+            self.stages.setdefault(name, StageStats()).add(seconds, gates=gates, peak_bytes=peak)
+
+    def record(self, name, seconds, gates=0, qubits=0, peak_bytes=0):
+        """
+        Add one call to a stage.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the stage.
+        seconds : float
+            The wall time of the call.
+        gates : int, optional
+            The number of emitted operations (default is 0).
+        qubits : int, optional
+            The number of allocated qubits (default is 0).
+        peak_bytes : int, optional
+            The memory growth of the call over its start (default is 0).
+
+        Returns:
+        --------
+        None
+        """
+        self.stages.setdefault(name, StageStats()).add(seconds, gates, qubits, peak_bytes)
+
+    def to_dict(self):
+        """
+        Get the metrics of all stages.
+
+        Returns:
+        --------
+        dict of str to dict
+            The `StageStats.to_dict` of every stage.
+        """
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+    def to_json(self, indent=2):
+        """
+        Export the metrics as JSON.
+
+        Parameters:
+        -----------
+        indent : int, optional
+            The indentation of the JSON text (default is 2).
+
+        Returns:
+        --------
+        str
+            A JSON object mapping each stage to its metrics.
+        """
+        return json.dumps({"stages": self.to_dict()}, indent=indent)
+
+    def to_openmetrics(self, prefix="lly_hdc"):
+        """
+        Export the metrics in the OpenMetrics text format.
+
+        Parameters:
+        -----------
+        prefix : str, optional
+            The prefix of all metric names (default is "lly_hdc").
+
+        Returns:
+        --------
+        str
+            One counter or gauge family per metric with one sample per stage,
+            terminated by "# EOF".
+        """
+        families = [
+            ("stage_calls", "counter", "Number of calls of the stage.", "calls", "_total"),
+            ("stage_seconds", "counter", "Wall time spent in the stage.", "seconds", "_total"),
+            ("stage_max_seconds", "gauge", "Longest call of the stage.", "max_seconds", ""),
+            ("stage_gates", "counter", "Circuit operations emitted by the stage.", "gates", "_total"),
+            ("stage_qubits", "counter", "Qubits allocated by the stage.", "qubits", "_total"),
+            ("stage_peak_bytes", "gauge", "Largest memory growth of a call of the stage.", "peak_bytes", ""),
+        ]
+        stages = self.to_dict()
+        lines = []
+        for name, kind, help_text, key, suffix in families:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"# HELP {metric} {help_text}")
+            for stage, values in stages.items():
+                label = stage.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{metric}{suffix}{{stage="{label}"}} {values[key]}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        """
+        Format a per-stage timing table, slowest stage first.
+
+        Returns:
+        --------
+        str
+            The table as text.
+        """
+        rows = sorted(self.stages.items(), key=lambda item: item[1].seconds, reverse=True)
+        width = max([len("stage")] + [len(name) for name, _ in rows])
+        lines = [f"{'stage':<{width}} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} "
+                 f"{'gates':>7} {'qubits':>6} {'peak KiB':>9}"]
+        for name, stats in rows:
+            lines.append(f"{name:<{width}} {stats.calls:>7} {stats.seconds * 1000:>10.3f} "
+                         f"{stats.seconds * 1000 / stats.calls:>9.3f} {stats.max_seconds * 1000:>9.3f} "
+                         f"{stats.gates:>7} {stats.qubits:>6} {stats.peak_bytes / 1024:>9.1f}")
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
+
+
+@contextmanager
+def profile(memory=False):
+    """
+    Enable the global profiler for a block of code.
+
+    Parameters:
+    -----------
+    memory : bool, optional
+        Whether to trace memory peaks (default is False).
+
+    Yields:
+    -------
+    Profiler
+        The global profiler; its metrics remain available after the block.
+    """
+    PROFILER.enable(memory=memory)
+    try:
+        yield PROFILER
+    finally:
+        PROFILER.disable()
+
+
+def profiled(stage, circuit=None, qubits=False):
+    """
+    Register a method or function as a pipeline stage of the global profiler.
+
+    Parameters:
+    -----------
+    stage : str
+        The name of the stage.
+    circuit : str, optional
+        The attribute of the first argument (usually `self`) holding the
+        circuit whose growth is counted as gates (default is None).
+    qubits : bool, optional
+        Whether the length of the return value is counted as allocated qubits
+        (default is False).
+
+    Returns:
+    --------
+    callable
+        A decorator; the decorated function only checks `PROFILER.enabled`
+        while the profiler is disabled.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            target = getattr(args[0], circuit) if circuit is not None else None
+            gates = len(target) if target is not None else 0
+            baseline = _reset_peak() if PROFILER.memory else 0
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] - baseline if PROFILER.memory else 0
+                gates = len(target) - gates if target is not None else 0
+                PROFILER.record(stage, seconds, gates=gates, peak_bytes=peak)
+            if qubits:
+                PROFILER.stages[stage].qubits += len(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,487 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from modul.pipeline import encode_chunk, init_worker
+
+
+def latency_summary(latencies):
+    """
+    Summarize request latencies.
+
+    Parameters:
+    -----------
+    latencies : sequence of float
+        The latencies in seconds.
+
+    Returns:
+    --------
+    dict
+        The number of requests and the mean, p50, p95, p99 and maximum latency
+        in milliseconds (0 if there are no requests).
+    """
+    if len(latencies) == 0:
+        return {"requests": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    milliseconds = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {"requests": len(milliseconds), "mean_ms": float(milliseconds.mean()), "p50_ms": float(p50),
+            "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(milliseconds.max())}
+
+
+class EncodeService:
+    """
+    Asynchronous word encoding with micro-batching.
+
+    Callers submit single words with `encode` (in-process) or over HTTP with
+    `serve`. Requests are queued and coalesced into micro-batches: a batch is
+    dispatched as soon as it holds `max_batch_size` words or `max_delay`
+    seconds after its first word arrived, whichever comes first. Batches run
+    the batched tokenizer/circuit/simulation path (`Encoder.encode_batch`) in
+    a worker pool, and at most `max_inflight` batches run at once; while they
+    do, new requests accumulate into the next, larger batch.
+
+    The two knobs trade latency for throughput: a longer `max_delay` and a
+    larger `max_batch_size` raise the throughput under load, while a short
+    `max_delay` bounds the latency an isolated request waits for company.
+    `stats` reports the latency percentiles and throughput of the recent
+    requests; `test/loadgen.py` measures them under a chosen request rate.
+
+    With `workers=0` the batches run on one thread of the serving process
+    with the given Encoder (and its caches). Otherwise every worker process
+    builds its own Encoder from `Encoder.config`, as in `Pipeline`.
+
+    If a `HypervectorProjection` is given, the encoded vectors are projected
+    into (packed binary or float32) hypervectors before they are returned.
+
+    Attributes:
+    -----------
+    encoder : Encoder
+        The Encoder that defines the encoding.
+    projection : HypervectorProjection or None
+        The projection applied to the encoded vectors.
+    max_batch_size : int
+        The largest number of words per batch.
+    max_delay : float
+        The longest time in seconds the first word of a batch waits for more words.
+    workers : int
+        The number of worker processes, 0 for a single in-process thread.
+    max_inflight : int
+        The largest number of batches encoded at once.
+    """
+
+    def __init__(self, encoder, max_batch_size=64, max_delay=0.005, workers=0, max_inflight=None,
+                 projection=None, history=10000):
+        """
+        Initializes the EncodeService; `start` must be awaited before use.
+
+        Parameters:
+        -----------
+        encoder : Encoder
+            The Encoder that defines the encoding.
+        max_batch_size : int, optional
+            The largest number of words per batch (default is 64).
+        max_delay : float, optional
+            The longest wait in seconds for a batch to fill (default is 0.005).
+        workers : int, optional
+            The number of worker processes; 0 encodes on one thread of the
+            serving process (default is 0).
+        max_inflight : int, optional
+            The largest number of batches encoded at once (default is the number
+            of workers, at least 1).
+        projection : HypervectorProjection, optional
+            The projection into hypervectors (default is None, the encoded vectors
+            are returned).
+        history : int, optional
+            The number of recent requests kept for `stats` (default is 10000).
+
+        Raises:
+        -------
+        ValueError
+            If a size is not positive, the delay is negative, or the projection
+            does not match the Encoder.
+        """
+        if min(max_batch_size, history) < 1 or workers < 0 or max_delay < 0:
+            raise ValueError("Batch size and history must be positive, workers and delay non-negative.")
+        if projection is not None and projection.input_dimension != encoder.dimension:
+            raise ValueError(f"The projection expects {projection.input_dimension} inputs, "
+                             f"the Encoder produces {encoder.dimension}.")
+        self.encoder = encoder
+        self.projection = projection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.workers = workers
+        self.max_inflight = max_inflight or max(workers, 1)
+        if self.max_inflight < 1:
+            raise ValueError("At least one batch must be allowed in flight.")
+
+        self._latencies = deque(maxlen=history)
+        self._completed = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self._queue = None
+        self._pool = None
+        self._batcher = None
+        self._inflight = None
+        self._tasks = set()
+        self._batch_indices = itertools.count()
+
+    async def start(self):
+        """
+        Start the worker pool and the batching loop.
+
+        Returns:
+        --------
+        None
+        """
+        if self._batcher is not None:
+            return
+        if self.workers:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                             initargs=(self.encoder.config(),))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=1)
+        self._queue = asyncio.Queue()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def stop(self):
+        """
+        Finish the queued requests, then stop the batching loop and the pool.
+
+        Returns:
+        --------
+        None
+        """
+        if self._batcher is None:
+            return
+        await self._queue.join()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        self._pool.shutdown()
+        self._batcher = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def encode(self, word):
+        """
+        Encode one word.
+
+        Parameters:
+        -----------
+        word : str
+            The word to be encoded.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The encoded vector, or its hypervector if a projection is set.
+
+        Raises:
+        -------
+        RuntimeError
+            If the service is not started.
+        """
+        if self._batcher is None:
+            raise RuntimeError("The EncodeService is not started.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((word, future, time.perf_counter()))
+        return await future
+
+    async def encode_many(self, words):
+        """
+        Encode several words as independent requests.
+
+        Parameters:
+        -----------
+        words : sequence of str
+            The words to be encoded.
+
+        Returns:
+        --------
+        numpy.ndarray
+            The stacked results of `encode`.
+
+        Raises:
+        -------
+        ValueError
+            If no words are given.
+        """
+        if not len(words):
+            raise ValueError("At least one word is needed.")
+        return np.stack(await asyncio.gather(*(self.encode(word) for word in words)))
+
+    async def _batch_loop(self):
+        """
+        Coalesce queued requests into batches and dispatch them.
+
+        Returns:
+        --------
+        None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                # Take what is already queued without waiting, then wait for the deadline
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            await self._inflight.acquire()
+            task = loop.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        """
+        Encode one batch in the pool and resolve its requests.
+
+        Parameters:
+        -----------
+        batch : list of tuple of (str, asyncio.Future, float)
+            The word, result future and arrival time of every request.
+
+        Returns:
+        --------
+        None
+        """
+        words = [word for word, _, _ in batch]
+        try:
+            loop = asyncio.get_running_loop()
+            if self.workers:
+                # Each batch is sampled with its own seed, whichever worker encodes it
+                vectors = await loop.run_in_executor(self._pool, encode_chunk, words, next(self._batch_indices))
+            else:
+                vectors = await loop.run_in_executor(self._pool, self.encoder.encode_batch, words)
+            if self.projection is not None:
+                vectors = self.projection.project(vectors)
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            now = time.perf_counter()
+            for (_, future, arrival), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+                self._latencies.append(now - arrival)
+                self._completed.append(now)
+            self._batch_sizes.append(len(batch))
+        finally:
+            self._inflight.release()
+            for _ in batch:
+                self._queue.task_done()
+
+    def stats(self):
+        """
+        Get the latency and throughput of the recent requests.
+
+        Returns:
+        --------
+        dict
+            `latency_summary` of the recent requests, their throughput in
+            requests per second, the mean batch size and the queue length.
+        """
+        stats = latency_summary(self._latencies)
+        span = self._completed[-1] - self._completed[0] if len(self._completed) > 1 else 0.0
+        stats["requests_per_second"] = (len(self._completed) - 1) / span if span > 0 else 0.0
+        stats["mean_batch_size"] = float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def reset_stats(self):
+        """
+        Discard the recorded latencies and batch sizes.
+
+        Returns:
+        --------
+        None
+        """
+        self._latencies.clear()
+        self._completed.clear()
+        self._batch_sizes.clear()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        """
+        Serve the encoder over HTTP until cancelled.
+
+        Endpoints:
+        ----------
+        - `POST /encode` with a JSON body `{"word": "..."}` or
+          `{"words": ["...", ...]}` returns `{"vector": [...]}` or
+          `{"vectors": [[...], ...]}`. Every word is an individual request
+          to the batcher; an empty "words" list returns no vectors. Packed
+          binary hypervectors are returned as lists of unsigned 64-bit
+          integers.
+        - `GET /stats` returns `stats` as JSON.
+
+        Connections are kept alive between requests.
+
+        Parameters:
+        -----------
+        host : str, optional
+            The interface to listen on (default is "127.0.0.1").
+        port : int, optional
+            The port to listen on; 0 picks a free port (default is 8080).
+
+        Returns:
+        --------
+        None
+        """
+        await self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def start_server(self, host="127.0.0.1", port=0):
+        """
+        Start the HTTP server in the background.
+
+        Parameters:
+        -----------
+        host : str, optional
+            The interface to listen on (default is "127.0.0.1").
+        port : int, optional
+            The port to listen on; 0 picks a free port (default is 0).
+
+        Returns:
+        --------
+        asyncio.Server
+            The listening server; close it with `close` and `wait_closed`.
+        """
+        await self.start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Answer the HTTP requests of one connection.
+
+        Parameters:
+        -----------
+        reader : asyncio.StreamReader
+            The request stream.
+        writer : asyncio.StreamWriter
+            The response stream.
+
+        Returns:
+        --------
+        None
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._respond(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_request(body):
+        """
+        Parse and validate the body of an encode request.
+
+        Parameters:
+        -----------
+        body : bytes
+            The request body.
+
+        Returns:
+        --------
+        tuple of (list of str, str)
+            The words to encode and the key of the response, "vector" for a
+            single "word" and "vectors" for a "words" list.
+
+        Raises:
+        -------
+        ValueError
+            If the body is not valid JSON, holds neither "word" nor a "words"
+            list, or if a word is not a string.
+        """
+        request = json.loads(body or b"{}")
+        if isinstance(request, dict) and isinstance(request.get("words"), list):
+            words, key = request["words"], "vectors"
+        elif isinstance(request, dict) and "word" in request:
+            words, key = [request["word"]], "vector"
+        else:
+            raise ValueError("Expected a JSON object with 'word' or a 'words' list.")
+        for word in words:
+            if not isinstance(word, str):
+                raise ValueError(f"Words must be strings, got {json.dumps(word)}.")
+        return words, key
+
+    async def _respond(self, method, path, body):
+        """
+        Dispatch one HTTP request.
+
+        Parameters:
+        -----------
+        method : str
+            The HTTP method.
+        path : str
+            The request path.
+        body : bytes
+            The request body.
+
+        Returns:
+        --------
+        tuple of (str, dict)
+            The HTTP status line and the JSON payload: "400 Bad Request" for a
+            malformed body, which is rejected before any word is queued, and
+            "500 Internal Server Error" for any failure of the encoding.
+        """
+        if method == "GET" and path == "/stats":
+            return "200 OK", self.stats()
+        if method != "POST" or path != "/encode":
+            return "404 Not Found", {"error": f"No endpoint {method} {path}."}
+        try:
+            words, key = self._parse_request(body)
+        except ValueError as error:
+            return "400 Bad Request", {"error": str(error)}
+        if not words:
+            return "200 OK", {"vectors": []}
+        try:
+            if key == "vector":
+                return "200 OK", {key: (await self.encode(words[0])).tolist()}
+            return "200 OK", {key: (await self.encode_many(words)).tolist()}
+        except Exception as error:
+            # The request was valid, so whatever the batch raised is a server-side failure
+            return "500 Internal Server Error", {"error": f"{type(error).__name__}: {error}"}
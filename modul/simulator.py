@@ -0,0 +1,556 @@
+import numpy as np
+
+from modul.ir import OPCODES, CircuitIR
+from modul.profiling import profiled
+
+HADAMARD = np.array([[1, 1], [1, -1]], dtype=np.complex128) / np.sqrt(2)
+X_MATRIX = np.array([[0, 1], [1, 0]], dtype=np.complex128)
+DIAGONAL_GATES = {"p", "rz", "z", "s", "sdg", "t", "tdg", "u1", "id"}
+FLIP_GATES = {"x", "y"}
+DIAGONAL_TWO_QUBIT_GATES = {"cz", "cp", "crz", "rzz"}
+IGNORED_OPERATIONS = {"barrier"}
+
+
+def u_matrix(theta, phi, lam):
+    """
+    Compute the 2x2 matrix of a Qiskit U gate.
+
+    Parameters:
+    -----------
+    theta, phi, lam : float
+        The angles of the U gate.
+
+    Returns:
+    --------
+    numpy.ndarray
+        The complex 2x2 unitary.
+    """
+    cos = np.cos(theta / 2)
+    sin = np.sin(theta / 2)
+    return np.array([[cos, -np.exp(1j * lam) * sin],
+                     [np.exp(1j * phi) * sin, np.exp(1j * (phi + lam)) * cos]], dtype=np.complex128)
+
+
+class BlockSimulator:
+    """
+    Exact simulator for circuits made of single-qubit layers followed by CX gates.
+
+    The HDC circuits built from `TokenSystem`, `Subsystem` and `Interconnect`
+    apply single-qubit gates to every qubit and then a fixed pattern of CX gates.
+    Before the first CX every qubit is in a product state, and a CX network only
+    permutes computational basis states. A Z-basis measurement therefore yields
+    the XOR of independent per-qubit bits: each measured qubit is the parity of
+    a few "source" bits, one per qubit of the product state.
+
+    The simulator keeps one Bernoulli probability per source bit and, per qubit,
+    the set of source bits it is the parity of. Measured qubits that share
+    source bits form small blocks (a token qubit plus the subsystem qubits it
+    drives), which are enumerated exactly. The default 50-qubit layout is
+    simulated in milliseconds without ever forming a statevector.
+
+    Only the joint distributions (`blocks`, `probabilities`) enumerate blocks,
+    and they refuse blocks with more than `max_block_sources` source bits, since
+    the enumeration grows as `2 ** sources`. With the "all_to_all" Interconnect
+    topology every Subsystem qubit depends on all token sources plus its own
+    (21 with the default layout), so these methods raise a ValueError there;
+    `marginals`, `expectations` and `sample` never enumerate and work for every
+    layout.
+
+    After a qubit took part in a CX or was measured, only gates that are
+    diagonal (e.g. P, RZ, CZ) or bit flips (X, Y) may act on it; anything else
+    raises a ValueError. All of these commute with Z-basis measurements, so a
+    measurement may happen mid-circuit: it records the parity the qubit holds
+    at that point for its classical bit. A reset starts the qubit over with a
+    new source bit, so qubits can be measured, reset and reused (e.g. by
+    `Encoder.build_sentence_circuit`); `measured` evaluates the classical bits.
+
+    A `CircuitIR` is read directly from its arrays, without creating any Qiskit
+    object.
+
+    Attributes:
+    -----------
+    circuit : QuantumCircuit or CircuitIR
+        The simulated quantum circuit.
+    num_qubits : int
+        The number of qubits in the circuit.
+    source_probabilities : numpy.ndarray
+        The probability of measuring 1 for each source bit. Sources
+        `0 .. num_qubits - 1` are the initial states of the qubits, every reset
+        adds one more.
+    parity_matrix : numpy.ndarray
+        A boolean matrix of shape `(num_qubits, num_sources)`; row `q` marks the
+        source bits whose parity is measured on qubit `q` at the end.
+    flips : numpy.ndarray
+        A boolean vector of bit flips applied to each qubit after the parity.
+    clbit_parity : numpy.ndarray
+        A boolean matrix of shape `(num_clbits, num_sources)`; row `c` marks the
+        source bits whose parity was last measured into classical bit `c`.
+    clbit_flips : numpy.ndarray
+        The bit flips of the classical bits.
+    """
+
+    @profiled("simulator.analyse")
+    def __init__(self, circuit, max_block_sources=20):
+        """
+        Initializes the BlockSimulator and analyses the given circuit.
+
+        Parameters:
+        -----------
+        circuit : Circuit, QuantumCircuit or CircuitIR
+            The circuit to simulate. Parameters must be bound.
+        max_block_sources : int, optional
+            The largest number of source bits a block may depend on before exact
+            enumeration in `blocks`/`probabilities` is refused (default is 20;
+            "all_to_all" layouts exceed it).
+
+        Raises:
+        -------
+        ValueError
+            If the circuit has unbound parameters or does not have the
+            product-state-plus-CX structure.
+        """
+        self.circuit = circuit.get_circuit() if hasattr(circuit, "get_circuit") else circuit
+        self.num_qubits = self.circuit.num_qubits
+        self.max_block_sources = max_block_sources
+        if isinstance(self.circuit, CircuitIR):
+            resets = int(np.count_nonzero(self.circuit.opcodes == OPCODES.index("reset")))
+        else:
+            resets = sum(instruction.operation.name == "reset" for instruction in self.circuit.data)
+        num_sources = self.num_qubits + resets
+
+        self._unitaries = np.tile(np.eye(2, dtype=np.complex128), (num_sources, 1, 1))
+        self._linked = np.zeros(self.num_qubits, dtype=bool)
+        self._sources = list(range(self.num_qubits))
+        self._next_source = self.num_qubits
+        self.parity_matrix = np.eye(self.num_qubits, num_sources, dtype=bool)
+        self.flips = np.zeros(self.num_qubits, dtype=bool)
+        self.clbit_parity = np.zeros((self.circuit.num_clbits, num_sources), dtype=bool)
+        self.clbit_flips = np.zeros(self.circuit.num_clbits, dtype=bool)
+        self._block_structures = {}
+        self._measured = None
+        if isinstance(self.circuit, CircuitIR):
+            self._analyse_ir()
+        else:
+            self._analyse()
+        self.source_probabilities = np.abs(self._unitaries[:, 1, 0]) ** 2
+
+    def _analyse(self):
+        """
+        Walk the circuit once and fold every gate into the simulator state.
+
+        Returns:
+        --------
+        None
+        """
+        for instruction in self.circuit.data:
+            operation = instruction.operation
+            name = operation.name
+            if name in IGNORED_OPERATIONS:
+                continue
+            if operation.is_parameterized():
+                raise ValueError("The circuit has unbound parameters.")
+            qubits = [self.circuit.find_bit(qubit).index for qubit in instruction.qubits]
+
+            if name == "measure":
+                self._measure(qubits[0], self.circuit.find_bit(instruction.clbits[0]).index)
+            elif name == "reset":
+                self._reset(qubits[0])
+            elif len(qubits) == 1:
+                if name == "h":
+                    matrix = HADAMARD
+                elif name == "u":
+                    matrix = u_matrix(*(float(param) for param in operation.params))
+                else:
+                    matrix = operation.to_matrix()
+                self._single_qubit_gate(name, matrix, qubits[0])
+            elif name == "cx":
+                self._cx(*qubits)
+            elif name == "swap":
+                self._linked[qubits] = True
+                self.parity_matrix[qubits] = self.parity_matrix[qubits[::-1]]
+                self.flips[qubits] = self.flips[qubits[::-1]]
+            elif name in DIAGONAL_TWO_QUBIT_GATES:
+                self._linked[qubits] = True
+            else:
+                raise ValueError(f"Gate '{name}' is not supported by the BlockSimulator.")
+
+    def _analyse_ir(self):
+        """
+        Walk the operations of a `CircuitIR` and fold them into the simulator state.
+
+        Returns:
+        --------
+        None
+        """
+        ir = self.circuit
+        for code, (first, second), (theta, phi, lam) in zip(ir.opcodes.tolist(), ir.qubits.tolist(),
+                                                             ir.angles.tolist()):
+            name = OPCODES[code]
+            if name in IGNORED_OPERATIONS:
+                continue
+            if name == "cx":
+                self._cx(first, second)
+            elif name == "measure":
+                self._measure(first, second)
+            elif name == "reset":
+                self._reset(first)
+            elif name == "h":
+                self._single_qubit_gate(name, HADAMARD, first)
+            elif name == "x":
+                self._single_qubit_gate(name, X_MATRIX, first)
+            elif name == "p":
+                self._single_qubit_gate(name, np.diag([1, np.exp(1j * theta)]), first)
+            elif name == "u":
+                self._single_qubit_gate(name, u_matrix(theta, phi, lam), first)
+            else:
+                raise ValueError(f"Gate '{name}' is not supported by the BlockSimulator.")
+
+    def _cx(self, control, target):
+        """
+        Apply a CX gate to the parity matrix.
+
+        Parameters:
+        -----------
+        control : int
+            The control qubit.
+        target : int
+            The target qubit.
+
+        Returns:
+        --------
+        None
+        """
+        self._linked[[control, target]] = True
+        self.parity_matrix[target] ^= self.parity_matrix[control]
+        self.flips[target] ^= self.flips[control]
+
+    def _measure(self, qubit, clbit):
+        """
+        Record a Z-basis measurement of a qubit into a classical bit.
+
+        Parameters:
+        -----------
+        qubit : int
+            The measured qubit.
+        clbit : int
+            The classical bit receiving the outcome.
+
+        Returns:
+        --------
+        None
+        """
+        self._linked[qubit] = True
+        self.clbit_parity[clbit] = self.parity_matrix[qubit]
+        self.clbit_flips[clbit] = self.flips[qubit]
+
+    def _reset(self, qubit):
+        """
+        Reset a qubit to |0>, which makes it a new, independent source bit.
+
+        Parameters:
+        -----------
+        qubit : int
+            The qubit to reset.
+
+        Returns:
+        --------
+        None
+        """
+        source = self._next_source
+        self._next_source += 1
+        self._sources[qubit] = source
+        self._linked[qubit] = False
+        self.parity_matrix[qubit] = False
+        self.parity_matrix[qubit, source] = True
+        self.flips[qubit] = False
+
+    def _single_qubit_gate(self, name, matrix, qubit):
+        """
+        Apply a single-qubit gate to the simulator state.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the gate.
+        matrix : numpy.ndarray
+            The 2x2 unitary of the gate.
+        qubit : int
+            The qubit index.
+
+        Returns:
+        --------
+        None
+        """
+        if self._linked[qubit] and name in DIAGONAL_GATES:
+            return
+        if self._linked[qubit] and name in FLIP_GATES:
+            self.flips[qubit] ^= True
+            return
+
+        if not self._linked[qubit]:
+            source = self._sources[qubit]
+            self._unitaries[source] = matrix @ self._unitaries[source]
+        elif np.allclose([matrix[0, 1], matrix[1, 0]], 0):
+            return
+        elif np.allclose([matrix[0, 0], matrix[1, 1]], 0):
+            self.flips[qubit] ^= True
+        else:
+            raise ValueError(f"Gate '{name}' on qubit {qubit} follows a CX gate and "
+                             "breaks the product-state-plus-CX structure.")
+
+    def update_product_state(self, circuit, qubits):
+        """
+        Replace the state of some qubits before the first CX gate.
+
+        The parity structure of the CX network is kept, so re-emitting the
+        single-qubit gates of one TokenSystem or Subsystem only needs this
+        update instead of a new simulator.
+
+        Parameters:
+        -----------
+        circuit : QuantumCircuit or CircuitIR
+            A circuit holding only the new single-qubit gates of `qubits`.
+        qubits : sequence of int
+            The qubits whose state is replaced.
+
+        Returns:
+        --------
+        None
+
+        Raises:
+        -------
+        ValueError
+            If the circuit contains gates on more than one qubit.
+        """
+        partial = BlockSimulator(circuit, self.max_block_sources)
+        if partial._linked.any():
+            raise ValueError("Only single-qubit gates can update the product state.")
+        qubits = np.asarray(qubits, dtype=np.intp)
+        self._unitaries[qubits] = partial._unitaries[qubits]
+        self.source_probabilities[qubits] = partial.source_probabilities[qubits]
+
+    def measured(self):
+        """
+        Get a simulator whose qubits are the classical bits of the circuit.
+
+        The returned simulator shares the source bits and evaluates, for every
+        classical bit, the parity last measured into it, including
+        measurements of qubits that were reset and reused afterwards. All
+        evaluation methods (`marginals`, `blocks`, `probabilities`, `sample`)
+        then take classical bit indices.
+
+        Returns:
+        --------
+        BlockSimulator
+            A view of the measured outcomes; unwritten classical bits are 0.
+        """
+        if self._measured is None:
+            view = object.__new__(BlockSimulator)
+            view.__dict__.update(self.__dict__)
+            view.num_qubits = len(self.clbit_parity)
+            view.parity_matrix = self.clbit_parity
+            view.flips = self.clbit_flips
+            view._linked = np.ones(view.num_qubits, dtype=bool)
+            view._block_structures = {}
+            self._measured = view
+        return self._measured
+
+    def expectations(self, qubits=None):
+        """
+        Compute the Z expectation value of each qubit.
+
+        Parameters:
+        -----------
+        qubits : sequence of int, optional
+            The qubits to evaluate (default is all qubits).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The expectation values <Z>, one per qubit.
+        """
+        qubits = np.arange(self.num_qubits) if qubits is None else np.asarray(qubits, dtype=np.intp)
+        source_z = 1 - 2 * self.source_probabilities
+        products = np.prod(np.where(self.parity_matrix[qubits], source_z, 1.0), axis=1)
+        return np.where(self.flips[qubits], -products, products)
+
+    @profiled("simulator.marginals")
+    def marginals(self, qubits=None):
+        """
+        Compute the probability of measuring 1 on each qubit.
+
+        Parameters:
+        -----------
+        qubits : sequence of int, optional
+            The qubits to evaluate (default is all qubits).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The marginal probabilities, one per qubit.
+        """
+        return (1 - self.expectations(qubits)) / 2
+
+    def blocks(self, qubits):
+        """
+        Compute the measurement distribution of a qubit set in factorized form.
+
+        Measured qubits that depend on common source bits are grouped into
+        blocks; the blocks are independent, so the joint distribution is the
+        product of the block distributions.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits, e.g. the qubit range passed to
+            `Measurement.measure_subsystem` or the token and subsystem qubits
+            passed to `Measurement.measure_entanglement`.
+
+        Returns:
+        --------
+        list of tuple of (numpy.ndarray, numpy.ndarray)
+            One `(positions, probabilities)` pair per block. `positions` indexes
+            into `qubits`, and `probabilities[i]` is the probability of the block
+            outcome whose bit `k` (least significant first) is measured on
+            `qubits[positions[k]]`.
+
+        Raises:
+        -------
+        ValueError
+            If a block depends on more than `max_block_sources` source bits.
+        """
+        blocks = []
+        for positions, sources, index in self._block_structure(qubits):
+            assignments = (np.arange(2 ** len(sources))[:, None] >> np.arange(len(sources))) & 1
+            p_one = self.source_probabilities[sources]
+            weights = np.prod(np.where(assignments == 1, p_one, 1 - p_one), axis=1)
+            blocks.append((positions, np.bincount(index, weights=weights, minlength=2 ** len(positions))))
+        return blocks
+
+    def _block_structure(self, qubits):
+        """
+        Group measured qubits into blocks and map source assignments to outcomes.
+
+        The result depends only on the CX network, so it is cached per qubit set
+        and reused when the product state changes.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits.
+
+        Returns:
+        --------
+        list of tuple of (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            Per block the positions into `qubits`, the source bits, and the block
+            outcome index of every assignment of the source bits.
+
+        Raises:
+        -------
+        ValueError
+            If a block depends on more than `max_block_sources` source bits.
+        """
+        qubits = np.asarray(qubits, dtype=np.intp)
+        key = qubits.tobytes()
+        if key in self._block_structures:
+            return self._block_structures[key]
+        rows = self.parity_matrix[qubits]
+
+        # Union-find over measured qubits that share a source bit
+        parent = np.arange(len(qubits))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for source in np.flatnonzero(rows.any(axis=0)):
+            members = np.flatnonzero(rows[:, source])
+            root = find(members[0])
+            for member in members[1:]:
+                parent[find(member)] = root
+        roots = np.array([find(i) for i in range(len(qubits))], dtype=np.intp)
+
+        structure = []
+        for root in np.unique(roots):
+            positions = np.flatnonzero(roots == root)
+            block_rows = rows[positions]
+            sources = np.flatnonzero(block_rows.any(axis=0))
+            if len(sources) > self.max_block_sources:
+                raise ValueError(f"A block depends on {len(sources)} source bits, "
+                                 f"more than the limit of {self.max_block_sources}; use `marginals` or "
+                                 "`sample`, or raise `max_block_sources`.")
+            assignments = (np.arange(2 ** len(sources))[:, None] >> np.arange(len(sources))) & 1
+            outcomes = (assignments @ block_rows[:, sources].T.astype(np.intp)) & 1
+            outcomes ^= self.flips[qubits[positions]]
+            structure.append((positions, sources, outcomes @ (1 << np.arange(len(positions)))))
+        self._block_structures[key] = structure
+        return structure
+
+    def probabilities(self, qubits, max_qubits=24):
+        """
+        Compute the full measurement distribution of a qubit set.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits.
+        max_qubits : int, optional
+            The largest number of measured qubits for which the dense
+            distribution is built (default is 24).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The probabilities of all `2 ** len(qubits)` outcomes, where bit `k`
+            of the outcome index (least significant first) is measured on
+            `qubits[k]`, matching Qiskit's bit ordering.
+
+        Raises:
+        -------
+        ValueError
+            If more than `max_qubits` qubits are measured.
+        """
+        if len(qubits) > max_qubits:
+            raise ValueError(f"Cannot build a dense distribution over {len(qubits)} qubits "
+                             f"(limit is {max_qubits}); use `blocks` instead.")
+        probabilities = np.ones(1)
+        significance = []
+        for positions, block_probabilities in self.blocks(qubits):
+            probabilities = np.outer(block_probabilities, probabilities).ravel()
+            significance.extend(positions)
+        # Bit k of the index currently belongs to qubits[significance[k]]; tensor axes
+        # run from the most significant bit down, so reorder them to follow `qubits`.
+        count = len(significance)
+        axis_of_position = {position: count - 1 - k for k, position in enumerate(significance)}
+        axes = [axis_of_position[count - 1 - i] for i in range(count)]
+        return np.transpose(probabilities.reshape((2,) * count), axes).ravel()
+
+    @profiled("simulator.sample")
+    def sample(self, qubits, shots, seed=None):
+        """
+        Sample measurement outcomes of a qubit set.
+
+        Parameters:
+        -----------
+        qubits : sequence of int
+            The measured qubits.
+        shots : int
+            The number of samples.
+        seed : int or numpy.random.Generator, optional
+            The seed or random generator used for sampling (default is None).
+
+        Returns:
+        --------
+        numpy.ndarray
+            A uint8 array of shape `(shots, len(qubits))` with one measured bit
+            per shot and qubit.
+        """
+        rng = np.random.default_rng(seed)
+        rows = self.parity_matrix[np.asarray(qubits, dtype=np.intp)]
+        sources = np.flatnonzero(rows.any(axis=0))
+        bits = rng.random((shots, len(sources))) < self.source_probabilities[sources]
+        parities = bits.astype(np.float32) @ rows[:, sources].T.astype(np.float32)
+        outcomes = parities.astype(np.intp) & 1
+        return (outcomes ^ self.flips[qubits]).astype(np.uint8)
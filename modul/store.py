@@ -0,0 +1,305 @@
+import json
+import os
+
+import numpy as np
+
+
+class VectorStore:
+    """
+    Append-only on-disk store for per-word arrays.
+
+    A VectorStore is a directory holding fixed-shape rows (e.g. encoded vectors
+    or token matrices) in a raw binary file that is read through `np.memmap`,
+    together with a word index that maps each stored word to its row. Rows are
+    only ever appended, so reads return zero-copy views and the store can grow
+    beyond the available memory.
+
+    Rows are written before their index entries. If a job is interrupted, rows
+    without an index entry are discarded when the store is opened again, and
+    `missing` tells which words still have to be processed.
+
+    Named arrays, such as the `ip_matrix` or the Subsystem phases of an
+    Encoder, can be kept next to the rows with `save_array`/`load_array`.
+
+    Files:
+    ------
+    - meta.json: the row shape and dtype.
+    - data.bin: the rows, back to back.
+    - index.jsonl: one JSON-encoded word per line, in row order.
+    - arrays/<name>.npy: the named arrays.
+
+    Attributes:
+    -----------
+    path : str
+        The directory of the store.
+    row_shape : tuple of int
+        The shape of every row.
+    dtype : numpy.dtype
+        The dtype of the rows.
+    """
+
+    def __init__(self, path, row_shape=None, dtype="float32"):
+        """
+        Opens an existing store or creates a new one.
+
+        Parameters:
+        -----------
+        path : str
+            The directory of the store.
+        row_shape : int or tuple of int, optional
+            The shape of every row. Required when creating a store; checked
+            against the stored shape when opening one (default is None).
+        dtype : str or numpy.dtype, optional
+            The dtype of new stores (default is "float32").
+
+        Raises:
+        -------
+        ValueError
+            If a new store is created without `row_shape` or with an empty
+            `row_shape`, or if `row_shape` does not match an existing store.
+        """
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            self.row_shape = tuple(meta["row_shape"])
+            self.dtype = np.dtype(meta["dtype"])
+            if row_shape is not None and tuple(np.atleast_1d(row_shape)) != self.row_shape:
+                raise ValueError(f"Store at {path} has rows of shape {self.row_shape}, "
+                                 f"not {tuple(np.atleast_1d(row_shape))}.")
+        else:
+            if row_shape is None:
+                raise ValueError("A row shape is required to create a new store.")
+            self.row_shape = tuple(int(size) for size in np.atleast_1d(row_shape))
+            if not self.row_shape or min(self.row_shape) < 1:
+                raise ValueError(f"Rows must hold at least one element, got row shape {self.row_shape}.")
+            self.dtype = np.dtype(dtype)
+            os.makedirs(os.path.join(path, "arrays"), exist_ok=True)
+            with open(meta_path, "w") as meta_file:
+                json.dump({"row_shape": list(self.row_shape), "dtype": self.dtype.str}, meta_file)
+
+        self._data_path = os.path.join(path, "data.bin")
+        self._index_path = os.path.join(path, "index.jsonl")
+        self._row_bytes = int(np.prod(self.row_shape)) * self.dtype.itemsize
+        self._words = []
+        self._rows = {}
+        self._view = None
+        self._recover()
+
+    def _recover(self):
+        """
+        Load the word index and drop rows or entries left by an interrupted write.
+
+        Returns:
+        --------
+        None
+        """
+        for path in (self._data_path, self._index_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+
+        with open(self._index_path, "rb") as index_file:
+            lines = index_file.read().split(b"\n")
+        data_rows = os.path.getsize(self._data_path) // self._row_bytes
+
+        words = []
+        for line in lines[:-1]:  # The last element is empty or an unterminated line
+            if len(words) == data_rows:
+                break
+            words.append(json.loads(line))
+
+        if len(words) != len(lines) - 1 or lines[-1]:
+            with open(self._index_path, "wb") as index_file:
+                index_file.write(b"".join(json.dumps(word).encode() + b"\n" for word in words))
+        if os.path.getsize(self._data_path) != len(words) * self._row_bytes:
+            with open(self._data_path, "r+b") as data_file:
+                data_file.truncate(len(words) * self._row_bytes)
+
+        self._words = words
+        self._rows = {word: row for row, word in enumerate(words)}
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return word in self._rows
+
+    @property
+    def words(self):
+        """
+        list of str: The stored words in row order.
+        """
+        return list(self._words)
+
+    @property
+    def vectors(self):
+        """
+        numpy.ndarray: A read-only memory-mapped view of all rows.
+        """
+        if self._view is None or len(self._view) != len(self._words):
+            if not self._words:
+                return np.empty((0,) + self.row_shape, dtype=self.dtype)
+            self._view = np.memmap(self._data_path, dtype=self.dtype, mode="r",
+                                   shape=(len(self._words),) + self.row_shape)
+        return self._view
+
+    def row(self, word):
+        """
+        Get the row index of a word.
+
+        Parameters:
+        -----------
+        word : str
+            The stored word.
+
+        Returns:
+        --------
+        int
+            The row index, or -1 if the word is not stored.
+        """
+        return self._rows.get(word, -1)
+
+    def get(self, word):
+        """
+        Read the row of a word without copying.
+
+        Parameters:
+        -----------
+        word : str
+            The stored word.
+
+        Returns:
+        --------
+        numpy.ndarray or None
+            A read-only view of the row, or None if the word is not stored.
+        """
+        row = self._rows.get(word)
+        return None if row is None else self.vectors[row]
+
+    def lookup(self, words):
+        """
+        Read the rows of many words.
+
+        Parameters:
+        -----------
+        words : sequence of str
+            The words to look up.
+
+        Returns:
+        --------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            A boolean mask marking the stored words and the rows of the stored
+            words, in the order of `words`.
+        """
+        rows = np.array([self._rows.get(word, -1) for word in words], dtype=np.intp)
+        found = rows >= 0
+        return found, self.vectors[rows[found]]
+
+    def missing(self, words):
+        """
+        Filter out words that are already stored, e.g. to resume a batch job.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The words to check.
+
+        Returns:
+        --------
+        list of str
+            The words that are not stored yet, without duplicates, in input order.
+        """
+        seen = set()
+        missing = []
+        for word in words:
+            if word not in self._rows and word not in seen:
+                seen.add(word)
+                missing.append(word)
+        return missing
+
+    def append(self, words, rows):
+        """
+        Append rows for new words.
+
+        Words that are already stored (or repeated within `words`) keep their
+        first row; their new rows are skipped.
+
+        Parameters:
+        -----------
+        words : sequence of str
+            The words of the rows.
+        rows : numpy.ndarray
+            The rows, of shape `(len(words),) + row_shape`.
+
+        Returns:
+        --------
+        int
+            The number of rows appended.
+
+        Raises:
+        -------
+        ValueError
+            If the rows do not match the store's row shape.
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.shape != (len(words),) + self.row_shape:
+            raise ValueError(f"Rows have shape {rows.shape}, expected {(len(words),) + self.row_shape}.")
+        keep = []
+        new_words = []
+        seen = set()
+        for i, word in enumerate(words):
+            if word not in self._rows and word not in seen:
+                seen.add(word)
+                keep.append(i)
+                new_words.append(word)
+        if not keep:
+            return 0
+
+        with open(self._data_path, "ab") as data_file:
+            data_file.write(np.ascontiguousarray(rows[keep]).tobytes())
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        with open(self._index_path, "ab") as index_file:
+            index_file.write(b"".join(json.dumps(word).encode() + b"\n" for word in new_words))
+
+        for word in new_words:
+            self._rows[word] = len(self._words)
+            self._words.append(word)
+        return len(new_words)
+
+    def save_array(self, name, array):
+        """
+        Store a named array next to the rows.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the array.
+        array : numpy.ndarray
+            The array to store.
+
+        Returns:
+        --------
+        None
+        """
+        np.save(os.path.join(self.path, "arrays", f"{name}.npy"), np.asarray(array))
+
+    def load_array(self, name):
+        """
+        Load a named array as a read-only memory map.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the array.
+
+        Returns:
+        --------
+        numpy.ndarray or None
+            The array, or None if no array with this name is stored.
+        """
+        path = os.path.join(self.path, "arrays", f"{name}.npy")
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode="r")
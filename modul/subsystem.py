@@ -1,4 +1,6 @@
-import numpy as np
+from modul.gates import append_phase_chains, check_gate_mode
+from modul.phases import check_phase_dtype, dequantize_phases, quantize_phases, random_seed, seeded_phases
+from modul.profiling import profiled
 
 class Subsystem:
     """
@@ -7,7 +9,9 @@ class Subsystem:
     This class is responsible for managing a specific set of qubits within the
     main quantum circuit and applying a sequence of quantum operations to them.
     Each subsystem has a specific number of qubits allocated to it, and these
-    qubits undergo a predefined sequence of operations.
+    qubits undergo a predefined sequence of operations. Unless it is assigned,
+    the phase matrix is derived on first use from `seed` like the matrices of
+    the `TokenSystem`.
 
     Attributes:
     -----------
@@ -18,12 +22,16 @@ class Subsystem:
     circuit : QuantumCircuit
         The quantum circuit where the operations are applied.
     tp_matrix : numpy.ndarray
-        A matrix of randomly generated phase values (in radians) for the operations.
+        A matrix of phase values (in radians) for the operations.
         Each row corresponds to a qubit, and each column corresponds to a phase
         in the sequence of operations.
+    seed : int
+        The seed the default phase matrix is derived from.
+    phase_dtype : str
+        The storage type of the phase matrix: "float64", "float16" or "uint16".
     """
 
-    def __init__(self, circuit, num_qubits=10):
+    def __init__(self, circuit, num_qubits=10, name=None, seed=None, phase_dtype="float64"):
         """
         Initializes the Subsystem with a given circuit and number of qubits.
 
@@ -34,13 +42,41 @@ class Subsystem:
 
         num_qubits : int, optional
             The number of qubits to allocate to this subsystem (default is 10).
+
+        name : str, optional
+            A region name for the allocated qubits (default is None).
+
+        seed : int, optional
+            The seed of the phase matrix (default is None, drawn from NumPy's
+            global random state).
+
+        phase_dtype : str, optional
+            The storage type of the phase matrix (default is "float64").
         """
+        check_phase_dtype(phase_dtype)
         self.num_qubits = num_qubits
-        self.qubit_range = list(circuit.allocate_qubits(num_qubits))  # Allocate qubits for this subsystem
+        self.qubit_range = list(circuit.allocate_qubits(num_qubits, name=name))  # Allocate qubits for this subsystem
         self.circuit = circuit.get_circuit()
-        self.tp_matrix = np.random.rand(num_qubits, 3) * 2 * np.pi  # 3 columns for phases, num_qubits rows for qubits
+        self.seed = random_seed() if seed is None else seed
+        self.phase_dtype = phase_dtype
+        self._tp_matrix = None
+
+    @property
+    def tp_matrix(self):
+        """
+        numpy.ndarray: The phases, derived from `seed` unless assigned.
+        """
+        if self._tp_matrix is None:
+            # 3 columns for phases, num_qubits rows for qubits
+            self._tp_matrix = quantize_phases(seeded_phases(self.seed, (self.num_qubits, 3)), self.phase_dtype)
+        return dequantize_phases(self._tp_matrix)
 
-    def apply_operations(self):
+    @tp_matrix.setter
+    def tp_matrix(self, matrix):
+        self._tp_matrix = quantize_phases(matrix, self.phase_dtype)
+
+    @profiled("subsystem.apply_operations", circuit="circuit")
+    def apply_operations(self, gate_mode="literal"):
         """
         Apply subsystem operations to the allocated qubits.
 
@@ -55,14 +91,30 @@ class Subsystem:
 
         The sequence is repeated twice for each qubit, followed by a final phase.
 
+        In "fused" mode each qubit's sequence is emitted as a single U gate, built
+        for all qubits at once and appended in one batched operation.
+
+        Parameters:
+        -----------
+        gate_mode : str, optional
+            Either "literal" to emit every P and H gate or "fused" to emit one U gate
+            per qubit (default is "literal").
+
         Returns:
         --------
         None
         """
+        check_gate_mode(gate_mode)
+        tp_matrix = self.tp_matrix
+        if gate_mode == "fused":
+            append_phase_chains(self.circuit, self.qubit_range,
+                                tp_matrix[:, 0], tp_matrix[:, 1], tp_matrix[:, 2])
+            return
+
         for i, qubit in enumerate(self.qubit_range):  # Correct mapping of qubits
             # Apply Phase-Hadamard-Phase-Hadamard-Phase sequence
-            self.circuit.p(self.tp_matrix[i, 0], qubit)  # First Phase
-            self.circuit.h(qubit)                        # First Hadamard
-            self.circuit.p(self.tp_matrix[i, 1], qubit)  # Second Phase
-            self.circuit.h(qubit)                        # Second Hadamard
-            self.circuit.p(self.tp_matrix[i, 2], qubit)  # Third Phase
+            self.circuit.p(tp_matrix[i, 0], qubit)  # First Phase
+            self.circuit.h(qubit)                   # First Hadamard
+            self.circuit.p(tp_matrix[i, 1], qubit)  # Second Phase
+            self.circuit.h(qubit)                   # Second Hadamard
+            self.circuit.p(tp_matrix[i, 2], qubit)  # Third Phase
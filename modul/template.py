@@ -0,0 +1,205 @@
+import numpy as np
+from qiskit import transpile
+from qiskit.circuit import ParameterVector
+
+from modul.circuit import Circuit
+from modul.interconnect import Interconnect
+from modul.profiling import profiled
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+class CircuitTemplate:
+    """
+    A parameterized main circuit that is built once and rebound per token.
+
+    The template allocates the TokenSystem, the Subsystems and the Interconnect
+    exactly like `main.py`, but every entry of the `tp_matrix`/`ip_matrix` of the
+    TokenSystem and of each Subsystem `tp_matrix` is a Qiskit `Parameter`. The
+    structure is (optionally) transpiled once, and executable circuits are then
+    produced by parameter binding only.
+
+    Attributes:
+    -----------
+    main_qubits : int
+        The number of qubits assigned to the TokenSystem.
+    subsystem_qubits : int
+        The number of qubits assigned to each Subsystem.
+    subsystems_count : int
+        The number of Subsystems.
+    circuit : Circuit
+        The Circuit object holding the parameterized structure.
+    token_system : TokenSystem
+        The TokenSystem whose matrices hold `tp` and `ip` parameters.
+    subsystems : list of Subsystem
+        The Subsystems whose `tp_matrix` hold `sub<k>` parameters.
+    ip_matrix : numpy.ndarray
+        The default `ip_matrix` values used when `bind` is called without one.
+    interconnect : Interconnect
+        The Interconnect that entangled the TokenSystem with the Subsystems.
+    subsystem_matrices : numpy.ndarray
+        The default Subsystem phases of shape `(subsystems_count, subsystem_qubits, 3)`
+        used when `bind` is called without them.
+    compiled : QuantumCircuit
+        The (transpiled) parameterized circuit that is bound per token.
+    """
+
+    def __init__(self, total_qubits=50, main_qubits=20, subsystem_qubits=10, subsystems_count=3,
+                 gate_mode="fused", transpile_options=None, interconnect_options=None):
+        """
+        Builds the parameterized structure and compiles it once.
+
+        Parameters:
+        -----------
+        total_qubits : int, optional
+            The total number of qubits in the circuit (default is 50).
+        main_qubits : int, optional
+            The number of qubits assigned to the TokenSystem (default is 20).
+        subsystem_qubits : int, optional
+            The number of qubits assigned to each Subsystem (default is 10).
+        subsystems_count : int, optional
+            The number of Subsystems (default is 3).
+        gate_mode : str, optional
+            The gate emission mode passed to `apply_operations` (default is "fused").
+        transpile_options : dict, optional
+            Keyword arguments for `qiskit.transpile`, e.g. `{"basis_gates": ["u", "cx"]}`.
+            If None, the structure is used without transpilation (default is None).
+            The "fused" structure already consists of U and CX gates only, which
+            the `BlockSimulator` and Aer execute as they are, so transpiling is
+            only worth its cost for a specific backend target.
+        interconnect_options : dict, optional
+            Keyword arguments for `Interconnect`, e.g. `{"topology": "ring"}`
+            (default is None, the "fold" topology).
+        """
+        self.main_qubits = main_qubits
+        self.subsystem_qubits = subsystem_qubits
+        self.subsystems_count = subsystems_count
+        self.circuit = Circuit(total_qubits)
+
+        self.token_system = TokenSystem(self.circuit, num_qubits=main_qubits)
+        self.ip_matrix = self.token_system.ip_matrix
+        tp_parameters = ParameterVector("tp", 3 * main_qubits)
+        ip_parameters = ParameterVector("ip", 3 * main_qubits)
+        self.token_system.tp_matrix = np.array(tp_parameters, dtype=object).reshape(3, main_qubits)
+        self.token_system.ip_matrix = np.array(ip_parameters, dtype=object).reshape(3, main_qubits)
+        self.token_system.apply_operations(gate_mode)
+        parameters = list(tp_parameters) + list(ip_parameters)
+
+        self.subsystems = []
+        subsystem_matrices = []
+        for k in range(subsystems_count):
+            subsystem = Subsystem(self.circuit, num_qubits=subsystem_qubits)
+            subsystem_matrices.append(subsystem.tp_matrix)
+            sub_parameters = ParameterVector(f"sub{k}", subsystem_qubits * 3)
+            subsystem.tp_matrix = np.array(sub_parameters, dtype=object).reshape(subsystem_qubits, 3)
+            subsystem.apply_operations(gate_mode)
+            self.subsystems.append(subsystem)
+            parameters.extend(sub_parameters)
+        self.subsystem_matrices = np.array(subsystem_matrices).reshape(subsystems_count, subsystem_qubits, 3)
+
+        self.interconnect = Interconnect(self.circuit, **(interconnect_options or {}))
+        self.interconnect.entangle(self.token_system.qubit_range,
+                                   [subsystem.qubit_range for subsystem in self.subsystems])
+
+        structure = self.circuit.get_circuit()
+        if transpile_options is not None:
+            structure = transpile(structure, **transpile_options)
+        self.compiled = structure
+
+        # Position of every circuit parameter in the flat value layout of `values`
+        flat_index = {parameter: i for i, parameter in enumerate(parameters)}
+        self._positions = np.array([flat_index[parameter] for parameter in self.compiled.parameters],
+                                   dtype=np.intp)
+
+    def values(self, tokens, subsystem_matrices=None, ip_matrix=None):
+        """
+        Flatten token matrices and phases into parameter values.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)` as returned by
+            `Tokenizer.tokenize_batch`.
+        subsystem_matrices : numpy.ndarray, optional
+            The Subsystem phases of shape `(subsystems_count, subsystem_qubits, 3)`
+            (default is the template's `subsystem_matrices`).
+        ip_matrix : numpy.ndarray, optional
+            The `ip_matrix` of shape `(3, main_qubits)` (default is the template's
+            `ip_matrix`).
+
+        Returns:
+        --------
+        numpy.ndarray
+            Parameter values of shape `(N, num_parameters)`, ordered like
+            `compiled.parameters`.
+
+        Raises:
+        -------
+        ValueError
+            If a token has fewer characters than the TokenSystem has qubits.
+        """
+        tokens = np.asarray(tokens, dtype=np.float64)
+        if tokens.shape[1] < self.main_qubits:
+            raise ValueError(f"Tokens have {tokens.shape[1]} characters, "
+                             f"but the TokenSystem has {self.main_qubits} qubits.")
+        if subsystem_matrices is None:
+            subsystem_matrices = self.subsystem_matrices
+        if ip_matrix is None:
+            ip_matrix = self.ip_matrix
+        subsystem_matrices = np.asarray(subsystem_matrices, dtype=np.float64).reshape(
+            self.subsystems_count, self.subsystem_qubits, 3)
+
+        count = tokens.shape[0]
+        # Wie in main.py: tp_matrix = tokens.T[:3, :main_qubits]
+        tp_values = tokens[:, :self.main_qubits, :3].transpose(0, 2, 1).reshape(count, -1)
+        ip_values = np.broadcast_to(np.asarray(ip_matrix, dtype=np.float64).ravel(),
+                                    (count, 3 * self.main_qubits))
+        sub_values = np.broadcast_to(subsystem_matrices.ravel(), (count, subsystem_matrices.size))
+        flat = np.concatenate([tp_values, ip_values, sub_values], axis=1)[:, self._positions]
+        return flat
+
+    def bind(self, tokens, subsystem_matrices=None, ip_matrix=None):
+        """
+        Produce an executable circuit for a single token.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray or list of tuple of float
+            The token matrix of shape `(token_length, 3)` as returned by `Tokenizer.tokenize`.
+        subsystem_matrices : numpy.ndarray, optional
+            The Subsystem phases (default is the template's `subsystem_matrices`).
+        ip_matrix : numpy.ndarray, optional
+            The `ip_matrix` of the TokenSystem (default is the template's `ip_matrix`).
+
+        Returns:
+        --------
+        QuantumCircuit
+            A copy of the compiled circuit with all parameters bound.
+        """
+        values = self.values(np.asarray(tokens)[None], subsystem_matrices, ip_matrix)[0]
+        return self.compiled.assign_parameters(values, inplace=False)
+
+    @profiled("template.bind_batch")
+    def bind_batch(self, tokens, subsystem_matrices=None, ip_matrix=None):
+        """
+        Produce executable circuits for many tokens at once.
+
+        The parameter values of all tokens are assembled in one vectorized step
+        before the compiled circuit is bound once per token.
+
+        Parameters:
+        -----------
+        tokens : numpy.ndarray
+            Token matrices of shape `(N, token_length, 3)`.
+        subsystem_matrices : numpy.ndarray, optional
+            The Subsystem phases (default is the template's `subsystem_matrices`).
+        ip_matrix : numpy.ndarray, optional
+            The `ip_matrix` of the TokenSystem (default is the template's `ip_matrix`).
+
+        Returns:
+        --------
+        list of QuantumCircuit
+            One bound circuit per token.
+        """
+        values = self.values(tokens, subsystem_matrices, ip_matrix)
+        return [self.compiled.assign_parameters(row, inplace=False) for row in values]
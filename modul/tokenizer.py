@@ -1,4 +1,7 @@
 import string
+import numpy as np
+
+from modul.profiling import profiled
 
 class Tokenizer:
     """
@@ -28,6 +31,7 @@ class Tokenizer:
         self.token_length = 20
         self.float_components = 3
 
+    @profiled("tokenizer.tokenize")
     def tokenize(self, word):
         """
         Converts a word into a token, represented by a list of tuples.
@@ -56,6 +60,82 @@ class Tokenizer:
 
         return token
 
+    @profiled("tokenizer.tokenize_batch")
+    def tokenize_batch(self, words, out=None):
+        """
+        Converts many words into tokens in a single vectorized pass.
+
+        All words are truncated or padded with `prepare_word` and encoded at once
+        into a float array of shape `(N, token_length, float_components)`. Row `n`
+        holds the same values as `tokenize(words[n])`.
+
+        Parameters:
+        -----------
+        words : sequence of str
+            The words to be tokenized.
+        out : numpy.ndarray, optional
+            A preallocated float array of shape `(N, token_length, float_components)`
+            that receives the result (default is None, a new array is allocated).
+
+        Returns:
+        --------
+        numpy.ndarray
+            The token matrices of all words, stacked along the first axis.
+        """
+        words = [self.prepare_word(word) for word in words]
+        shape = (len(words), self.token_length, self.float_components)
+        if out is None:
+            out = np.empty(shape, dtype=np.float64)
+        elif out.shape != shape:
+            raise ValueError(f"Output array has shape {out.shape}, expected {shape}.")
+        if not words:
+            return out
+
+        # Codepoints der vorbereiteten Wörter als (N, token_length) Matrix
+        codes = np.array(words, dtype=f"<U{self.token_length}").view(np.uint32)
+        codes = codes.reshape(len(words), self.token_length)
+
+        # Erstes Vorkommen jedes Zeichens im Wort (entspricht `word.index(char)`)
+        first_index = np.argmax(codes[:, :, None] == codes[:, None, :], axis=2)
+
+        common_letter_value = ord('E') / 255.0
+        np.divide(codes, 255.0, out=out[:, :, 0])
+        np.divide(first_index, self.token_length, out=out[:, :, 1])
+        np.divide(out[:, :, 0], common_letter_value, out=out[:, :, 2])
+        return out
+
+    def iter_token_batches(self, words, batch_size=1024):
+        """
+        Tokenizes a stream of words in fixed-size chunks.
+
+        The iterable is consumed lazily, so the full corpus never has to be held
+        in memory. Each chunk is encoded with `tokenize_batch`.
+
+        Parameters:
+        -----------
+        words : iterable of str
+            The words to be tokenized.
+        batch_size : int, optional
+            The number of words per chunk (default is 1024). The last chunk may
+            be smaller.
+
+        Yields:
+        -------
+        tuple of (list of str, numpy.ndarray)
+            The words of the chunk and their token matrices of shape
+            `(len(chunk), token_length, float_components)`.
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1.")
+        chunk = []
+        for word in words:
+            chunk.append(word)
+            if len(chunk) == batch_size:
+                yield chunk, self.tokenize_batch(chunk)
+                chunk = []
+        if chunk:
+            yield chunk, self.tokenize_batch(chunk)
+
     def prepare_word(self, word):
         """
         Adjusts the word to ensure it meets the required token length.
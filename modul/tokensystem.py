@@ -1,4 +1,7 @@
 import numpy as np
+from modul.gates import append_phase_chains, check_gate_mode
+from modul.phases import check_phase_dtype, dequantize_phases, quantize_phases, random_seed, seeded_phases
+from modul.profiling import profiled
 
 class TokenSystem:
     """
@@ -7,7 +10,12 @@ class TokenSystem:
     This class is responsible for managing a specific set of qubits within the
     main quantum circuit and applying a sequence of quantum operations to them.
     The TokenSystem is initialized with a given number of qubits and applies a
-    predefined sequence of operations using two randomly generated phase matrices.
+    predefined sequence of operations using two phase matrices. Unless they are
+    assigned, the matrices are derived on first use from `seed` with a
+    counter-based generator (see `modul.phases.seeded_phases`), so the same seed
+    gives the same phases in every process. With `phase_dtype` "uint16" or
+    "float16" the matrices are stored quantized and restored as float64 when
+    read.
 
     Attributes:
     -----------
@@ -18,14 +26,18 @@ class TokenSystem:
     circuit : QuantumCircuit
         The quantum circuit where the operations are applied.
     tp_matrix : numpy.ndarray
-        A matrix of randomly generated phase values (in radians) for the token operations.
+        A matrix of phase values (in radians) for the token operations.
         The matrix has 3 rows (one for each phase operation) and `num_qubits` columns.
     ip_matrix : numpy.ndarray
-        A matrix of randomly generated phase values (in radians) for the additional operations.
+        A matrix of phase values (in radians) for the additional operations.
         The matrix has 3 rows (one for each phase operation) and `num_qubits` columns.
+    seed : int
+        The seed the default phase matrices are derived from.
+    phase_dtype : str
+        The storage type of the phase matrices: "float64", "float16" or "uint16".
     """
 
-    def __init__(self, circuit, num_qubits=20):
+    def __init__(self, circuit, num_qubits=20, name=None, seed=None, phase_dtype="float64"):
         """
         Initializes the TokenSystem with a given circuit and number of qubits.
 
@@ -35,14 +47,53 @@ class TokenSystem:
             The Circuit object that manages the quantum circuit and qubit allocation.
         num_qubits : int, optional
             The number of qubits to allocate to this token system (default is 20).
+        name : str, optional
+            A region name for the allocated qubits (default is None).
+        seed : int, optional
+            The seed of the phase matrices (default is None, drawn from NumPy's
+            global random state).
+        phase_dtype : str, optional
+            The storage type of the phase matrices (default is "float64").
         """
+        check_phase_dtype(phase_dtype)
         self.num_qubits = num_qubits
-        self.qubit_range = circuit.allocate_qubits(num_qubits)
+        self.qubit_range = circuit.allocate_qubits(num_qubits, name=name)
         self.circuit = circuit.get_circuit()
-        self.tp_matrix = np.random.rand(3, num_qubits) * 2 * np.pi
-        self.ip_matrix = np.random.rand(3, num_qubits) * 2 * np.pi
+        self.seed = random_seed() if seed is None else seed
+        self.phase_dtype = phase_dtype
+        self._tp_matrix = None
+        self._ip_matrix = None
 
-    def apply_operations(self):
+    @property
+    def tp_matrix(self):
+        """
+        numpy.ndarray: The token phases, derived from `seed` unless assigned.
+        """
+        if self._tp_matrix is None:
+            self._tp_matrix = quantize_phases(seeded_phases(self.seed, (3, self.num_qubits), stream=0),
+                                              self.phase_dtype)
+        return dequantize_phases(self._tp_matrix)
+
+    @tp_matrix.setter
+    def tp_matrix(self, matrix):
+        self._tp_matrix = quantize_phases(matrix, self.phase_dtype)
+
+    @property
+    def ip_matrix(self):
+        """
+        numpy.ndarray: The additional phases, derived from `seed` unless assigned.
+        """
+        if self._ip_matrix is None:
+            self._ip_matrix = quantize_phases(seeded_phases(self.seed, (3, self.num_qubits), stream=1),
+                                              self.phase_dtype)
+        return dequantize_phases(self._ip_matrix)
+
+    @ip_matrix.setter
+    def ip_matrix(self, matrix):
+        self._ip_matrix = quantize_phases(matrix, self.phase_dtype)
+
+    @profiled("token_system.apply_operations", circuit="circuit")
+    def apply_operations(self, gate_mode="literal"):
         """
         Apply token operations to the allocated qubits.
 
@@ -58,13 +109,32 @@ class TokenSystem:
         The sequence is repeated three times for each qubit, with the Hadamard gate applied
         after the first two iterations.
 
+        In "fused" mode the adjacent phase gates are merged and each qubit's chain is
+        emitted as a single U gate, built for all qubits at once and appended in one
+        batched operation. The resulting circuit is equivalent to the "literal" one.
+
+        Parameters:
+        -----------
+        gate_mode : str, optional
+            Either "literal" to emit every P and H gate or "fused" to emit one U gate
+            per qubit (default is "literal").
+
         Returns:
         --------
         None
         """
-        for qubit in self.qubit_range:
+        check_gate_mode(gate_mode)
+        tp_matrix = self.tp_matrix
+        ip_matrix = self.ip_matrix
+        if gate_mode == "fused":
+            columns = np.arange(self.num_qubits)
+            phases = tp_matrix[:, columns] + ip_matrix[:, columns]
+            append_phase_chains(self.circuit, self.qubit_range, phases[0], phases[1], phases[2])
+            return
+
+        for j, qubit in enumerate(self.qubit_range):
             for i in range(3):
-                self.circuit.p(self.tp_matrix[i, qubit], qubit)
-                self.circuit.p(self.ip_matrix[i, qubit], qubit)
+                self.circuit.p(tp_matrix[i, j], qubit)
+                self.circuit.p(ip_matrix[i, j], qubit)
                 if i < 2:
                     self.circuit.h(qubit)
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for tokenization, circuit construction and execution.
+
+Every stage of the encoding path is timed and memory-profiled over a sweep of
+circuit layouts and batch sizes. The results are written as JSON so that they
+can be kept as a baseline and compared against later runs. `baseline.json`
+next to this script holds the default sweep, with the machine it ran on:
+
+    python test/benchmark.py --output test/baseline.json
+    python test/benchmark.py --compare test/baseline.json --threshold 1.25
+
+Layouts that an operation consumes are built outside the timed region, so
+only the operation itself is timed.
+
+With `--compare`, the script exits with status 1 if any case got slower than
+`threshold` times its baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from modul.circuit import Circuit
+from modul.encoder import Encoder
+from modul.execution import Executor
+from modul.gradient import GradientEngine
+from modul.incremental import IncrementalCircuit
+from modul.interconnect import Interconnect
+from modul.measurement import Measurement
+from modul.optimizer import Optimizer
+from modul.subsystem import Subsystem
+from modul.tokenizer import Tokenizer
+from modul.tokensystem import TokenSystem
+
+
+def make_words(count, seed=0):
+    """
+    Generate random upper-case words of 3 to 15 characters.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    return ["".join(rng.choice(letters, size=rng.integers(3, 16))) for _ in range(count)]
+
+
+def build_layout(params):
+    """
+    Allocate a TokenSystem and Subsystems on a new Circuit.
+    """
+    circuit = Circuit(params["total_qubits"])
+    token_system = TokenSystem(circuit, num_qubits=params["main_qubits"])
+    subsystems = [Subsystem(circuit, num_qubits=params["subsystem_qubits"])
+                  for _ in range(params["subsystems_count"])]
+    return circuit, token_system, subsystems
+
+
+def case_tokenize(params, words):
+    tokenizer = Tokenizer()
+    return lambda: [tokenizer.tokenize(word) for word in words]
+
+
+def case_tokenize_batch(params, words):
+    tokenizer = Tokenizer()
+    return lambda: tokenizer.tokenize_batch(words)
+
+
+def case_token_system(params, words, gate_mode):
+    def run(layouts):
+        for _, token_system, _ in layouts:
+            token_system.apply_operations(gate_mode)
+    return lambda: [build_layout(params) for _ in words], run
+
+
+def case_subsystem(params, words, gate_mode):
+    def run(layouts):
+        for _, _, subsystems in layouts:
+            for subsystem in subsystems:
+                subsystem.apply_operations(gate_mode)
+    return lambda: [build_layout(params) for _ in words], run
+
+
+def case_interconnect(params, words):
+    def run(layouts):
+        for circuit, token_system, subsystems in layouts:
+            Interconnect(circuit).entangle(token_system.qubit_range,
+                                           [subsystem.qubit_range for subsystem in subsystems])
+    return lambda: [build_layout(params) for _ in words], run
+
+
+def case_execution(params, words):
+    measurements = []
+    for _ in words:
+        circuit, token_system, subsystems = build_layout(params)
+        token_system.apply_operations("fused")
+        for subsystem in subsystems:
+            subsystem.apply_operations("fused")
+        Interconnect(circuit).entangle(token_system.qubit_range,
+                                       [subsystem.qubit_range for subsystem in subsystems])
+        measurement = Measurement(circuit)
+        measurement.measure_subsystem(token_system.qubit_range, label="TokenSystem")
+        for subsystem in subsystems:
+            measurement.measure_subsystem(subsystem.qubit_range)
+        measurements.append(measurement)
+    executor = Executor(shots=1024, seed=0)
+    return lambda: executor.run(measurements)
+
+
+def case_optimizer(params, words):
+    circuits = []
+    for _ in words:
+        circuit = Circuit(params["total_qubits"], ir=True)
+        token_system = TokenSystem(circuit, num_qubits=params["main_qubits"])
+        subsystems = [Subsystem(circuit, num_qubits=params["subsystem_qubits"])
+                      for _ in range(params["subsystems_count"])]
+        token_system.apply_operations("literal")
+        for subsystem in subsystems:
+            subsystem.apply_operations("literal")
+        Interconnect(circuit).entangle(token_system.qubit_range,
+                                       [subsystem.qubit_range for subsystem in subsystems])
+        circuits.append(circuit)
+    optimizer = Optimizer()
+    return lambda: [optimizer.run(circuit) for circuit in circuits]
+
+
+def case_incremental(params, words):
+    incremental = IncrementalCircuit(params["total_qubits"], params["main_qubits"], params["subsystem_qubits"],
+                                     params["subsystems_count"])
+    rng = np.random.default_rng(0)
+    shape = np.shape(incremental.subsystems[-1].tp_matrix)
+    matrices = [rng.uniform(0, 2 * np.pi, shape) for _ in words]
+    name = f"Subsystem{params['subsystems_count']}"
+
+    def run():
+        for matrix in matrices:
+            incremental.update(name, tp_matrix=matrix)
+            incremental.marginals()
+    return run
+
+
+def case_gradient(params, words, method="adjoint"):
+    encoder = Encoder(params["total_qubits"], params["main_qubits"], params["subsystem_qubits"],
+                      params["subsystems_count"], seed=0, cache_size=0)
+    engine = GradientEngine(encoder, method=method)
+    tokens = encoder.tokenizer.tokenize_batch(words)
+    grad_output = np.ones((len(words), encoder.dimension))
+    return lambda: engine.backward(tokens, grad_output)
+
+
+def case_encoder(params, words, ir=True):
+    encoder = Encoder(params["total_qubits"], params["main_qubits"], params["subsystem_qubits"],
+                      params["subsystems_count"], seed=0, cache_size=0, ir=ir)
+    return lambda: encoder.encode_batch(words)
+
+
+def case_sentence(params, words):
+    encoder = Encoder(params["total_qubits"], params["main_qubits"], params["subsystem_qubits"],
+                      params["subsystems_count"], seed=0, cache_size=0)
+    return lambda: encoder.encode_sentence(words)
+
+
+CASES = {
+    "tokenize": case_tokenize,
+    "tokenize_batch": case_tokenize_batch,
+    "token_system_literal": lambda params, words: case_token_system(params, words, "literal"),
+    "token_system_fused": lambda params, words: case_token_system(params, words, "fused"),
+    "subsystem_literal": lambda params, words: case_subsystem(params, words, "literal"),
+    "subsystem_fused": lambda params, words: case_subsystem(params, words, "fused"),
+    "interconnect": case_interconnect,
+    "optimizer": case_optimizer,
+    "incremental": case_incremental,
+    "gradient": case_gradient,
+    "gradient_shift": lambda params, words: case_gradient(params, words, method="shift"),
+    "execution": case_execution,
+    "encoder": case_encoder,
+    "encoder_template": lambda params, words: case_encoder(params, words, ir=False),
+    "sentence": case_sentence,
+}
+
+
+def measure(case, repeat):
+    """
+    Time a case and record its peak traced memory.
+
+    A case is either a function, or a `(setup, run)` pair whose `setup()` is
+    called untimed before every run and whose result is passed to `run`, for
+    operations that consume fresh inputs such as an empty circuit layout.
+
+    Returns:
+    --------
+    dict
+        The median and minimum wall time in seconds and the peak memory in bytes.
+    """
+    setup, run = case if isinstance(case, tuple) else (lambda: None, lambda _: case())
+    run(setup())  # Warm-up
+    timings = []
+    for _ in range(repeat):
+        inputs = setup()
+        start = time.perf_counter()
+        run(inputs)
+        timings.append(time.perf_counter() - start)
+
+    inputs = setup()
+    tracemalloc.start()
+    run(inputs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds_median": statistics.median(timings), "seconds_min": min(timings), "peak_bytes": peak}
+
+
+def run_benchmarks(args):
+    """
+    Run all selected cases over the parameter sweep.
+    """
+    results = []
+    sweep = itertools.product(args.total_qubits, args.main_qubits, args.subsystem_qubits,
+                              args.subsystems_count, args.batch_size)
+    for total_qubits, main_qubits, subsystem_qubits, subsystems_count, batch_size in sweep:
+        if main_qubits + subsystem_qubits * subsystems_count > total_qubits:
+            continue
+        params = {
+            "total_qubits": total_qubits,
+            "main_qubits": main_qubits,
+            "subsystem_qubits": subsystem_qubits,
+            "subsystems_count": subsystems_count,
+            "batch_size": batch_size,
+        }
+        words = make_words(batch_size)
+        for name in args.cases:
+            result = measure(CASES[name](params, words), args.repeat)
+            result.update({"case": name, "params": params,
+                           "words_per_second": batch_size / result["seconds_median"]})
+            results.append(result)
+            print(f"{name:22s} {json.dumps(params)} "
+                  f"{result['seconds_median'] * 1000:9.3f} ms {result['peak_bytes'] / 1024:9.1f} KiB")
+    return results
+
+
+def case_id(result):
+    return result["case"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Report cases that got slower than `threshold` times their baseline.
+
+    Returns:
+    --------
+    int
+        The number of regressions.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {case_id(result): result for result in json.load(baseline_file)["results"]}
+    regressions = 0
+    for result in results:
+        reference = baseline.get(case_id(result))
+        if reference is None:
+            continue
+        ratio = result["seconds_median"] / reference["seconds_median"]
+        if ratio > threshold:
+            regressions += 1
+            print(f"REGRESSION {result['case']} {json.dumps(result['params'])}: {ratio:.2f}x slower")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--total-qubits", type=int, nargs="+", default=[50])
+    parser.add_argument("--main-qubits", type=int, nargs="+", default=[20])
+    parser.add_argument("--subsystem-qubits", type=int, nargs="+", default=[10])
+    parser.add_argument("--subsystems-count", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="Compare against a baseline JSON file.")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                            "processor": platform.processor(), "cpus": os.cpu_count()},
+                "numpy": np.__version__,
+                "results": results,
+            }, output_file, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Localhost cluster for the distributed encoder.
+
+Worker processes stand in for the nodes of a cluster: they join the file-based
+queue of a `Coordinator` exactly as remote nodes would (`run_worker` on the
+queue directory), while the coordinator may run local workers of its own.
+After the job, every vector in the output store is compared with
+`Encoder.encode_batch`:
+
+    python test/cluster.py --words 20000 --nodes 3 --local-workers 1
+    python test/cluster.py --nodes 2 --kill 1 --lease 1
+
+With `--kill`, that many nodes are killed with SIGKILL while they hold a
+shard, so their shards are only finished after their lease expired and they
+were retried. The script exits with status 1 if a vector differs, a shard
+failed, or a killed shard was not retried.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from modul.distributed import Coordinator, run_worker, worker_name
+from modul.encoder import Encoder
+from modul.store import VectorStore
+
+
+def make_words(count, seed=0):
+    """
+    Generate random upper-case words of 3 to 15 characters.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    lengths = rng.integers(3, 16, size=count)
+    characters = rng.choice(letters, size=(count, 15))
+    return ["".join(row[:length]) for row, length in zip(characters, lengths)]
+
+
+def kill_nodes(queue_path, nodes, count, stop):
+    """
+    Kill `count` nodes with SIGKILL as soon as each of them holds a claim.
+    """
+    claimed = os.path.join(queue_path, "claimed")
+    remaining = {f".{worker_name(node.pid)}.json": node for node in nodes}
+    killed = 0
+    while killed < count and not stop.is_set():
+        for name in os.listdir(claimed) if os.path.isdir(claimed) else []:
+            for suffix, node in list(remaining.items()):
+                if name.endswith(suffix):
+                    os.kill(node.pid, signal.SIGKILL)
+                    del remaining[suffix]
+                    killed += 1
+                    print(f"killed node {node.pid} while it held {name}")
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--nodes", type=int, default=2, help="Worker processes joining as external nodes.")
+    parser.add_argument("--local-workers", type=int, default=0, help="Worker processes of the coordinator.")
+    parser.add_argument("--shard-size", type=int, default=256)
+    parser.add_argument("--kill", type=int, default=0, help="Nodes to kill while they hold a shard.")
+    parser.add_argument("--lease", type=float, default=2.0)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.kill > args.nodes or args.nodes + args.local_workers < 1:
+        parser.error("--kill must not exceed --nodes, and at least one worker is needed.")
+
+    words = make_words(args.words, seed=args.seed)
+    encoder = Encoder(seed=args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        queue_path = os.path.join(directory, "queue")
+        store = VectorStore(os.path.join(directory, "store"), row_shape=encoder.dimension)
+        coordinator = Coordinator(encoder, queue_path, shard_size=args.shard_size, workers=args.local_workers,
+                                  lease=args.lease, max_retries=args.max_retries)
+
+        nodes = [multiprocessing.Process(target=run_worker, args=(queue_path,)) for _ in range(args.nodes)]
+        for node in nodes:
+            node.start()
+        stop = threading.Event()
+        killer = threading.Thread(target=kill_nodes, args=(queue_path, nodes, args.kill, stop))
+        killer.start()
+        try:
+            appended = coordinator.run(words, store, timeout=args.timeout)
+        finally:
+            stop.set()
+            killer.join()
+            for node in nodes:
+                node.join(timeout=10)
+                if node.is_alive():
+                    node.terminate()
+
+        stats = coordinator.stats
+        print(f"{appended} vectors from {stats['merged']} of {stats['shards']} shards in "
+              f"{stats['seconds']:.2f} s ({stats['words_per_second']:.0f} words/s), "
+              f"{stats['retries']} retries, {stats['restarts']} restarted local workers")
+
+        unique = store.words
+        expected = encoder.encode_batch(unique)
+        _, stored = store.lookup(unique)
+        mismatches = int(np.count_nonzero(np.any(stored != expected, axis=1)))
+        problems = []
+        if len(unique) != len(set(words)):
+            problems.append(f"{len(set(words)) - len(unique)} words missing from the store")
+        if mismatches:
+            problems.append(f"{mismatches} vectors differ from Encoder.encode_batch")
+        if stats["failed"]:
+            problems.append(f"failed shards: {stats['failed']}")
+        if stats["retries"] < args.kill:
+            problems.append(f"only {stats['retries']} retries for {args.kill} killed nodes")
+        if problems:
+            print("CHECK FAILED: " + "; ".join(problems))
+            sys.exit(1)
+        print("all vectors match")
+
+
+if __name__ == "__main__":
+    main()
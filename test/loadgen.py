@@ -0,0 +1,200 @@
+"""
+Load generator for the micro-batching encode service.
+
+Requests for single words arrive as a Poisson process at `--rate` requests per
+second for `--duration` seconds (open loop, so slow responses do not slow down
+the arrivals). Every request is timed from its arrival to its result, and the
+achieved throughput and the latency percentiles are reported:
+
+    python test/loadgen.py --rate 500 --max-batch-size 64 --max-delay-ms 5
+    python test/loadgen.py --url http://127.0.0.1:8080 --rate 200
+
+Without `--url` the service runs in this process; with `--url` the requests go
+to a running `EncodeService.serve` endpoint over keep-alive HTTP connections.
+With `--target-p99-ms` and/or `--target-rps`, the script exits with status 1 if
+a target is missed, so the batching knobs can be tuned against them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from modul.encoder import Encoder
+from modul.service import EncodeService, latency_summary
+
+
+def make_words(count, vocabulary, seed=0):
+    """
+    Draw words from a random vocabulary of upper-case words.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    words = ["".join(rng.choice(letters, size=rng.integers(3, 16))) for _ in range(vocabulary)]
+    return [words[i] for i in rng.integers(vocabulary, size=count)]
+
+
+class HTTPClient:
+    """
+    Sends encode requests over a pool of keep-alive connections.
+    """
+
+    def __init__(self, url, connections):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connections = connections
+        self._idle = None
+
+    async def start(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.connections):
+            self._idle.put_nowait(await asyncio.open_connection(self.host, self.port))
+
+    async def stop(self):
+        while not self._idle.empty():
+            _, writer = self._idle.get_nowait()
+            writer.close()
+
+    async def request(self, method, path, payload=None):
+        reader, writer = await self._idle.get()
+        try:
+            body = json.dumps(payload).encode() if payload is not None else b""
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            response = json.loads(await reader.readexactly(length))
+            if b" 200 " not in status:
+                raise RuntimeError(f"{status.decode().strip()}: {response}")
+            return response
+        finally:
+            self._idle.put_nowait((reader, writer))
+
+    async def encode(self, word):
+        return (await self.request("POST", "/encode", {"word": word}))["vector"]
+
+
+async def generate_load(encode, words, rate, seed=0):
+    """
+    Issue one request per word with exponential inter-arrival times.
+
+    Returns:
+    --------
+    tuple of (list of float, float, int)
+        The latency of every successful request, the elapsed seconds and the
+        number of failed requests.
+    """
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(1 / rate, size=len(words)))
+    latencies = []
+    failures = 0
+
+    async def timed(word):
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await encode(word)
+        except Exception:
+            failures += 1
+        else:
+            latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    begin = time.perf_counter()
+    for word, arrival in zip(words, arrivals):
+        delay = begin + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed(word)))
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - begin, failures
+
+
+async def run(args):
+    words = make_words(int(args.rate * args.duration), args.vocabulary, seed=args.seed)
+    warmup = make_words(args.max_batch_size, args.vocabulary, seed=args.seed + 1)
+    server_stats = None
+    if args.url:
+        client = HTTPClient(args.url, args.connections)
+        await client.start()
+        try:
+            await asyncio.gather(*(client.encode(word) for word in warmup))
+            latencies, seconds, failures = await generate_load(client.encode, words, args.rate, args.seed)
+            server_stats = await client.request("GET", "/stats")
+        finally:
+            await client.stop()
+    else:
+        encoder = Encoder(args.total_qubits, args.main_qubits, args.subsystem_qubits, args.subsystems_count,
+                          seed=0, cache_size=args.cache_size)
+        async with EncodeService(encoder, max_batch_size=args.max_batch_size, max_delay=args.max_delay_ms / 1000,
+                                 workers=args.workers) as service:
+            await service.encode_many(warmup)
+            service.reset_stats()
+            latencies, seconds, failures = await generate_load(service.encode, words, args.rate, args.seed)
+            server_stats = service.stats()
+
+    result = latency_summary(latencies)
+    result.update({"offered_rps": args.rate, "achieved_rps": len(latencies) / seconds, "failures": failures,
+                   "service": server_stats})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Send requests to a running HTTP service instead of an in-process one.")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connections for --url.")
+    parser.add_argument("--rate", type=float, default=500.0, help="Offered requests per second.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of offered load.")
+    parser.add_argument("--vocabulary", type=int, default=100000, help="Number of distinct words.")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--total-qubits", type=int, default=50)
+    parser.add_argument("--main-qubits", type=int, default=20)
+    parser.add_argument("--subsystem-qubits", type=int, default=10)
+    parser.add_argument("--subsystems-count", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-p99-ms", type=float, help="Fail if the p99 latency is above this.")
+    parser.add_argument("--target-rps", type=float, help="Fail if the achieved throughput is below this.")
+    parser.add_argument("--output", help="Write the result as JSON to this file.")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(f"offered {result['offered_rps']:.0f} req/s, achieved {result['achieved_rps']:.0f} req/s, "
+          f"{result['failures']} failed")
+    print(f"latency p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+          f"p99 {result['p99_ms']:.2f} ms, max {result['max_ms']:.2f} ms")
+    if result["service"]:
+        print(f"mean batch size {result['service']['mean_batch_size']:.1f}")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+
+    missed = []
+    if args.target_p99_ms is not None and result["p99_ms"] > args.target_p99_ms:
+        missed.append(f"p99 {result['p99_ms']:.2f} ms > {args.target_p99_ms} ms")
+    if args.target_rps is not None and result["achieved_rps"] < args.target_rps:
+        missed.append(f"throughput {result['achieved_rps']:.0f} req/s < {args.target_rps} req/s")
+    if missed or result["failures"]:
+        print("TARGET MISSED: " + "; ".join(missed + [f"{result['failures']} failures"] * bool(result["failures"])))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
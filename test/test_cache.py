@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from modul.cache import LRUCache, content_key
+from modul.encoder import Encoder
+
+WORDS = ["HELLO", "WORLD", "HELLO", "QUANTUM"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used entry
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    cache.put("a", 4)  # Overwriting refreshes "a"
+    cache.put("d", 5)
+    assert "c" not in cache
+    assert cache.get("a") == 4
+    assert cache.get("b", "missing") == "missing"
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 2, "hit_rate": 2 / 3}
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 2, "hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0}
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert len(cache) == 0
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1 and cache.stats()["evictions"] == 0
+    with pytest.raises(ValueError, match="negative"):
+        LRUCache(-1)
+
+
+def test_content_key_depends_on_contents_only():
+    assert content_key("w", np.arange(3)) == content_key("w", np.arange(3).copy())
+    assert content_key("w", np.arange(3)) != content_key("w", np.arange(3, dtype=np.int32))
+    assert content_key("ab", "c") != content_key("a", "bc")
+    assert content_key(1) != content_key("1")
+
+
+def test_encoder_caches_count_hits_misses_and_evictions():
+    encoder = Encoder(24, 12, 4, 3, seed=1, cache_size=2)
+    encoder.encode_batch(WORDS)
+    # Repeated words within a batch are looked up once
+    assert encoder.cache_stats()["simulations"] == {"size": 2, "maxsize": 2, "hits": 0, "misses": 3,
+                                                    "evictions": 1, "hit_rate": 0.0}
+    assert encoder.cache_stats()["tokens"]["misses"] == 3
+    encoder.encode_batch(["QUANTUM", "HELLO"])
+    stats = encoder.cache_stats()["simulations"]
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+    # The misses of one cache are the only lookups of the next one
+    assert encoder.cache_stats()["circuits"]["hits"] + encoder.cache_stats()["circuits"]["misses"] == 4
+
+
+@pytest.mark.parametrize("shots", [None, 64])
+def test_cached_and_uncached_vectors_are_identical(shots):
+    uncached = Encoder(24, 12, 4, 3, seed=1, shots=shots, cache_size=0)
+    cached = Encoder(24, 12, 4, 3, seed=1, shots=shots)
+    for _ in range(2):
+        np.testing.assert_array_equal(uncached.encode_batch(WORDS, seed=7), cached.encode_batch(WORDS, seed=7))
+    assert all(stats["size"] == 0 and stats["hits"] == 0 for stats in uncached.cache_stats().values())
+    assert cached.cache_stats()["simulations"]["hits"] == 3
@@ -0,0 +1,40 @@
+import pytest
+
+from modul.circuit import Circuit
+
+
+def test_released_qubits_are_reused():
+    circuit = Circuit(10, ir=True)
+    first = circuit.allocate_qubits(4)
+    circuit.allocate_qubits(4)
+    circuit.release_qubits(first)
+    assert circuit.allocate_qubits(3) == range(0, 3)
+    assert circuit.available_qubits == 3
+
+
+@pytest.mark.parametrize("qubits", [range(6, 8), [-1, 0], range(2, 5)])
+def test_release_outside_allocation_is_rejected(qubits):
+    circuit = Circuit(10, ir=True)
+    circuit.allocate_qubits(4)
+    with pytest.raises(ValueError, match="not allocated"):
+        circuit.release_qubits(qubits)
+
+
+def test_double_release_is_rejected():
+    circuit = Circuit(10, ir=True)
+    qubits = circuit.allocate_qubits(4)
+    circuit.allocate_qubits(2)
+    circuit.release_qubits(qubits[1:3])
+    with pytest.raises(ValueError, match="already released"):
+        circuit.release_qubits(qubits[:2])
+    assert circuit.available_qubits == 6
+
+
+def test_releasing_a_region_by_range_removes_its_name():
+    circuit = Circuit(10, ir=True)
+    qubits = circuit.allocate_qubits(4, name="token")
+    circuit.release_qubits(qubits)
+    assert "token" not in circuit.regions
+    assert circuit.allocate_qubits(4, name="token") == qubits
+    circuit.release_qubits("token")
+    assert "token" not in circuit.regions
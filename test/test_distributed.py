@@ -0,0 +1,69 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from modul.distributed import Coordinator, WorkQueue, worker_name
+from modul.encoder import Encoder
+from modul.store import VectorStore
+
+
+def test_settings_round_trip_without_pickle(tmp_path):
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+    config = dict(encoder.config(), ip_matrix=encoder.ip_matrix)
+    WorkQueue(str(tmp_path)).reset(config, lease=2.0, max_retries=1)
+    assert not list(tmp_path.glob("*.pkl"))
+    settings = WorkQueue(str(tmp_path)).settings(timeout=1)
+    assert (settings["lease"], settings["max_retries"]) == (2.0, 1)
+    np.testing.assert_array_equal(settings["encoder"]["ip_matrix"], encoder.ip_matrix)
+    replica = Encoder(**settings["encoder"])
+    np.testing.assert_array_equal(replica.encode_batch(["HELLO"]), encoder.encode_batch(["HELLO"]))
+
+
+def test_late_result_of_failed_shard_is_merged(tmp_path):
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+    words = ["HELLO", "WORLD", "QUANTUM", "STATE"]
+    store = VectorStore(str(tmp_path / "store"), row_shape=encoder.dimension)
+    coordinator = Coordinator(encoder, str(tmp_path / "queue"), shard_size=2, workers=0, lease=0.2,
+                              max_retries=0, poll=0.01)
+
+    def slow_worker():
+        queue = WorkQueue(coordinator.queue.path)
+        queue.settings(poll=0.01)
+        for delay in (0.6, 0.0):
+            deadline = time.monotonic() + 10
+            claimed = None
+            while claimed is None and time.monotonic() < deadline:
+                claimed = queue.claim(worker_name())
+                time.sleep(0.01)
+            if claimed is None:
+                return
+            task, claim = claimed
+            # The first lease expires and the shard fails before its result arrives
+            time.sleep(delay)
+            queue.complete(claim, task, encoder.encode_batch(task["words"]))
+
+    thread = threading.Thread(target=slow_worker)
+    thread.start()
+    try:
+        appended = coordinator.run(words, store, timeout=30)
+    finally:
+        thread.join()
+    assert appended == 4
+    assert coordinator.stats["merged"] == 2 and coordinator.stats["failed"] == {}
+    _, vectors = store.lookup(words)
+    np.testing.assert_array_equal(vectors, encoder.encode_batch(words))
+
+
+class BrokenConfigEncoder(Encoder):
+    def config(self):
+        return dict(super().config(), total_qubits=-1)
+
+
+def test_workers_exiting_without_a_claim_abort_the_job(tmp_path):
+    encoder = BrokenConfigEncoder(24, 12, 4, 3, seed=1)
+    store = VectorStore(str(tmp_path / "store"), row_shape=encoder.dimension)
+    coordinator = Coordinator(encoder, str(tmp_path / "queue"), workers=1, max_retries=2, poll=0.01)
+    with pytest.raises(RuntimeError, match="without holding a shard"):
+        coordinator.run(["HELLO"], store, timeout=60)
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from modul.encoder import Encoder
+from modul.pipeline import Pipeline
+from modul.store import VectorStore
+
+
+def test_random_topology_is_replicated_by_config():
+    encoder = Encoder(seed=5, interconnect_options={"topology": "random"})
+    replica = Encoder(**encoder.config())
+    assert "seed" in encoder.config()["interconnect_options"]
+    np.testing.assert_array_equal(replica.edges, encoder.edges)
+    np.testing.assert_array_equal(replica.encode_batch(["HELLO"]), encoder.encode_batch(["HELLO"]))
+
+
+def test_store_rejects_different_edges(tmp_path):
+    encoder = Encoder(seed=5, interconnect_options={"topology": "random", "seed": 1})
+    store = VectorStore(str(tmp_path / "store"), row_shape=encoder.dimension)
+    Pipeline(encoder, workers=1).encode_into(["HELLO"], store)
+    other = Encoder(seed=5, interconnect_options={"topology": "random", "seed": 2})
+    with pytest.raises(ValueError, match="edges"):
+        Pipeline(other, workers=1).encode_into(["WORLD"], store)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from modul.execution import Executor, merge_counts, pack_bits
+from modul.ir import CircuitIR
+from modul.measurement import Measurement
+
+
+def build_measurement():
+    """
+    Qubit 0 is |1>, qubit 1 is |0>, qubits 2 and 3 form a Bell pair with P(11) = P(00) = 1/2, and qubit 3 is
+    measured again after a reset and an X gate.
+    """
+    circuit = CircuitIR(4)
+    circuit.x(0)
+    circuit.h(2)
+    circuit.cx(2, 3)
+    measurement = Measurement(circuit)
+    measurement.measure_subsystem(range(0, 2), label="Fixed")
+    measurement.measure_entanglement([2], [3], label="Bell")
+    circuit.reset([3])
+    circuit.x(3)
+    measurement.measure_subsystem([3], label="Reused")
+    return measurement
+
+
+def test_pack_bits_and_merge_counts():
+    bits = np.random.default_rng(0).integers(0, 2, (50, 64), dtype=np.uint8)
+    expected = [sum(int(bit) << k for k, bit in enumerate(row)) for row in bits]
+    assert pack_bits(bits).tolist() == expected
+    with pytest.raises(ValueError, match="64-bit"):
+        pack_bits(np.zeros((1, 65), dtype=np.uint8))
+    outcomes, counts = merge_counts(np.array([5, 1, 5, 2], dtype=np.uint64), np.array([1, 2, 3, 4]))
+    assert outcomes.tolist() == [1, 2, 5] and counts.tolist() == [2, 4, 4]
+
+
+@pytest.mark.parametrize("shot_batch", [None, 1, 64, 100])
+def test_group_counts(shot_batch):
+    executor = Executor(shots=1000, shot_batch=shot_batch, seed=1)
+    counts = executor.run(build_measurement())[0]
+    assert counts["Fixed"][0].tolist() == [0b01] and counts["Fixed"][1].tolist() == [1000]
+    assert counts["Reused"][0].tolist() == [1] and counts["Reused"][1].tolist() == [1000]
+    outcomes, bell_counts = counts["Bell"]
+    assert outcomes.tolist() == [0b00, 0b11]
+    assert bell_counts.sum() == 1000 and abs(bell_counts[0] - 500) < 80
+    assert executor.stats["circuits"] == 1 and executor.stats["shots"] == 1000
+
+
+def test_runs_are_reproducible_with_a_seed():
+    measurements = [build_measurement(), build_measurement()]
+    first = Executor(shots=257, shot_batch=50, seed=7).run(measurements)
+    second = Executor(shots=257, shot_batch=50, seed=7).run(measurements)
+    assert len(first) == 2
+    for counts, other in zip(first, second):
+        assert counts.keys() == other.keys()
+        for label in counts:
+            np.testing.assert_array_equal(counts[label][0], other[label][0])
+            np.testing.assert_array_equal(counts[label][1], other[label][1])
+            assert counts[label][1].sum() == 257
+
+
+def test_invalid_arguments_are_rejected():
+    with pytest.raises(ValueError, match="backend"):
+        Executor(backend="gpu")
+    with pytest.raises(ValueError, match="at least 1"):
+        Executor(shots=10, shot_batch=0)
+
+
+def test_measurement_prints_only_if_verbose(capsys):
+    build_measurement()
+    assert capsys.readouterr().out == ""
+    Measurement(CircuitIR(2), verbose=True).measure_subsystem(range(2), label="Token")
+    assert capsys.readouterr().out == "Measuring Token: range(0, 2)\n"
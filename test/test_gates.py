@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Operator
+
+from modul.circuit import Circuit
+from modul.gates import append_phase_chains, phase_chain_angles, phase_chain_matrices
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+def build_operator(gate_mode, ir):
+    """
+    Build a Subsystem followed by a TokenSystem, so the TokenSystem starts at
+    a non-zero qubit offset.
+    """
+    circuit = Circuit(7, ir=ir)
+    subsystem = Subsystem(circuit, num_qubits=3, seed=1)
+    token_system = TokenSystem(circuit, num_qubits=4, seed=2)
+    assert token_system.qubit_range[0] == 3
+    subsystem.apply_operations(gate_mode=gate_mode)
+    token_system.apply_operations(gate_mode=gate_mode)
+    return Operator(circuit.to_qiskit())
+
+
+@pytest.mark.parametrize("ir", [False, True])
+def test_fused_operations_match_literal(ir):
+    literal = build_operator("literal", ir)
+    fused = build_operator("fused", ir)
+    assert fused.equiv(literal)
+    # The fused chains carry their global phase, so the operators agree exactly
+    assert fused == literal
+
+
+@pytest.mark.parametrize("ir", [False, True])
+def test_phase_chains_match_gate_sequence(ir):
+    rng = np.random.default_rng(0)
+    first, second, third = rng.uniform(-2 * np.pi, 2 * np.pi, (3, 4))
+    qubits = [4, 1, 3, 2]
+    literal = QuantumCircuit(5)
+    for q, a, b, c in zip(qubits, first, second, third):
+        literal.p(a, q)
+        literal.h(q)
+        literal.p(b, q)
+        literal.h(q)
+        literal.p(c, q)
+    circuit = Circuit(5, ir=ir).get_circuit()
+    append_phase_chains(circuit, qubits, first, second, third)
+    fused = Operator(circuit.to_qiskit() if ir else circuit)
+    assert fused.equiv(Operator(literal))
+    assert fused == Operator(literal)
+
+
+def test_phase_chain_matrices_match_operator():
+    rng = np.random.default_rng(1)
+    first, second, third = rng.uniform(-np.pi, np.pi, (3, 5))
+    matrices = phase_chain_matrices(first, second, third)
+    theta, phi, lam, global_phase = phase_chain_angles(first, second, third)
+    for k in range(5):
+        chain = QuantumCircuit(1)
+        chain.p(first[k], 0)
+        chain.h(0)
+        chain.p(second[k], 0)
+        chain.h(0)
+        chain.p(third[k], 0)
+        np.testing.assert_allclose(matrices[k], Operator(chain).data, atol=1e-12)
+        gate = QuantumCircuit(1, global_phase=global_phase[k])
+        gate.u(theta[k], phi[k], lam[k], 0)
+        np.testing.assert_allclose(Operator(gate).data, matrices[k], atol=1e-12)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from modul.encoder import Encoder
+from modul.gradient import GradientEngine
+
+
+@pytest.mark.parametrize("topology", ["fold", "all_to_all"])
+def test_shift_matches_adjoint(topology):
+    encoder = Encoder(24, 12, 4, 3, seed=1, interconnect_options={"topology": topology})
+    tokens = encoder.tokenizer.tokenize_batch(["HELLO", "WORLD", "QUANTUM"])
+    grad_output = np.random.default_rng(0).standard_normal((3, encoder.dimension))
+    adjoint = GradientEngine(encoder).backward(tokens, grad_output)
+    shift = GradientEngine(encoder, method="shift").backward(tokens, grad_output)
+    for name in adjoint:
+        np.testing.assert_allclose(shift[name], adjoint[name], atol=1e-12)
+
+
+def test_forward_matches_encoder():
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+    words = ["HELLO", "WORLD"]
+    forward = GradientEngine(encoder).forward(encoder.tokenizer.tokenize_batch(words))
+    np.testing.assert_allclose(forward, encoder.encode_batch(words), atol=1e-6)
+
+
+def test_sampling_encoder_is_rejected():
+    with pytest.raises(ValueError, match="shots"):
+        GradientEngine(Encoder(24, 12, 4, 3, seed=1, shots=100))
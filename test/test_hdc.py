@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from modul.hdc import HDCEngine
+from modul.hypervector import pack_hypervectors, unpack_hypervectors
+
+DIMENSIONS = [64, 100, 130, 192]
+
+
+def random_bits(count, dimension, seed=0):
+    return np.random.default_rng(seed).random((count, dimension)) < 0.5
+
+
+def majority(bits, tie_bits):
+    """
+    Per-bit majority of unpacked rows; ties take the tie-break bit.
+    """
+    counts = bits.sum(axis=0)
+    return (2 * counts > len(bits)) | ((2 * counts == len(bits)) & tie_bits)
+
+
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+def test_permute_matches_roll(dimension):
+    engine = HDCEngine(dimension)
+    shifts = [0, 1, 5, 63, 64, 65, 127, dimension - 1, dimension, dimension + 3, -1, -70]
+    bits = random_bits(len(shifts), dimension)
+    packed = pack_hypervectors(bits)
+    expected = np.array([np.roll(row, shift) for row, shift in zip(bits, shifts)])
+    out = np.empty_like(packed)
+    result = engine.permute(packed, np.array(shifts), out=out)
+    assert result is out
+    np.testing.assert_array_equal(unpack_hypervectors(result, dimension), expected)
+    # Padding bits beyond the dimension stay 0
+    np.testing.assert_array_equal(result, pack_hypervectors(expected))
+    for shift in (1, 65):
+        np.testing.assert_array_equal(unpack_hypervectors(engine.permute(packed, shift), dimension),
+                                      np.roll(bits, shift, axis=1))
+
+
+@pytest.mark.parametrize("dimension", DIMENSIONS)
+def test_bundle_segments_matches_majority(dimension):
+    engine = HDCEngine(dimension, seed=3)
+    tie_bits = unpack_hypervectors(engine.tie_break[None], dimension)[0].astype(bool)
+    lengths = [1, 2, 3, 4, 7, 8, 16, 33, 64]
+    bits = random_bits(sum(lengths), dimension, seed=1)
+    offsets = np.cumsum([0] + lengths[:-1])
+    expected = np.array([majority(bits[start:start + length], tie_bits)
+                         for start, length in zip(offsets, lengths)])
+    out = np.empty((len(lengths), engine.words), dtype=np.uint64)
+    result = engine.bundle_segments(pack_hypervectors(bits), offsets, out=out)
+    assert result is out
+    np.testing.assert_array_equal(result, pack_hypervectors(expected))
+
+
+@pytest.mark.parametrize("count", [2, 10, 64, 100, 131])
+def test_bundle_matches_majority(count):
+    dimension = 130
+    engine = HDCEngine(dimension, seed=5)
+    tie_bits = unpack_hypervectors(engine.tie_break[None], dimension)[0].astype(bool)
+    bits = random_bits(count, dimension, seed=count)
+    if count == 2:
+        bits[1] = ~bits[0]  # Every bit is a tie
+    out = np.empty(engine.words, dtype=np.uint64)
+    result = engine.bundle(pack_hypervectors(bits), out=out)
+    assert result is out
+    np.testing.assert_array_equal(result, pack_hypervectors(majority(bits, tie_bits)[None])[0])
+
+
+def test_compose_matches_reference():
+    dimension = 100
+    engine = HDCEngine(dimension, seed=2)
+    tie_bits = unpack_hypervectors(engine.tie_break[None], dimension)[0].astype(bool)
+    lengths = [3, 4, 1]
+    bits = random_bits(sum(lengths), dimension, seed=4)
+    offsets = np.cumsum([0] + lengths[:-1])
+    expected = [majority(np.array([np.roll(row, position) for position, row in enumerate(bits[start:start + length])]),
+                         tie_bits) for start, length in zip(offsets, lengths)]
+    out = np.empty((len(lengths), engine.words), dtype=np.uint64)
+    np.testing.assert_array_equal(engine.compose(pack_hypervectors(bits), offsets, out=out),
+                                  pack_hypervectors(np.array(expected)))
+
+
+def test_float_operations():
+    engine = HDCEngine(10, binary=False)
+    vectors = np.random.default_rng(0).standard_normal((4, 10)).astype(np.float32)
+    np.testing.assert_array_equal(engine.permute(vectors, [0, 1, -2, 13]),
+                                  [np.roll(row, shift) for row, shift in zip(vectors, [0, 1, -2, 13])])
+    out = np.empty((2, 10), dtype=np.float32)
+    np.testing.assert_allclose(engine.bundle_segments(vectors, [0, 1], out=out),
+                               [vectors[0], vectors[1:].sum(axis=0)], rtol=1e-6)
+    np.testing.assert_array_equal(engine.bind(vectors, vectors[0]), vectors * vectors[0])
+
+
+def test_empty_segment_is_rejected():
+    engine = HDCEngine(100)
+    with pytest.raises(ValueError, match="at least one"):
+        engine.bundle_segments(np.zeros((2, engine.words), dtype=np.uint64), [0, 2])
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from modul.hypervector import SimilarityIndex
+
+
+@pytest.mark.parametrize("metric", ["hamming", "cosine"])
+def test_blocked_scores_match_unblocked(metric):
+    rng = np.random.default_rng(0)
+    if metric == "hamming":
+        vectors = rng.integers(0, 2 ** 63, size=(300, 2), dtype=np.uint64)
+    else:
+        vectors = rng.standard_normal((300, 128)).astype(np.float32)
+    blocked = SimilarityIndex(128, metric=metric, block_size=64)
+    unblocked = SimilarityIndex(128, metric=metric)
+    blocked.add(list(range(300)), vectors)
+    unblocked.add(list(range(300)), vectors)
+    queries = blocked._prepare(vectors[:5])
+    np.testing.assert_allclose(blocked._scores(queries), unblocked._scores(queries), atol=1e-5)
+    rows = np.array([5, 250, 17, 99])
+    np.testing.assert_allclose(blocked._scores(queries, rows), unblocked._scores(queries)[:, rows], atol=1e-5)
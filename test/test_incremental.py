@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from modul.circuit import Circuit
+from modul.incremental import IncrementalCircuit
+from modul.interconnect import Interconnect
+from modul.simulator import BlockSimulator
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+def rebuild(incremental):
+    """
+    Build the circuit of an IncrementalCircuit from scratch with its current phases.
+    """
+    circuit = Circuit(incremental.circuit.total_qubits, ir=True)
+    token_system = TokenSystem(circuit, num_qubits=incremental.token_system.num_qubits)
+    token_system.tp_matrix = incremental.token_system.tp_matrix
+    token_system.ip_matrix = incremental.token_system.ip_matrix
+    token_system.apply_operations(incremental.gate_mode)
+    subsystems = []
+    for original in incremental.subsystems:
+        subsystem = Subsystem(circuit, num_qubits=original.num_qubits)
+        subsystem.tp_matrix = original.tp_matrix
+        subsystem.apply_operations(incremental.gate_mode)
+        subsystems.append(subsystem)
+    Interconnect(circuit, topology="random", seed=4).entangle(
+        token_system.qubit_range, [subsystem.qubit_range for subsystem in subsystems])
+    return BlockSimulator(circuit.get_circuit())
+
+
+@pytest.mark.parametrize("gate_mode", ["fused", "literal"])
+def test_update_matches_full_rebuild(gate_mode):
+    incremental = IncrementalCircuit(24, 12, 4, 3, gate_mode=gate_mode,
+                                     interconnect_options={"topology": "random", "seed": 4})
+    rng = np.random.default_rng(0)
+    qubits = list(incremental.subsystems[1].qubit_range) + [0, 5]
+    for name in ("Subsystem2", "TokenSystem", "Subsystem2"):
+        shape = np.shape(incremental.components()[name].tp_matrix)
+        incremental.update(name, tp_matrix=rng.uniform(0, 2 * np.pi, shape))
+        expected = rebuild(incremental)
+        np.testing.assert_allclose(incremental.marginals(), expected.marginals(incremental.qubits), atol=1e-12)
+        np.testing.assert_allclose(incremental.probabilities(qubits), expected.probabilities(qubits), atol=1e-12)
+        # The spliced IR itself is the rebuilt circuit
+        np.testing.assert_allclose(BlockSimulator(incremental.get_circuit()).marginals(incremental.qubits),
+                                   expected.marginals(incremental.qubits), atol=1e-12)
+
+
+def test_update_rejects_unknown_blocks_and_shapes():
+    incremental = IncrementalCircuit(24, 12, 4, 3)
+    with pytest.raises(ValueError, match="Unknown block"):
+        incremental.update("Subsystem9", tp_matrix=np.zeros((4, 3)))
+    with pytest.raises(ValueError, match="shape"):
+        incremental.update("Subsystem1", tp_matrix=np.zeros((3, 4)))
+    with pytest.raises(ValueError, match="no ip_matrix"):
+        incremental.update("Subsystem1", ip_matrix=np.zeros((4, 3)))
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Operator
+
+from modul.ir import CircuitIR
+
+
+def record(circuit):
+    """
+    Apply the same calls, with scalar and list qubit arguments, to a QuantumCircuit or CircuitIR.
+    """
+    circuit.h([0, 1, 2])
+    circuit.x(3)
+    circuit.p(0.3, [0, 2])
+    circuit.p(0.1, [1, 3])
+    circuit.p(np.float64(0.7), 1)
+    circuit.u(0.4, 0.5, 0.6, [0, 3])
+    circuit.u(0.1, 0.3, 0.4, [1, 2])
+    circuit.cx(0, [1, 2])
+    circuit.cx([3, 2], 0)
+    circuit.cx([1, 2], [3, 3])
+    return circuit
+
+
+def operations(circuit):
+    return [(instruction.operation.name, [circuit.find_bit(qubit).index for qubit in instruction.qubits],
+             [float(param) for param in instruction.operation.params])
+            for instruction in circuit.data]
+
+
+def test_ir_matches_quantum_circuit():
+    expected = record(QuantumCircuit(4))
+    ir = record(CircuitIR(4))
+    actual = ir.to_qiskit()
+    assert len(ir) == len(expected.data)
+    assert operations(actual) == operations(expected)
+    assert Operator(actual).equiv(Operator(expected))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_from_qiskit_round_trip(seed):
+    rng = np.random.default_rng(seed)
+    circuit = QuantumCircuit(3)
+    for _ in range(6):
+        qubit = int(rng.integers(3))
+        circuit.u(*rng.uniform(0, 2 * np.pi, 3), qubit)
+        circuit.p(rng.uniform(0, 2 * np.pi), qubit)
+        circuit.cx(qubit, (qubit + 1) % 3)
+    converted = CircuitIR.from_qiskit(circuit).to_qiskit()
+    assert operations(converted) == operations(circuit)
+    assert Operator(converted).equiv(Operator(circuit))
+
+
+def test_angle_lists_are_recorded_per_qubit():
+    ir = CircuitIR(3)
+    ir.p([0.1, 0.2, 0.3], [0, 1, 2])
+    ir.u([0.1, 0.2], 0.3, [0.4, 0.5], [1, 2])
+    np.testing.assert_array_equal(ir.angles[:3, 0], [0.1, 0.2, 0.3])
+    np.testing.assert_array_equal(ir.angles[3:], [[0.1, 0.3, 0.4], [0.2, 0.3, 0.5]])
@@ -0,0 +1,48 @@
+import pytest
+from qiskit.quantum_info import Operator
+
+from modul.circuit import Circuit
+from modul.interconnect import TOPOLOGIES, Interconnect
+from modul.optimizer import Optimizer
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+def build_circuit(topology, gate_mode):
+    # With three Subsystems, every fold pair of token qubits drives three shared targets
+    circuit = Circuit(10, ir=True)
+    token_system = TokenSystem(circuit, num_qubits=4, seed=1)
+    subsystems = [Subsystem(circuit, num_qubits=2, seed=k + 2) for k in range(3)]
+    token_system.apply_operations(gate_mode)
+    for subsystem in subsystems:
+        subsystem.apply_operations(gate_mode)
+    Interconnect(circuit, topology=topology, density=0.8, seed=3).entangle(
+        token_system.qubit_range, [subsystem.qubit_range for subsystem in subsystems])
+    return circuit.get_circuit()
+
+
+@pytest.mark.parametrize("gate_mode", ["literal", "fused"])
+@pytest.mark.parametrize("topology", TOPOLOGIES)
+def test_optimized_circuit_is_equivalent(topology, gate_mode):
+    before = build_circuit(topology, gate_mode)
+    optimizer = Optimizer()
+    after = optimizer.run(before)
+    assert Operator(after.to_qiskit()).equiv(Operator(before.to_qiskit()))
+    report = optimizer.report
+    assert report["after"]["gates"] < report["before"]["gates"]
+    if gate_mode == "literal":
+        assert report["after"]["depth"] < report["before"]["depth"]
+    else:
+        # Fused chains leave only the CX blocks to optimize; the fan-in rewrite
+        # saves CX gates but serializes them on the shared control
+        assert report["after"]["cx"] < report["before"]["cx"]
+    assert report["before"] == Optimizer.statistics(before)
+    assert report["after"] == Optimizer.statistics(after)
+
+
+def test_fan_in_off_never_increases_depth():
+    for topology in TOPOLOGIES:
+        optimizer = Optimizer(fan_in=False)
+        after = optimizer.run(build_circuit(topology, "fused"))
+        assert optimizer.report["after"]["depth"] <= optimizer.report["before"]["depth"]
+        assert optimizer.report["after"] == Optimizer.statistics(after)
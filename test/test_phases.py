@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from modul.circuit import Circuit
+from modul.encoder import Encoder
+from modul.phases import ANGLE_LEVELS, component_seed, dequantize_phases, quantize_phases, seeded_phases
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = """
+import json, sys
+from modul.circuit import Circuit
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+circuit = Circuit(30, ir=True)
+token_system = TokenSystem(circuit, num_qubits=20, seed=int(sys.argv[1]))
+subsystem = Subsystem(circuit, num_qubits=10, seed=int(sys.argv[1]))
+print(json.dumps([token_system.tp_matrix.tolist(), token_system.ip_matrix.tolist(), subsystem.tp_matrix.tolist()]))
+"""
+
+
+def phases(seed):
+    circuit = Circuit(30, ir=True)
+    token_system = TokenSystem(circuit, num_qubits=20, seed=seed)
+    subsystem = Subsystem(circuit, num_qubits=10, seed=seed)
+    return [token_system.tp_matrix.tolist(), token_system.ip_matrix.tolist(), subsystem.tp_matrix.tolist()]
+
+
+@pytest.mark.parametrize("seed", [0, 12345, 2 ** 63 - 1])
+def test_phases_are_identical_across_processes(seed):
+    output = subprocess.run([sys.executable, "-c", PHASES, str(seed)], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout
+    assert json.loads(output) == phases(seed)
+
+
+def test_uint16_round_trip_is_lossless():
+    levels = np.arange(ANGLE_LEVELS, dtype=np.uint16)
+    np.testing.assert_array_equal(quantize_phases(dequantize_phases(levels)), levels)
+    angles = seeded_phases(7, (3, 20))
+    np.testing.assert_array_equal(dequantize_phases(quantize_phases(angles)), angles)
+    encoder = Encoder(24, 12, 4, 3, seed=7, phase_dtype="uint16")
+    np.testing.assert_array_equal(encoder.ip_matrix, seeded_phases(component_seed(7, 0), (3, 12), stream=1))
+    replica = Encoder(**dict(Encoder(24, 12, 4, 3, seed=7).config(), ip_matrix=quantize_phases(encoder.ip_matrix)))
+    np.testing.assert_array_equal(replica.encode_batch(["HELLO"]), encoder.encode_batch(["HELLO"]))
+
+
+def test_negative_seeds_are_normalised():
+    assert component_seed(-1, 0) == component_seed(2 ** 64 - 1, 0)
+    np.testing.assert_array_equal(Encoder(24, 12, 4, 3, seed=-5).encode_batch(["HELLO"]),
+                                  Encoder(24, 12, 4, 3, seed=2 ** 64 - 5).encode_batch(["HELLO"]))
@@ -0,0 +1,20 @@
+import numpy as np
+
+from modul.encoder import Encoder
+from modul.pipeline import Pipeline
+
+
+def test_sampled_chunks_are_independent():
+    encoder = Encoder(shots=64, seed=3)
+    words = ["HELLO"] * 4
+    vectors = Pipeline(encoder, workers=2, chunk_size=2).encode_all(words)
+    assert not np.array_equal(vectors[0], vectors[2])
+    again = Pipeline(encoder, workers=1, chunk_size=2).encode_all(words)
+    np.testing.assert_array_equal(vectors, again)
+
+
+def test_exact_vectors_match_encode_batch():
+    encoder = Encoder(seed=3)
+    words = ["HELLO", "WORLD", "QUANTUM"]
+    vectors = Pipeline(encoder, workers=2, chunk_size=2).encode_all(words)
+    np.testing.assert_array_equal(vectors, encoder.encode_batch(words))
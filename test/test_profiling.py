@@ -0,0 +1,24 @@
+import tracemalloc
+
+from modul.profiling import Profiler
+
+
+def test_disable_keeps_external_tracing():
+    tracemalloc.start()
+    try:
+        profiler = Profiler()
+        profiler.enable(memory=True)
+        profiler.disable()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_disable_stops_own_tracing():
+    assert not tracemalloc.is_tracing()
+    profiler = Profiler()
+    profiler.enable(memory=True)
+    profiler.enable(memory=True)
+    assert tracemalloc.is_tracing()
+    profiler.disable()
+    assert not tracemalloc.is_tracing()
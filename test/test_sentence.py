@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from qiskit import transpile
+from qiskit.providers.basic_provider import BasicSimulator
+
+from modul.encoder import Encoder
+
+WORDS = ["HELLO", "QUANTUM", "WORLD"]
+
+
+@pytest.mark.parametrize("topology", ["fold", "random"])
+def test_token_system_part_matches_encode_batch(topology):
+    encoder = Encoder(24, 12, 4, 3, seed=1, interconnect_options={"topology": topology})
+    sentence = encoder.encode_sentence(WORDS)
+    np.testing.assert_allclose(sentence[:, :encoder.main_qubits],
+                               encoder.encode_batch(WORDS)[:, :encoder.main_qubits], atol=1e-6)
+
+
+def test_mid_circuit_measurement_matches_qiskit():
+    # Reset TokenSystem qubits are reused by every word, so the measured bits depend on the collapse
+    encoder = Encoder(7, 3, 2, 2, seed=1)
+    vectors, circuit = encoder.encode_sentence(WORDS, return_circuit=True)
+    assert circuit.count_ops() == encoder.build_sentence_circuit(encoder.tokenizer.tokenize_batch(WORDS)).count_ops()
+    shots = 4000
+    backend = BasicSimulator()
+    counts = backend.run(transpile(circuit.to_qiskit(), backend), shots=shots, seed_simulator=1).result().get_counts()
+    observed = np.zeros(circuit.num_clbits)
+    for bitstring, count in counts.items():
+        observed += count * np.array([int(bit) for bit in bitstring.replace(" ", "")[::-1]])
+    np.testing.assert_allclose(observed / shots, vectors.ravel(), atol=0.03)
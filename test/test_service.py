@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from modul.encoder import Encoder
+from modul.service import EncodeService
+
+
+def respond(service, body):
+    async def run():
+        async with service:
+            return await service._respond("POST", "/encode", json.dumps(body).encode())
+    return asyncio.run(run())
+
+
+def test_words_are_encoded():
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+    status, payload = respond(EncodeService(encoder), {"words": ["HELLO", "WORLD"]})
+    assert status == "200 OK"
+    np.testing.assert_allclose(payload["vectors"], encoder.encode_batch(["HELLO", "WORLD"]))
+
+
+def test_empty_words_return_no_vectors():
+    status, payload = respond(EncodeService(Encoder(24, 12, 4, 3, seed=1)), {"words": []})
+    assert (status, payload) == ("200 OK", {"vectors": []})
+
+
+@pytest.mark.parametrize("body", [{"words": "HELLO"}, {"word": 7}, {"words": ["HELLO", None]}, [], {}])
+def test_malformed_body_is_rejected_before_encoding(body):
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+    encoder.encode_batch = None  # Any queued word would fail with a TypeError
+    status, _ = respond(EncodeService(encoder), body)
+    assert status == "400 Bad Request"
+
+
+@pytest.mark.parametrize("error", [RuntimeError, ValueError, TypeError])
+def test_encoding_failure_is_a_server_error(error):
+    encoder = Encoder(24, 12, 4, 3, seed=1)
+
+    def fail(words):
+        raise error("simulator crashed")
+
+    encoder.encode_batch = fail
+    status, payload = respond(EncodeService(encoder), {"words": ["HELLO", "WORLD"]})
+    assert status == "500 Internal Server Error"
+    assert payload["error"] == f"{error.__name__}: simulator crashed"
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+
+from modul.circuit import Circuit
+from modul.interconnect import Interconnect
+from modul.ir import CircuitIR
+from modul.simulator import BlockSimulator
+from modul.subsystem import Subsystem
+from modul.tokensystem import TokenSystem
+
+
+def random_circuit(seed, num_qubits=5, cx_count=7):
+    """
+    Build a random product state, a random CX network and diagonal/flip gates after it.
+    """
+    rng = np.random.default_rng(seed)
+    circuit = QuantumCircuit(num_qubits)
+    for qubit in range(num_qubits):
+        circuit.u(*rng.uniform(0, 2 * np.pi, 3), qubit)
+    for _ in range(cx_count):
+        control, target = rng.choice(num_qubits, 2, replace=False)
+        circuit.cx(int(control), int(target))
+    for qubit in rng.choice(num_qubits, 2, replace=False).tolist():
+        circuit.p(rng.uniform(0, 2 * np.pi), qubit)
+        circuit.x(qubit)
+    return circuit
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_marginals_match_statevector(seed):
+    circuit = random_circuit(seed)
+    state = Statevector(circuit)
+    expected = [state.probabilities([qubit])[1] for qubit in range(circuit.num_qubits)]
+    np.testing.assert_allclose(BlockSimulator(circuit).marginals(), expected, atol=1e-12)
+    np.testing.assert_allclose(BlockSimulator(CircuitIR.from_qiskit(circuit)).marginals(), expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_probabilities_match_statevector(seed):
+    circuit = random_circuit(seed)
+    qubits = [3, 0, 4, 1]
+    expected = Statevector(circuit).probabilities(qubits)
+    np.testing.assert_allclose(BlockSimulator(circuit).probabilities(qubits), expected, atol=1e-12)
+
+
+def test_sample_matches_statevector():
+    circuit = random_circuit(7)
+    shots = 20000
+    bits = BlockSimulator(circuit).sample(range(circuit.num_qubits), shots, seed=1)
+    outcomes = bits.astype(np.int64) @ (1 << np.arange(circuit.num_qubits))
+    observed = np.bincount(outcomes, minlength=2 ** circuit.num_qubits) / shots
+    np.testing.assert_allclose(observed, Statevector(circuit).probabilities(), atol=0.02)
+
+
+def test_gate_after_cx_is_rejected():
+    circuit = QuantumCircuit(2)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.h(1)
+    with pytest.raises(ValueError, match="product-state-plus-CX"):
+        BlockSimulator(circuit)
+
+
+def build_layout(total_qubits, main_qubits, subsystem_qubits, subsystems_count, topology):
+    circuit = Circuit(total_qubits, ir=True)
+    token_system = TokenSystem(circuit, num_qubits=main_qubits, seed=1)
+    token_system.apply_operations()
+    subsystems = [Subsystem(circuit, num_qubits=subsystem_qubits, seed=k + 2) for k in range(subsystems_count)]
+    for subsystem in subsystems:
+        subsystem.apply_operations()
+    Interconnect(circuit, topology=topology).entangle(token_system.qubit_range,
+                                                       [subsystem.qubit_range for subsystem in subsystems])
+    return circuit.get_circuit(), list(subsystems[0].qubit_range)
+
+
+def test_all_to_all_exceeds_block_limit():
+    ir, subsystem_qubits = build_layout(50, 20, 10, 3, "all_to_all")
+    simulator = BlockSimulator(ir)
+    with pytest.raises(ValueError, match="21 source bits"):
+        simulator.probabilities(subsystem_qubits[:1])
+    assert simulator.marginals().shape == (50,)
+    assert simulator.sample(subsystem_qubits, 10, seed=0).shape == (10, 10)
+
+
+def test_block_limit_is_configurable():
+    ir, subsystem_qubits = build_layout(12, 8, 2, 2, "all_to_all")
+    with pytest.raises(ValueError, match="9 source bits"):
+        BlockSimulator(ir, max_block_sources=8).probabilities(subsystem_qubits[:1])
+    simulator = BlockSimulator(ir)
+    probabilities = simulator.probabilities(subsystem_qubits[:1])
+    np.testing.assert_allclose(probabilities[1], simulator.marginals(subsystem_qubits[:1])[0], atol=1e-12)
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from modul.store import VectorStore
+
+WORDS = ["ALPHA", "BETA", "GAMMA"]
+
+
+def filled_store(path):
+    store = VectorStore(path, row_shape=(2, 3))
+    store.append(WORDS, np.arange(18, dtype=np.float32).reshape(3, 2, 3))
+    return store
+
+
+def check_recovered(path, count):
+    store = VectorStore(path)
+    assert len(store) == count
+    assert store.words == WORDS[:count]
+    assert store.missing(WORDS) == WORDS[count:]
+    np.testing.assert_array_equal(store.vectors, np.arange(18, dtype=np.float32).reshape(3, 2, 3)[:count])
+    assert os.path.getsize(os.path.join(path, "data.bin")) == count * 6 * 4
+    # The recovered store keeps working
+    store.append(WORDS, np.full((3, 2, 3), -1, dtype=np.float32))
+    np.testing.assert_array_equal(VectorStore(path).vectors[count:], -1)
+
+
+def test_partial_row_is_dropped(tmp_path):
+    path = str(tmp_path)
+    filled_store(path)
+    with open(os.path.join(path, "data.bin"), "ab") as data_file:
+        data_file.write(b"\x00" * 10)
+    check_recovered(path, 3)
+
+
+def test_row_without_index_entry_is_dropped(tmp_path):
+    path = str(tmp_path)
+    filled_store(path)
+    with open(os.path.join(path, "index.jsonl"), "rb") as index_file:
+        lines = index_file.read().split(b"\n")
+    with open(os.path.join(path, "index.jsonl"), "wb") as index_file:
+        index_file.write(b"\n".join(lines[:2]) + b"\n" + lines[2][:3])  # Unterminated last line
+    check_recovered(path, 2)
+
+
+def test_index_entry_without_row_is_dropped(tmp_path):
+    path = str(tmp_path)
+    filled_store(path)
+    with open(os.path.join(path, "index.jsonl"), "ab") as index_file:
+        index_file.write(b'"DELTA"\n')
+    check_recovered(path, 3)
+    with open(os.path.join(path, "data.bin"), "r+b") as data_file:
+        data_file.truncate(24 * 2 + 5)
+    check_recovered(path, 2)
+
+
+@pytest.mark.parametrize("row_shape", [(), [], 0, (4, 0)])
+def test_empty_row_shape_is_rejected(tmp_path, row_shape):
+    with pytest.raises(ValueError, match="at least one element"):
+        VectorStore(str(tmp_path / "store"), row_shape=row_shape)
+    assert not os.path.exists(tmp_path / "store")
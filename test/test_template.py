@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from modul.circuit import Circuit
+from modul.interconnect import Interconnect
+from modul.subsystem import Subsystem
+from modul.template import CircuitTemplate
+from modul.tokenizer import Tokenizer
+from modul.tokensystem import TokenSystem
+
+WORDS = ["HELLO", "QUANTUM"]
+OPTIONS = {"topology": "random", "seed": 3}
+
+
+def direct_state(template, tokens, gate_mode):
+    """
+    Build the circuit of one token with numeric phases, without parameters.
+    """
+    circuit = Circuit(10)
+    token_system = TokenSystem(circuit, num_qubits=4)
+    token_system.tp_matrix = tokens.T[:3, :4]
+    token_system.ip_matrix = template.ip_matrix
+    token_system.apply_operations(gate_mode)
+    subsystems = []
+    for matrix in template.subsystem_matrices:
+        subsystem = Subsystem(circuit, num_qubits=2)
+        subsystem.tp_matrix = matrix
+        subsystem.apply_operations(gate_mode)
+        subsystems.append(subsystem)
+    Interconnect(circuit, **OPTIONS).entangle(token_system.qubit_range,
+                                              [subsystem.qubit_range for subsystem in subsystems])
+    return Statevector(circuit.get_circuit())
+
+
+@pytest.mark.parametrize("gate_mode, transpile_options", [
+    ("fused", None),
+    ("literal", None),
+    ("literal", {"basis_gates": ["u", "cx"], "optimization_level": 1}),
+])
+def test_bound_circuits_match_direct_build(gate_mode, transpile_options):
+    template = CircuitTemplate(10, 4, 2, 3, gate_mode=gate_mode, transpile_options=transpile_options,
+                               interconnect_options=OPTIONS)
+    if transpile_options is not None:
+        assert set(template.compiled.count_ops()) <= {"u", "cx"}
+    tokens = Tokenizer().tokenize_batch(WORDS)
+    for token, bound in zip(tokens, template.bind_batch(tokens)):
+        assert not bound.parameters
+        # Symbolic global phases are dropped by the fused mode, so compare up to a global phase
+        assert Statevector(bound).equiv(direct_state(template, token, gate_mode))
+    assert Statevector(template.bind(tokens[0])).equiv(direct_state(template, tokens[0], gate_mode))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from modul.tokenizer import Tokenizer
+
+WORDS = {
+    "empty": [""],
+    "long": ["A" * 25, "ABCDEFGHIJKLMNOPQRSTUVWXYZ"],
+    "repeated": ["MISSISSIPPI", "AAAA", "ABABABABABABABABABAB"],
+    "non_bmp": ["\U0001F600", "A\U0001D11EB\U0001F600\U0001F600"],
+    "nul": ["A\0B", "\0", "A" * 19 + "\0", "\0" * 20, "AB\0\0" * 6],
+    "mixed": ["", "HELLO", "Über", "A" * 30, "\0X\U00010000"],
+}
+
+
+@pytest.mark.parametrize("words", WORDS.values(), ids=WORDS.keys())
+def test_tokenize_batch_matches_tokenize(words):
+    tokenizer = Tokenizer()
+    expected = np.array([tokenizer.tokenize(word) for word in words])
+    np.testing.assert_array_equal(tokenizer.tokenize_batch(words), expected)
+    out = np.empty_like(expected)
+    assert tokenizer.tokenize_batch(words, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_tokenize_batch_of_no_words():
+    assert Tokenizer().tokenize_batch([]).shape == (0, 20, 3)
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 4, 7, 100])
+def test_iter_token_batches_covers_all_words(batch_size):
+    tokenizer = Tokenizer()
+    words = [f"WORD{i}" * (i % 5) for i in range(10)]
+    chunks = list(tokenizer.iter_token_batches(iter(words), batch_size=batch_size))
+    assert [len(chunk) for chunk, _ in chunks[:-1]] == [batch_size] * (len(chunks) - 1)
+    assert len(chunks[-1][0]) == len(words) - batch_size * (len(chunks) - 1)
+    assert [word for chunk, _ in chunks for word in chunk] == words
+    np.testing.assert_array_equal(np.concatenate([tokens for _, tokens in chunks]), tokenizer.tokenize_batch(words))
+
+
+def test_iter_token_batches_rejects_empty_batches():
+    with pytest.raises(ValueError, match="at least 1"):
+        next(Tokenizer().iter_token_batches(["HELLO"], batch_size=0))